@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+NTDS Cache Benchmark
+
+Compares repeated analyses of a text NTDS dump with the same analyses run against
+the columnar cache written by 'ntds import':
+    - account statistics (text parse vs. status columns)
+    - the disabled-account filter of process_ntds
+    - the cracked-hash join of combine_list_passwords
+
+Usage:
+    python -m benchmarks.bench_ntds_cache [accounts]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from credforge.combine_list_passwords import process_password_files
+from credforge.ntds_cache import FLAG_DISABLED, FLAG_EMPTY_NT, FLAG_MACHINE, NTDSCache, import_ntds
+from credforge.process_ntds import parse_ntds_line, process_ntds_file, EMPTY_NT_HASH
+
+def write_dump(path: str, cracked_file: str, accounts: int) -> None:
+    """Write a dump with disabled and machine accounts, and a potfile cracking 10% of it."""
+    rng = random.Random(1)
+    with open(path, 'w', encoding='utf-8') as dump, open(cracked_file, 'w', encoding='utf-8') as pot:
+        for i in range(accounts):
+            nt_hash = f"{rng.getrandbits(128):032x}"
+            name = f"WKS{i}$" if i % 10 == 0 else f"user{i}"
+            status = 'disabled' if i % 4 == 0 else 'enabled'
+            dump.write(f"CORP\\{name}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:{nt_hash}:"
+                       f"{status}:false:false:false\n")
+            if i % 10 == 3:
+                pot.write(f"{nt_hash}:Password{i}!\n")
+
+def text_statistics(dump_file: str):
+    """Count disabled, machine and empty-hash accounts by parsing the text."""
+    counts = [0, 0, 0]
+    with open(dump_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            record = parse_ntds_line(line)
+            if record is None:
+                continue
+            counts[0] += record.disabled
+            counts[1] += record.username.endswith('$')
+            counts[2] += record.nt_hash == EMPTY_NT_HASH
+    return counts
+
+def cache_statistics(cache_file: str):
+    """Count the same accounts from the status column of the cache."""
+    cache = NTDSCache.open(cache_file)
+    try:
+        return [cache.count_flag(flag) for flag in (FLAG_DISABLED, FLAG_MACHINE, FLAG_EMPTY_NT)]
+    finally:
+        cache.close()
+
+def timed(func, *args):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dump_file = os.path.join(temp_dir, 'ntds.txt')
+        cache_file = os.path.join(temp_dir, 'ntds.ntdsc')
+        cracked_file = os.path.join(temp_dir, 'potfile.txt')
+        write_dump(dump_file, cracked_file, accounts)
+        
+        _, import_time = timed(import_ntds, dump_file, cache_file)
+        print(f"Accounts: {accounts:,}  dump: {os.path.getsize(dump_file):,} bytes  "
+              f"cache: {os.path.getsize(cache_file):,} bytes  import: {import_time:.2f}s")
+        print(f"{'Analysis':<22}{'Text':>10}{'Cache':>10}")
+        
+        text_counts, text_time = timed(text_statistics, dump_file)
+        cache_counts, cache_time = timed(cache_statistics, cache_file)
+        assert text_counts == cache_counts
+        print(f"{'account statistics':<22}{text_time:>9.2f}s{cache_time:>9.2f}s")
+        
+        outputs = []
+        times = []
+        for source in (dump_file, cache_file):
+            output = os.path.join(temp_dir, 'filtered.txt')
+            _, elapsed = timed(process_ntds_file, source, output)
+            times.append(elapsed)
+            with open(output, 'rb') as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1]
+        print(f"{'disabled filter':<22}{times[0]:>9.2f}s{times[1]:>9.2f}s")
+        
+        outputs = []
+        times = []
+        for source in (dump_file, cache_file):
+            output = os.path.join(temp_dir, 'matched.txt')
+            _, elapsed = timed(process_password_files, cracked_file, source, output)
+            times.append(elapsed)
+            with open(output, 'rb') as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1]
+        print(f"{'cracked-hash join':<22}{times[0]:>9.2f}s{times[1]:>9.2f}s")
+
+if __name__ == "__main__":
+    main()
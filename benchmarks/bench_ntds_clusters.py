@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+NTDS Hash Clustering Benchmark
+
+Compares grouping accounts by NT hash with a dict of hex strings to lists of account
+names against find_hash_clusters, in memory and with a memory limit that forces the
+spill to disk partitions. Reports time and peak traced memory.
+
+Usage:
+    python -m benchmarks.bench_ntds_clusters [accounts]
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from credforge.ntds_clusters import find_hash_clusters
+from credforge.process_ntds import parse_ntds_line
+
+def write_dump(path: str, accounts: int) -> None:
+    """Write a dump where about a third of the accounts reuse a password."""
+    rng = random.Random(1)
+    shared = [f"{rng.getrandbits(128):032x}" for _ in range(max(1, accounts // 50))]
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(accounts):
+            nt_hash = rng.choice(shared) if i % 3 == 0 else f"{rng.getrandbits(128):032x}"
+            f.write(f"CORP\\user{i}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:{nt_hash}:::\n")
+
+def naive_clusters(dump_file: str):
+    """Group account names in a dict keyed by the hex NT hash."""
+    groups = {}
+    with open(dump_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            record = parse_ntds_line(line)
+            if record is not None:
+                groups.setdefault(record.nt_hash, []).append(record.account)
+    clusters = [(nt_hash, names) for nt_hash, names in groups.items() if len(names) > 1]
+    clusters.sort(key=lambda cluster: -len(cluster[1]))
+    return clusters
+
+def measured(func, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        dump_file = os.path.join(temp_dir, 'ntds.txt')
+        write_dump(dump_file, accounts)
+        print(f"Accounts: {accounts:,}  dump: {os.path.getsize(dump_file):,} bytes")
+        print(f"{'Method':<28}{'Time':>10}{'Peak memory':>16}")
+
+        naive, elapsed, peak = measured(naive_clusters, dump_file)
+        print(f"{'dict of name lists':<28}{elapsed:>9.2f}s{peak / 2**20:>13.1f} MB")
+
+        (clusters, _), elapsed, peak = measured(find_hash_clusters, dump_file)
+        print(f"{'find_hash_clusters':<28}{elapsed:>9.2f}s{peak / 2**20:>13.1f} MB")
+        assert [len(c.members) for c in clusters] == [len(names) for _, names in naive]
+
+        limit = 8 * 2**20
+        (spilled, stats), elapsed, peak = measured(find_hash_clusters, dump_file,
+                                                   memory_limit=limit, spill_dir=temp_dir)
+        label = f"spilled ({stats['partitions']} partitions)"
+        print(f"{label:<28}{elapsed:>9.2f}s{peak / 2**20:>13.1f} MB")
+        assert spilled == clusters
+
+if __name__ == "__main__":
+    main()
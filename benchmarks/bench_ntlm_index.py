@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+NTLM Index Memory Benchmark
+
+Compares the memory footprint and lookup speed of the plain dictionary used by
+combine_list_passwords with the compact binary NTLMIndex.
+
+Usage:
+    python -m benchmarks.bench_ntlm_index [entries]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from credforge.combine_list_passwords import load_cracked_passwords
+
+def write_potfile(path: str, entries: int) -> None:
+    """Write a potfile of random NTLM hashes with short passwords."""
+    rng = random.Random(1)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(entries):
+            f.write(f"{rng.getrandbits(128):032x}:Password{i}!\n")
+
+def measure(cracked_file: str, compact: bool):
+    """Return (lookup table, retained bytes, peak bytes, build seconds)."""
+    # Time an untraced build; tracemalloc slows allocation-heavy code down a lot
+    start = time.perf_counter()
+    table = load_cracked_passwords(cracked_file, compact=compact)
+    elapsed = time.perf_counter() - start
+    del table
+    
+    tracemalloc.start()
+    table = load_cracked_passwords(cracked_file, compact=compact)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return table, current, peak, elapsed
+
+def time_lookups(table, keys) -> float:
+    """Return lookups per second for the given keys."""
+    start = time.perf_counter()
+    for key in keys:
+        table.get(key)
+    return len(keys) / (time.perf_counter() - start)
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cracked_file = os.path.join(temp_dir, 'potfile.txt')
+        write_potfile(cracked_file, entries)
+        
+        rng = random.Random(2)
+        with open(cracked_file, 'r', encoding='utf-8') as f:
+            hits = [line.split(':', 1)[0] for line in f][:100_000]
+        misses = [f"{rng.getrandbits(128):032x}" for _ in range(len(hits))]
+        
+        print(f"Potfile entries: {entries:,}")
+        print(f"{'Table':<10} {'Retained MB':>12} {'Peak MB':>10} {'B/entry':>8} {'Build s':>8} {'Lookups/s':>12}")
+        for name, compact in (('dict', False), ('compact', True)):
+            table, current, peak, elapsed = measure(cracked_file, compact)
+            rate = time_lookups(table, hits + misses)
+            print(f"{name:<10} {current / 2**20:>12.1f} {peak / 2**20:>10.1f} "
+                  f"{current / entries:>8.1f} {elapsed:>8.2f} {rate:>12,.0f}")
+            del table
+
+if __name__ == "__main__":
+    main()
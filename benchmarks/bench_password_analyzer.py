@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Password Analyzer Benchmark
+
+Compares the exact Counter analysis with the bounded-memory streaming mode, serially
+and with worker processes, on a synthetic corpus with a Zipf-like mix of common and
+unique passwords. Each mode runs in a fresh child process so its peak resident memory
+can be reported (for parallel modes this is the parent's peak; workers are separate).
+
+Usage:
+    python -m benchmarks.bench_password_analyzer [passwords] [workers]
+"""
+
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from credforge.password_analyzer import analyze_passwords
+
+def write_corpus(path: str, passwords: int) -> None:
+    """Write a corpus where a few thousand passwords make up about 40% of the lines."""
+    rng = random.Random(1)
+    common = [f"Password{i}!" for i in range(5000)]
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(passwords):
+            if rng.random() < 0.4:
+                f.write(common[min(int(rng.paretovariate(1.1)) - 1, len(common) - 1)] + '\n')
+            else:
+                f.write(f"{rng.getrandbits(40):x}{i % 97}\n")
+
+def run(queue, path, kwargs):
+    start = time.perf_counter()
+    result = analyze_passwords(path, **kwargs)
+    elapsed = time.perf_counter() - start
+    queue.put((result, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def measured(path: str, **kwargs):
+    # A plain (non-daemon) process, so parallel modes can start their own workers
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=run, args=(queue, path, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    passwords = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus = os.path.join(temp_dir, 'passwords.txt')
+        write_corpus(corpus, passwords)
+        print(f"Passwords: {passwords:,}  file: {os.path.getsize(corpus):,} bytes")
+        print(f"{'Mode':<26}{'Time':>9}{'Peak RSS':>12}{'Unique':>14}")
+
+        exact, elapsed, rss = measured(corpus)
+        print(f"{'exact Counter':<26}{elapsed:>8.2f}s{rss:>9.0f} MB{exact['unique_passwords']:>14,}")
+
+        for budget in (64, 16):
+            result, elapsed, rss = measured(corpus, stream=True, memory_budget=budget * 2**20)
+            label = f"stream ({budget} MB budget)"
+            print(f"{label:<26}{elapsed:>8.2f}s{rss:>9.0f} MB{result['unique_passwords']:>14,}")
+            assert [p for p, _ in result['top_passwords']] == [p for p, _ in exact['top_passwords']]
+            for (password, count), (_, true_count), error in zip(
+                    result['top_passwords'], exact['top_passwords'], result['count_errors']):
+                assert count - error <= true_count <= count
+
+        result, elapsed, rss = measured(corpus, workers=workers)
+        label = f"exact, {workers} workers"
+        print(f"{label:<26}{elapsed:>8.2f}s{rss:>9.0f} MB{result['unique_passwords']:>14,}")
+        assert result == exact
+
+        result, elapsed, rss = measured(corpus, stream=True, memory_budget=64 * 2**20, workers=workers)
+        label = f"stream, {workers} workers"
+        print(f"{label:<26}{elapsed:>8.2f}s{rss:>9.0f} MB{result['unique_passwords']:>14,}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Password Composition Benchmark
+
+Times the NumPy and pure-Python implementations of the composition statistics on
+synthetic corpora. The corpus repeats a block of one million generated passwords, so
+large sizes are quick to write; composition statistics do not depend on duplicates.
+The pure-Python loop is only timed up to 10M passwords.
+
+Usage:
+    python -m benchmarks.bench_password_composition [passwords ...]
+"""
+
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+from credforge.password_composition import analyze_composition, np
+
+BLOCK_PASSWORDS = 1_000_000
+PYTHON_LIMIT = 10_000_000
+
+def make_block() -> bytes:
+    """Generate passwords with realistic lengths and class mixes."""
+    rng = random.Random(1)
+    words = ['password', 'summer', 'welcome', 'dragon', 'monkey', 'letmein', 'football']
+    lines = []
+    for _ in range(BLOCK_PASSWORDS):
+        kind = rng.random()
+        if kind < 0.5:
+            word = rng.choice(words)
+            word = word.capitalize() if rng.random() < 0.5 else word
+            lines.append(f"{word}{rng.randrange(10000)}{rng.choice(['', '!', '@', '#'])}")
+        elif kind < 0.8:
+            lines.append(''.join(rng.choices(string.ascii_lowercase + string.digits,
+                                             k=rng.randrange(6, 14))))
+        else:
+            lines.append(''.join(rng.choices(string.printable[:94], k=rng.randrange(8, 24))))
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000_000, 100_000_000]
+    block = make_block()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus = os.path.join(temp_dir, 'passwords.txt')
+        print(f"{'Passwords':>12}{'File size':>16}{'NumPy':>10}{'Python':>10}")
+        for size in sizes:
+            with open(corpus, 'wb') as f:
+                for _ in range(size // BLOCK_PASSWORDS):
+                    f.write(block)
+
+            timings = []
+            results = []
+            for use_numpy in (True, False):
+                if (use_numpy and np is None) or (not use_numpy and size > PYTHON_LIMIT):
+                    timings.append(None)
+                    continue
+                start = time.perf_counter()
+                results.append(analyze_composition(corpus, use_numpy=use_numpy))
+                timings.append(time.perf_counter() - start)
+            if len(results) == 2:
+                assert results[0]['policy_pass_rates'] == results[1]['policy_pass_rates']
+
+            cells = ''.join(f"{t:>9.1f}s" if t is not None else f"{'-':>10}" for t in timings)
+            print(f"{size:>12,}{os.path.getsize(corpus):>16,}{cells}")
+
+if __name__ == "__main__":
+    main()
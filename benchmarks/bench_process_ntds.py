@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+NTDS Filter I/O Benchmark
+
+Compares the single-pass process_ntds_file with the previous implementation, which
+read the whole dump once to count lines for progress reporting and again to filter
+it, and with the parallel filter (--workers). Bytes read are taken from /proc/self/io where available, so the saving on slow
+or network storage is visible even when the file is in the local page cache.
+
+Usage:
+    python -m benchmarks.bench_process_ntds [accounts] [workers]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from credforge.process_ntds import is_account_disabled, process_ntds_file
+
+def write_dump(path: str, accounts: int) -> None:
+    """Write an NTDS dump in which every fourth account is disabled."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(accounts):
+            status = 'disabled' if i % 4 == 0 else 'enabled'
+            f.write(f"CORP\\user{i}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:"
+                    f"{i:032x}:{status}:false:false:false\n")
+
+def two_pass_filter(input_file: str, output_file: str) -> None:
+    """The previous implementation: count the lines, then filter in text mode."""
+    with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
+        total_lines = sum(1 for _ in f)
+    with open(input_file, 'r', encoding='utf-8', errors='ignore') as infile, \
+         open(output_file, 'w', encoding='utf-8') as outfile:
+        for i, line in enumerate(infile, 1):
+            if i % 10000 == 0:
+                print(f"Processed {i:,} of {total_lines:,} accounts...")
+            line = line.strip()
+            if not line or is_account_disabled(line):
+                continue
+            outfile.write(line + '\n')
+
+def bytes_read() -> int:
+    """Return the bytes this process has read so far, or -1 if unknown."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return -1
+
+def run(label: str, func, input_file: str, output_file: str) -> None:
+    before = bytes_read()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(input_file, output_file)
+    elapsed = time.perf_counter() - start
+    read = bytes_read() - before if before >= 0 else -1
+    read_text = f"{read:,}" if read >= 0 else 'n/a'
+    print(f"{label:<14}{elapsed:>9.2f}s {read_text:>16}")
+
+def main():
+    accounts = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_file = os.path.join(temp_dir, 'ntds.txt')
+        write_dump(input_file, accounts)
+        print(f"Accounts: {accounts:,}  dump size: {os.path.getsize(input_file):,} bytes")
+        print(f"{'Filter':<14}{'Time':>10} {'Bytes read':>16}")
+        run('two pass', two_pass_filter, input_file, os.path.join(temp_dir, 'old.txt'))
+        run('single pass', process_ntds_file, input_file, os.path.join(temp_dir, 'new.txt'))
+        run(f'{workers} workers', lambda source, output: process_ntds_file(source, output, workers),
+            input_file, os.path.join(temp_dir, 'parallel.txt'))
+        
+        with open(os.path.join(temp_dir, 'old.txt'), 'rb') as old, \
+             open(os.path.join(temp_dir, 'new.txt'), 'rb') as new, \
+             open(os.path.join(temp_dir, 'parallel.txt'), 'rb') as parallel:
+            assert old.read() == new.read() == parallel.read(), "outputs differ"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Duplicate Removal Benchmark
+
+Compares the deduplication modes of remove_duplicates on a synthetic wordlist in which
+about a quarter of the lines repeat earlier ones. Each mode runs in a fresh child
+process so its peak resident memory (of the largest process, with workers) can be
+reported, and every output is checked against the exact in-memory mode (unordered
+outputs as a multiset of lines).
+
+Usage:
+    python -m benchmarks.bench_remove_duplicates [lines]
+"""
+
+import contextlib
+import hashlib
+import io
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+from credforge.remove_duplicates import deduplicate
+
+def write_wordlist(path: str, lines: int) -> None:
+    rng = random.Random(1)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            if i and rng.random() < 0.25:
+                f.write(f"{rng.randrange(i):x}word\n")
+            else:
+                f.write(f"{i:x}word\n")
+
+def run(queue, path, output, kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = deduplicate(path, output, **kwargs)
+    elapsed = time.perf_counter() - start
+    # Largest single process: the run itself or, with workers, one of its children
+    rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    queue.put((result.unique_lines, elapsed, rss / 1024))
+
+def measured(path: str, output: str, **kwargs):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=run, args=(queue, path, output, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def digest(path: str, ordered: bool = True) -> str:
+    # Streamed, so the parent stays small: children inherit its peak RSS on Linux
+    ordered_digest = hashlib.sha256()
+    line_sum = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if ordered:
+                ordered_digest.update(line)
+            else:
+                line_sum += int.from_bytes(hashlib.sha256(line).digest(), 'little')
+    return ordered_digest.hexdigest() if ordered else f"{line_sum:x}"
+
+MODES = [
+    ('exact set', {}),
+    ('64-bit fingerprints', {'fingerprint_bits': 64}),
+    ('128-bit fingerprints', {'fingerprint_bits': 128}),
+    ('64-bit, verified', {'fingerprint_bits': 64, 'verify': True}),
+    ('external, 64 MB', {'max_memory': 64 << 20}),
+    ('external, 64 MB unordered', {'max_memory': 64 << 20, 'ordered': False}),
+    ('4 workers', {'workers': 4}),
+    ('4 workers, unordered', {'workers': 4, 'ordered': False}),
+]
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wordlist = os.path.join(temp_dir, 'wordlist.txt')
+        write_wordlist(wordlist, lines)
+        print(f"Lines: {lines:,}  file: {os.path.getsize(wordlist):,} bytes")
+        print(f"{'Mode':<26}{'Time':>9}{'Peak RSS':>12}{'Unique':>14}")
+
+        expected = None
+        for label, kwargs in MODES:
+            output = os.path.join(temp_dir, 'output.txt')
+            unique, elapsed, rss = measured(wordlist, output, **kwargs)
+            print(f"{label:<26}{elapsed:>8.2f}s{rss:>9.0f} MB{unique:>14,}")
+            if expected is None:
+                expected = (digest(output), digest(output, ordered=False))
+            ordered = kwargs.get('ordered', True)
+            assert digest(output, ordered) == expected[not ordered]
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Wordlist Subtraction Benchmark
+
+Subtracts one synthetic wordlist from another, half of whose lines it contains, with
+wordlist_sets and with the shell pipeline it replaces:
+
+    sort -u A > A.sorted; sort -u B > B.sorted; comm -23 A.sorted B.sorted
+
+Each Python mode runs in a fresh child process so its peak resident memory can be
+reported. Outputs are compared as sets of lines, since the pipeline's is sorted.
+
+Usage:
+    python -m benchmarks.bench_wordlist_sets [lines]
+"""
+
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from credforge.wordlist_sets import subtract_wordlists
+
+def write_wordlists(candidates: str, tried: str, lines: int) -> None:
+    rng = random.Random(1)
+    with open(candidates, 'w', encoding='utf-8') as a, open(tried, 'w', encoding='utf-8') as b:
+        for i in range(lines):
+            a.write(f"{rng.randrange(lines):x}pass\n")
+            b.write(f"{rng.randrange(lines // 2, 3 * lines // 2):x}pass\n")
+
+def run(queue, candidates, tried, output, kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = subtract_wordlists(candidates, [tried], output, **kwargs)
+    elapsed = time.perf_counter() - start
+    queue.put((result['written'], elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+def measured(candidates: str, tried: str, output: str, **kwargs):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=run, args=(queue, candidates, tried, output, kwargs))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def shell_pipeline(candidates: str, tried: str, output: str, temp_dir: str) -> float:
+    env = dict(os.environ, LC_ALL='C')
+    start = time.perf_counter()
+    subprocess.run(['sort', '-u', '-T', temp_dir, '-o', candidates + '.sorted', candidates], check=True, env=env)
+    subprocess.run(['sort', '-u', '-T', temp_dir, '-o', tried + '.sorted', tried], check=True, env=env)
+    with open(output, 'wb') as f:
+        subprocess.run(['comm', '-23', candidates + '.sorted', tried + '.sorted'], check=True, env=env, stdout=f)
+    return time.perf_counter() - start
+
+def line_set(path: str) -> set:
+    with open(path, 'rb') as f:
+        return set(f.read().split())
+
+MODES = [
+    ('64-bit fingerprints', {'fingerprint_bits': 64}),
+    ('128-bit fingerprints', {'fingerprint_bits': 128}),
+    ('exact', {'fingerprint_bits': None}),
+]
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        candidates = os.path.join(temp_dir, 'candidates.txt')
+        tried = os.path.join(temp_dir, 'tried.txt')
+        write_wordlists(candidates, tried, lines)
+        print(f"Lines: {lines:,} per wordlist")
+        print(f"{'Mode':<26}{'Time':>9}{'Peak RSS':>12}{'Written':>14}")
+
+        outputs = []
+        for label, kwargs in MODES:
+            output = os.path.join(temp_dir, f"output{len(outputs)}.txt")
+            written, elapsed, rss = measured(candidates, tried, output, **kwargs)
+            print(f"{label:<26}{elapsed:>8.2f}s{rss:>9.0f} MB{written:>14,}")
+            outputs.append(output)
+
+        if shutil.which('sort') and shutil.which('comm'):
+            output = os.path.join(temp_dir, 'pipeline.txt')
+            elapsed = shell_pipeline(candidates, tried, output, temp_dir)
+            print(f"{'sort -u | comm -23':<26}{elapsed:>8.2f}s{'':>12}{sum(1 for _ in open(output, 'rb')):>14,}")
+            outputs.append(output)
+
+        expected = line_set(outputs[0])
+        assert all(line_set(output) == expected for output in outputs[1:])
+
+if __name__ == "__main__":
+    main()
@@ -7,27 +7,482 @@ credential files. It reads a file containing hash:password pairs and matches the
 NTDS dump files to produce combined credential output.
 
 Usage:
-    python combine_list_passwords.py
+    python combine_list_passwords.py [-c CRACKED] [-n HASHES] [-o OUTPUT] [--compact-index]
+                                     [--index [INDEX_FILE]] [--workers N]
+                                     [--bloom [FP_RATE]] [--join-side {auto,cracked,hashes}]
+    python combine_list_passwords.py -c CRACKED --batch NTDS [NTDS ...] [--output-dir DIR]
+    python combine_list_passwords.py -c POTFILE -n HASHES -o OUTPUT --follow [--poll-interval SECONDS]
     
-The script will prompt for:
+Any path not given on the command line is prompted for:
     - Path to cracked passwords file (format: hash:password)
-    - Path to NTLM hash file (NTDS dump format)
+    - Path to NTLM hash file (NTDS dump format, or an NTDS cache from 'ntds import')
     - Output file name for matched credentials
 """
 
+import argparse
+import glob
+import io
 import sys
 import os
+import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
-def process_password_files(cracked_file: str, hash_file: str, output_file: str) -> bool:
+from credforge.bloom_filter import DEFAULT_FP_RATE
+from credforge.fileutils import pool_context, read_range, split_count, split_line_ranges
+from credforge.ntds_cache import FLAG_RAW, NTDSCache, is_ntds_cache
+from credforge.ntlm_index import (BloomFilteredLookup, NTLMIndex, build_bloom_filter,
+                                  default_index_path, iter_cracked_pairs, load_or_build_bloom,
+                                  load_or_build_index)
+
+# Cracked hash lookup table: a plain dict or the compact binary index,
+# optionally behind a Bloom filter prefilter
+HashLookup = Union[Dict[str, str], NTLMIndex, BloomFilteredLookup]
+
+# Number of matches kept in memory for the console preview
+PREVIEW_LIMIT = 5
+
+# Write buffer for the matched credentials file
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Name of the per-run summary written by batch mode
+BATCH_SUMMARY_NAME = 'batch_summary.txt'
+
+# Seconds between potfile polls in follow mode
+FOLLOW_POLL_INTERVAL = 5.0
+
+# Bytes of the potfile read at a time in follow mode
+FOLLOW_READ_SIZE = 4 * 1024 * 1024
+
+# LM hash of an empty password, never a useful NTLM match
+EMPTY_LM_HASH = 'aad3b435b51404eeaad3b435b51404ee'
+
+def load_cracked_passwords(cracked_file: str, compact: bool = False) -> HashLookup:
+    """
+    Load a hash:password file into a lookup table keyed by lowercase hash.
+    
+    Args:
+        cracked_file: Path to file containing hash:password pairs
+        compact: Build a compact binary NTLMIndex instead of a dictionary.
+            Lookups are slower, but memory use drops from 100+ bytes per
+            entry to 24 bytes plus the password, which is what makes
+            potfiles with hundreds of millions of entries usable.
+        
+    Returns:
+        Mapping of lowercase hashes to their cracked passwords
+    """
+    if compact:
+        return NTLMIndex.from_cracked_file(cracked_file)
+    
+    hash_to_password: Dict[str, str] = {}
+    for hash_part, password in iter_cracked_pairs(cracked_file):
+        hash_to_password[hash_part] = password
+    return hash_to_password
+
+def _print_warning(line_num: int, text: str) -> None:
+    print(f"Warning: Line {line_num} {text}")
+
+def _iter_ntds_accounts(lines: Iterable[str],
+                        warn: Callable[[int, str], None]) -> Iterator[Optional[Tuple[str, str]]]:
+    """
+    Parse NTDS dump lines into (username, lowercase NTLM hash) pairs.
+    
+    One item is yielded per input line so callers can count lines; blank, malformed
+    and empty-hash lines yield None.
+    
+    Args:
+        lines: NTDS dump lines
+        warn: Called with (line number, message) for malformed lines
+    """
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        
+        if not line:
+            yield None
+            continue
+            
+        if ':' not in line:
+            warn(line_num, f"in hash file has invalid format: {line}")
+            yield None
+            continue
+            
+        parts = line.split(':')
+        if len(parts) < 4:  # Need at least username:rid:lm:ntlm
+            warn(line_num, f"has insufficient fields: {line}")
+            yield None
+            continue
+            
+        username = parts[0]
+        # NTDS format: username:rid:lmhash:ntlmhash:::
+        # We want the NTLM hash (4th field, index 3)
+        ntlm_hash = parts[3].lower()
+            
+        # Skip empty hashes
+        if not ntlm_hash or ntlm_hash == EMPTY_LM_HASH:
+            yield None
+            continue
+        
+        yield username, ntlm_hash
+
+def _iter_cache_accounts(cache: NTDSCache,
+                         warn: Callable[[int, str], None]) -> Iterator[Optional[Tuple[str, str]]]:
+    """
+    Cache version of _iter_ntds_accounts.
+    
+    Records hold one dump line each, so items and line numbers are the same as for
+    the text the cache was imported from.
+    """
+    for line_num, (flags, account, _, _, nt_digest, _) in enumerate(cache.iter_rows(), 1):
+        if flags & FLAG_RAW:
+            # Lines kept verbatim go through the text parser, warnings included
+            yield from _iter_ntds_accounts([account.decode('utf-8', errors='ignore')],
+                                           lambda _, text: warn(line_num, text))
+            continue
+        ntlm_hash = nt_digest.hex()
+        if ntlm_hash == EMPTY_LM_HASH:
+            yield None
+        else:
+            yield account.decode('utf-8', errors='ignore'), ntlm_hash
+
+def _match_cache(cache: NTDSCache, hash_to_password: HashLookup, emit: Callable[[str], None],
+                 warn: Callable[[int, str], None], start: int = 0, end: Optional[int] = None) -> int:
+    """
+    Cache version of _match_accounts over records start..end-1.
+    
+    Only the NT hash column is scanned; account names are read for matches only.
+    
+    Returns:
+        Number of records (lines) processed
+    """
+    get = hash_to_password.get
+    processed_lines = 0
+    for i, ntlm_hash in enumerate(cache.iter_nt_hashes(start, end), start):
+        processed_lines += 1
+        if ntlm_hash is None:
+            # Lines kept verbatim go through the text parser, warnings included
+            line_num = i - start + 1
+            line = cache.account(i).decode('utf-8', errors='ignore')
+            _match_accounts(_iter_ntds_accounts([line], lambda _, text: warn(line_num, text)),
+                            hash_to_password, emit)
+            continue
+        if ntlm_hash == EMPTY_LM_HASH:
+            continue
+        password = get(ntlm_hash)
+        if password is not None:
+            emit(f"{cache.account(i).decode('utf-8', errors='ignore')}:{ntlm_hash}:{password}")
+    return processed_lines
+
+def iter_hash_file_accounts(hash_file: str,
+                            warn: Callable[[int, str], None] = _print_warning
+                            ) -> Iterator[Optional[Tuple[str, str]]]:
+    """
+    Yield one (username, lowercase NTLM hash) pair or None per line of an NTDS dump.
+    
+    hash_file may be a text dump or an NTDS cache written by 'ntds import'.
+    """
+    if is_ntds_cache(hash_file):
+        cache = NTDSCache.open(hash_file)
+        try:
+            yield from _iter_cache_accounts(cache, warn)
+        finally:
+            cache.close()
+        return
+    
+    with open(hash_file, 'r', encoding='utf-8', errors='ignore') as f:
+        yield from _iter_ntds_accounts(f, warn)
+
+def _match_accounts(accounts: Iterable[Optional[Tuple[str, str]]], hash_to_password: HashLookup,
+                    emit: Callable[[str], None]) -> int:
+    """
+    Look up the NTLM hash of every NTDS account and emit username:hash:password for cracked ones.
+    
+    Args:
+        accounts: Items of _iter_ntds_accounts, one per NTDS line
+        hash_to_password: Lookup table of cracked hashes
+        emit: Called with each match
+        
+    Returns:
+        Number of lines processed
+    """
+    processed_lines = 0
+    
+    for account in accounts:
+        processed_lines += 1
+        if account is None:
+            continue
+        
+        # Check if this hash has been cracked
+        username, ntlm_hash = account
+        password = hash_to_password.get(ntlm_hash)
+        if password is not None:
+            emit(f"{username}:{ntlm_hash}:{password}")
+    
+    return processed_lines
+
+def match_hash_file(hash_to_password: HashLookup, hash_file: str, out: TextIO,
+                    preview: List[str],
+                    warn: Callable[[int, str], None] = _print_warning) -> Tuple[int, int]:
+    """
+    Stream an NTDS dump and write every cracked account to out as soon as it is found.
+    
+    Args:
+        hash_to_password: Lookup table of cracked hashes
+        hash_file: Path to NTDS dump file
+        out: Open text stream receiving username:hash:password lines
+        preview: List that receives the first PREVIEW_LIMIT matches
+        warn: Called with (line number, message) for malformed lines
+        
+    Returns:
+        Tuple of (lines processed, matches written)
+    """
+    match_count = 0
+    
+    def emit(match: str) -> None:
+        nonlocal match_count
+        out.write(match + '\n')
+        match_count += 1
+        if len(preview) < PREVIEW_LIMIT:
+            preview.append(match)
+    
+    if is_ntds_cache(hash_file):
+        cache = NTDSCache.open(hash_file)
+        try:
+            processed_lines = _match_cache(cache, hash_to_password, emit, warn)
+        finally:
+            cache.close()
+    else:
+        processed_lines = _match_accounts(iter_hash_file_accounts(hash_file, warn),
+                                          hash_to_password, emit)
+    
+    return processed_lines, match_count
+
+# Lookup table of the current worker process, set by _init_match_worker
+_worker_lookup: Optional[HashLookup] = None
+
+def _init_match_worker(hash_to_password: HashLookup) -> None:
+    global _worker_lookup
+    _worker_lookup = hash_to_password
+
+def _match_range(task: Tuple[str, int, int, bool]) -> Tuple[int, List[str], List[Tuple[int, str]]]:
+    """
+    Match one part of an NTDS dump inside a worker process: a newline-aligned byte
+    range of a text dump, or a range of record numbers of an NTDS cache.
+    """
+    hash_file, start, end, from_cache = task
+    matches: List[str] = []
+    warnings: List[Tuple[int, str]] = []
+    
+    def warn(line_num: int, text: str) -> None:
+        warnings.append((line_num, text))
+    
+    if from_cache:
+        cache = NTDSCache.open(hash_file)
+        try:
+            processed_lines = _match_cache(cache, _worker_lookup, matches.append, warn,
+                                           start, end)
+        finally:
+            cache.close()
+        return processed_lines, matches, warnings
+    
+    # Decode exactly like the serial path so line splitting and numbering agree
+    lines = io.TextIOWrapper(io.BytesIO(read_range(hash_file, start, end)),
+                             encoding='utf-8', errors='ignore')
+    processed_lines = _match_accounts(_iter_ntds_accounts(lines, warn), _worker_lookup,
+                                      matches.append)
+    return processed_lines, matches, warnings
+
+def match_hash_file_parallel(hash_to_password: HashLookup, hash_file: str, out: TextIO,
+                             preview: List[str], workers: int) -> Tuple[int, int]:
+    """
+    Match an NTDS dump on several cores, writing results in original file order.
+    
+    The dump is split into newline-aligned byte ranges (or record ranges of an NTDS
+    cache) that are matched in a process pool. Where the platform supports fork, the lookup table is shared with the
+    workers copy-on-write; a memory-mapped index is otherwise re-opened by path.
+    
+    Args:
+        hash_to_password: Lookup table of cracked hashes
+        hash_file: Path to NTDS dump file
+        out: Open text stream receiving username:hash:password lines
+        preview: List that receives the first PREVIEW_LIMIT matches
+        workers: Number of worker processes
+        
+    Returns:
+        Tuple of (lines processed, matches written)
+    """
+    if is_ntds_cache(hash_file):
+        cache = NTDSCache.open(hash_file)
+        records = len(cache)
+        cache.close()
+        tasks = [(hash_file, start, end, True) for start, end in split_count(records, workers)]
+    else:
+        tasks = [(hash_file, start, end, False)
+                 for start, end in split_line_ranges(hash_file, workers)]
+    processed_lines = 0
+    match_count = 0
+    
+    with pool_context().Pool(workers, initializer=_init_match_worker,
+                             initargs=(hash_to_password,)) as pool:
+        # imap returns ranges in submission order, which is file order
+        for range_lines, matches, warnings in pool.imap(_match_range, tasks):
+            for line_num, text in warnings:
+                _print_warning(processed_lines + line_num, text)
+            if matches:
+                out.write('\n'.join(matches) + '\n')
+                preview.extend(matches[:PREVIEW_LIMIT - len(preview)])
+            processed_lines += range_lines
+            match_count += len(matches)
+    
+    return processed_lines, match_count
+
+def print_match_summary(match_count: int, cracked_count: int, output_file: str,
+                        preview: List[str], cracked_label: str = 'cracked hashes') -> None:
+    """Print the match statistics and a short preview of the first matches."""
+    print("\nProcessing complete!")
+    print(f"Found {match_count} matches out of {cracked_count} {cracked_label}.")
+    print(f"Results written to: {output_file}")
+    
+    # Print first few matches as preview
+    if preview:
+        print("\nFirst few matches:")
+        for match in preview:
+            # Truncate long usernames/passwords for display
+            parts = match.split(':')
+            if len(parts) >= 3:
+                user = parts[0][:30] + '...' if len(parts[0]) > 30 else parts[0]
+                hash_part = parts[1][:16] + '...' if len(parts[1]) > 16 else parts[1]
+                pwd = parts[2][:20] + '...' if len(parts[2]) > 20 else parts[2]
+                print(f"  {user}:{hash_part}:{pwd}")
+            else:
+                print(f"  {match}")
+        if match_count > len(preview):
+            print(f"  ... and {match_count - len(preview)} more")
+    else:
+        print("\nNo matches found. Check that:")
+        print("  - Hash formats match between files")
+        print("  - NTDS file contains the expected format")
+        print("  - Cracked passwords file uses hash:password format")
+
+def choose_join_side(cracked_file: str, hash_file: str) -> str:
+    """
+    Pick which input to index: the smaller one is held in memory and the larger one streamed.
+    
+    Returns:
+        'cracked' to index the cracked passwords file, 'hashes' to index the NTDS dump
+    """
+    if os.path.getsize(hash_file) < os.path.getsize(cracked_file):
+        return 'hashes'
+    return 'cracked'
+
+def match_by_hash_index(cracked_file: str, hash_file: str, out: TextIO,
+                        preview: List[str]) -> Tuple[int, int, int]:
+    """
+    Join by indexing the NTDS dump and streaming the cracked passwords file.
+    
+    Used when the dump is much smaller than the cracked file, e.g. one client dump
+    against a large community potfile: only the dump's hashes are kept in memory,
+    and only potfile entries for those hashes are retained. The output is the same
+    as the cracked-side join, in NTDS order, with the last potfile entry winning
+    for repeated hashes.
+    
+    Args:
+        cracked_file: Path to file containing hash:password pairs
+        hash_file: Path to NTDS dump file
+        out: Open text stream receiving username:hash:password lines
+        preview: List that receives the first PREVIEW_LIMIT matches
+        
+    Returns:
+        Tuple of (hash file lines processed, matches written, cracked entries scanned)
+    """
+    accounts: List[Tuple[str, str]] = []
+    processed_lines = 0
+    for account in iter_hash_file_accounts(hash_file):
+        processed_lines += 1
+        if account is not None:
+            accounts.append(account)
+    
+    wanted: Dict[str, Optional[str]] = {ntlm_hash: None for _, ntlm_hash in accounts}
+    print(f"Indexed {len(wanted)} unique hashes from {len(accounts)} accounts in hash file.")
+    
+    cracked_entries = 0
+    for hash_part, password in iter_cracked_pairs(cracked_file):
+        cracked_entries += 1
+        if hash_part in wanted:
+            wanted[hash_part] = password
+    print(f"Scanned {cracked_entries} cracked password entries.")
+    
+    match_count = 0
+    for username, ntlm_hash in accounts:
+        password = wanted[ntlm_hash]
+        if password is not None:
+            match = f"{username}:{ntlm_hash}:{password}"
+            out.write(match + '\n')
+            match_count += 1
+            if len(preview) < PREVIEW_LIMIT:
+                preview.append(match)
+    
+    return processed_lines, match_count, cracked_entries
+
+def _load_lookup(cracked_file: str, compact_index: bool, index_file: Optional[str],
+                 bloom_fp: Optional[float] = None) -> Optional[HashLookup]:
+    """Load the cracked hash lookup table, printing an error and returning None on failure."""
+    try:
+        if index_file:
+            hash_to_password = load_or_build_index(cracked_file, index_file)
+        else:
+            hash_to_password = load_cracked_passwords(cracked_file, compact=compact_index)
+        print(f"Loaded {len(hash_to_password)} cracked password hashes.")
+        
+        if bloom_fp is not None and isinstance(hash_to_password, dict):
+            # A dict lookup is already cheaper than hashing a key for the filter
+            print("Note: --bloom only speeds up --compact-index and --index; skipping the filter.")
+        elif bloom_fp is not None:
+            if index_file:
+                bloom = load_or_build_bloom(hash_to_password, cracked_file, fp_rate=bloom_fp)
+            else:
+                bloom = build_bloom_filter(hash_to_password, bloom_fp)
+            hash_to_password = BloomFilteredLookup(hash_to_password, bloom)
+        return hash_to_password
+        
+    except FileNotFoundError:
+        print(f"Error: Could not find cracked passwords file '{cracked_file}'")
+        return None
+    except Exception as e:
+        print(f"Error reading cracked passwords file: {e}")
+        return None
+
+def _close_lookup(hash_to_password: HashLookup) -> None:
+    """Release any memory maps held by a lookup table."""
+    close = getattr(hash_to_password, 'close', None)
+    if close is not None:
+        close()
+
+def process_password_files(cracked_file: str, hash_file: str, output_file: str,
+                           compact_index: bool = False, index_file: Optional[str] = None,
+                           workers: int = 1, join_side: str = 'auto',
+                           bloom_fp: Optional[float] = None) -> bool:
     """
     Process cracked passwords and NTDS hash files to find matches.
     
+    Matches are streamed to the output file as they are found, so memory use is
+    bounded by the cracked hash lookup table rather than the number of matches.
+    By default the smaller of the two inputs is indexed and the larger one
+    streamed; the output is the same either way.
+    
     Args:
         cracked_file: Path to file containing hash:password pairs
         hash_file: Path to NTDS dump file
         output_file: Path to write matched credentials
+        compact_index: Hold cracked hashes in a compact NTLMIndex instead of a dict
+        index_file: Memory-map this on-disk index of the cracked file instead of
+            parsing it; the index is (re)built first if missing or stale
+        workers: Number of processes matching the hash file; results keep file order
+        bloom_fp: Put a Bloom filter with this false-positive rate in front of the
+            compact or on-disk index; stored next to index_file when one is used.
+            Ignored for a plain dict lookup, which is faster without it
+        join_side: Which input to index: 'cracked', 'hashes' (the NTDS dump) or
+            'auto' to pick the smaller one. The cracked-side options above
+            always index the cracked file.
         
     Returns:
         bool: True if processing was successful, False otherwise
@@ -41,131 +496,489 @@ def process_password_files(cracked_file: str, hash_file: str, output_file: str)
         print(f"Error: Hash file '{hash_file}' not found.")
         return False
     
+    cracked_side_options = compact_index or index_file or workers > 1 or bloom_fp is not None
+    if join_side == 'auto':
+        join_side = 'cracked' if cracked_side_options else choose_join_side(cracked_file, hash_file)
+    if join_side == 'hashes':
+        if cracked_side_options:
+            print("Error: Indexing the hash file cannot be combined with --compact-index, --index, "
+                  "--bloom or --workers.")
+            return False
+        return _process_by_hash_index(cracked_file, hash_file, output_file)
+    
     # Read and parse the cracked passwords file
-    hash_to_password: Dict[str, str] = {}
+    hash_to_password = _load_lookup(cracked_file, compact_index, index_file, bloom_fp)
+    if hash_to_password is None:
+        return False
+    cracked_count = len(hash_to_password)
+    
     try:
-        with open(cracked_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if line and ':' in line:
-                    # Split only on first colon in case password contains colons
-                    hash_part, password = line.split(':', 1)
-                    hash_to_password[hash_part.lower()] = password
-                elif line:  # Non-empty line without colon
-                    print(f"Warning: Line {line_num} in cracked file has invalid format: {line}")
-                    
-        print(f"Loaded {len(hash_to_password)} cracked password hashes.")
+        out = open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+    except Exception as e:
+        print(f"Error writing to output file: {e}")
+        return False
+    
+    # Process the hash file, writing matches as they are found
+    preview: List[str] = []
+    try:
+        with out:
+            if workers > 1:
+                processed_lines, match_count = match_hash_file_parallel(
+                    hash_to_password, hash_file, out, preview, workers)
+            else:
+                processed_lines, match_count = match_hash_file(hash_to_password, hash_file, out, preview)
+        print(f"Processed {processed_lines} lines from hash file.")
         
     except FileNotFoundError:
-        print(f"Error: Could not find cracked passwords file '{cracked_file}'")
+        print(f"Error: Could not find hash file '{hash_file}'")
         return False
     except Exception as e:
-        print(f"Error reading cracked passwords file: {e}")
+        print(f"Error reading hash file: {e}")
         return False
+    finally:
+        _close_lookup(hash_to_password)
     
-    # Process the hash file and find matches
-    matches: List[str] = []
-    processed_lines = 0
+    print_match_summary(match_count, cracked_count, output_file, preview)
+    return True
+
+def _process_by_hash_index(cracked_file: str, hash_file: str, output_file: str) -> bool:
+    """Run the join with the NTDS dump indexed and the cracked file streamed."""
+    try:
+        out = open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
+    except Exception as e:
+        print(f"Error writing to output file: {e}")
+        return False
     
+    preview: List[str] = []
     try:
-        with open(hash_file, 'r', encoding='utf-8', errors='ignore') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                processed_lines += 1
-                
-                if not line:
-                    continue
-                    
-                if ':' not in line:
-                    print(f"Warning: Line {line_num} in hash file has invalid format: {line}")
-                    continue
-                    
-                parts = line.split(':')
-                if len(parts) < 4:  # Need at least username:rid:lm:ntlm
-                    print(f"Warning: Line {line_num} has insufficient fields: {line}")
-                    continue
-                    
-                username = parts[0]
-                # NTDS format: username:rid:lmhash:ntlmhash:::
-                # We want the NTLM hash (4th field, index 3)
-                if len(parts) >= 4:
-                    ntlm_hash = parts[3].lower()
-                else:
-                    continue
-                    
-                # Skip empty hashes
-                if not ntlm_hash or ntlm_hash == 'aad3b435b51404eeaad3b435b51404ee':
-                    continue
-                        
-                # Check if this hash has been cracked
-                if ntlm_hash in hash_to_password:
-                    password = hash_to_password[ntlm_hash]
-                    matches.append(f"{username}:{ntlm_hash}:{password}")
-                    
+        with out:
+            processed_lines, match_count, cracked_entries = match_by_hash_index(
+                cracked_file, hash_file, out, preview)
         print(f"Processed {processed_lines} lines from hash file.")
         
-    except FileNotFoundError:
-        print(f"Error: Could not find hash file '{hash_file}'")
+    except Exception as e:
+        print(f"Error processing files: {e}")
+        return False
+    
+    print_match_summary(match_count, cracked_entries, output_file, preview,
+                        cracked_label='cracked entries scanned')
+    return True
+
+class PotfileFollower:
+    """
+    Match a growing potfile against an NTDS dump while a crack session is running.
+    
+    The dump is indexed once as NTLM hash -> usernames and kept in memory. Each
+    poll() reads only the bytes appended to the potfile since the previous poll,
+    so the work per poll is proportional to the new cracks rather than the size of
+    either file. The new bytes are read in blocks of FOLLOW_READ_SIZE, and a trailing
+    line without a newline is left for the next poll, as hashcat may still be writing it.
+    
+    Within one poll the last entry for a hash wins and matches are written in NTDS
+    order, so the first poll over an existing potfile writes exactly what a normal
+    run would. A hash is emitted once: an entry for a hash matched by an earlier
+    poll is ignored. If the potfile shrinks (truncated or replaced) it is rescanned
+    from the start, and hashes already emitted are not written again.
+    """
+    
+    def __init__(self, cracked_file: str, hash_file: str, out: TextIO,
+                 warn: Callable[[int, str], None] = _print_warning):
+        self.cracked_file = cracked_file
+        self.out = out
+        self.preview: List[str] = []
+        self.match_count = 0
+        self.cracked_entries = 0
+        self.processed_lines = 0
+        self._warn = warn
+        self._offset = 0
+        self._line_num = 0
+        
+        # Hashes not yet cracked, each with its (NTDS line, username) accounts
+        self._pending: Dict[str, List[Tuple[int, str]]] = {}
+        for account in iter_hash_file_accounts(hash_file, warn):
+            self.processed_lines += 1
+            if account is not None:
+                username, ntlm_hash = account
+                self._pending.setdefault(ntlm_hash, []).append((self.processed_lines, username))
+    
+    @property
+    def pending_hashes(self) -> int:
+        """Number of unique NTDS hashes not matched yet."""
+        return len(self._pending)
+    
+    def poll(self) -> int:
+        """
+        Match the complete lines appended to the potfile since the last poll.
+        
+        Returns:
+            Number of matches written by this poll
+        """
+        try:
+            size = os.stat(self.cracked_file).st_size
+        except FileNotFoundError:
+            # hashcat creates the potfile with its first crack
+            return 0
+        if size < self._offset:
+            print(f"Warning: '{self.cracked_file}' shrank; rescanning it from the start.")
+            self._offset = 0
+            self._line_num = 0
+        if size == self._offset:
+            return 0
+        
+        # Password of each pending hash cracked in this poll; later entries overwrite
+        cracked: Dict[str, str] = {}
+        with open(self.cracked_file, 'rb') as f:
+            f.seek(self._offset)
+            remaining = size - self._offset
+            partial = b''
+            while remaining > 0:
+                data = f.read(min(FOLLOW_READ_SIZE, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    partial += data
+                    continue
+                block = partial + data[:end]
+                partial = data[end:]
+                self._offset += len(block)
+                self._read_lines(block, cracked)
+        
+        matches = []
+        for hash_part, password in cracked.items():
+            for position, username in self._pending.pop(hash_part):
+                matches.append((position, f"{username}:{hash_part}:{password}"))
+        matches.sort()
+        for _, match in matches:
+            self.out.write(match + '\n')
+            if len(self.preview) < PREVIEW_LIMIT:
+                self.preview.append(match)
+        
+        new_matches = len(matches)
+        self.match_count += new_matches
+        # Make new matches visible to anyone watching the output file
+        self.out.flush()
+        return new_matches
+    
+    def _read_lines(self, block: bytes, cracked: Dict[str, str]) -> None:
+        """Record the pending hashes cracked by a block of complete potfile lines."""
+        for line in block.decode('utf-8', errors='ignore').split('\n')[:-1]:
+            self._line_num += 1
+            line = line.strip()
+            if not line:
+                continue
+            if ':' not in line:
+                print(f"Warning: Line {self._line_num} in cracked file has invalid format: {line}")
+                continue
+            self.cracked_entries += 1
+            hash_part, password = line.split(':', 1)
+            hash_part = hash_part.lower()
+            if hash_part in self._pending:
+                cracked[hash_part] = password
+
+def follow_password_files(cracked_file: str, hash_file: str, output_file: str,
+                          poll_interval: float = FOLLOW_POLL_INTERVAL,
+                          max_polls: Optional[int] = None) -> bool:
+    """
+    Keep matching a potfile against an NTDS dump as a running crack session appends to it.
+    
+    Existing potfile entries are matched first; after that the potfile is polled every
+    poll_interval seconds and new matches are appended to the output file as they
+    appear. Runs until interrupted (Ctrl+C) or until max_polls polls have been made.
+    
+    Args:
+        cracked_file: Path to the potfile being written by the crack session
+        hash_file: Path to NTDS dump file
+        output_file: Path to write matched credentials
+        poll_interval: Seconds to wait between polls
+        max_polls: Stop after this many polls (default: run until interrupted)
+        
+    Returns:
+        bool: True if processing was successful, False otherwise
+    """
+    if not Path(hash_file).is_file():
+        print(f"Error: Hash file '{hash_file}' not found.")
         return False
+    
+    try:
+        out = open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE)
     except Exception as e:
-        print(f"Error reading hash file: {e}")
+        print(f"Error writing to output file: {e}")
         return False
     
-    # Write results to output file
+    with out:
+        try:
+            follower = PotfileFollower(cracked_file, hash_file, out)
+        except Exception as e:
+            print(f"Error reading hash file: {e}")
+            return False
+        print(f"Processed {follower.processed_lines} lines from hash file.")
+        print(f"Following '{cracked_file}' for {follower.pending_hashes} unique hashes "
+              f"(polling every {poll_interval:g}s, Ctrl+C to stop)...")
+        
+        polls = 0
+        try:
+            while True:
+                new_matches = follower.poll()
+                polls += 1
+                if new_matches:
+                    print(f"[{time.strftime('%H:%M:%S')}] {new_matches} new matches "
+                          f"({follower.match_count} total, {follower.pending_hashes} hashes left)")
+                if not follower.pending_hashes:
+                    print("Every hash in the hash file has been matched.")
+                    break
+                if max_polls is not None and polls >= max_polls:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            print("\nStopped following.")
+        except Exception as e:
+            print(f"Error reading cracked file: {e}")
+            return False
+    
+    print_match_summary(follower.match_count, follower.cracked_entries, output_file,
+                        follower.preview, cracked_label='cracked entries read')
+    return True
+
+def expand_hash_files(patterns: Iterable[str]) -> List[str]:
+    """
+    Expand a list of paths and glob patterns into NTDS file paths.
+    
+    Patterns are expanded in sorted order; paths are kept as given even if they do
+    not exist, so they can be reported. Duplicates are dropped.
+    """
+    hash_files: List[str] = []
+    for pattern in patterns:
+        if any(char in pattern for char in '*?['):
+            candidates = sorted(glob.glob(pattern))
+        else:
+            candidates = [pattern]
+        for candidate in candidates:
+            if candidate not in hash_files:
+                hash_files.append(candidate)
+    return hash_files
+
+def _batch_output_paths(hash_files: List[str], output_dir: str) -> List[str]:
+    """Name one matched file per dump, disambiguating dumps that share a file name."""
+    used = set()
+    outputs = []
+    for hash_file in hash_files:
+        stem = Path(hash_file).stem
+        name = f"{stem}_matched.txt"
+        suffix = 2
+        while name in used:
+            name = f"{stem}_{suffix}_matched.txt"
+            suffix += 1
+        used.add(name)
+        outputs.append(os.path.join(output_dir, name))
+    return outputs
+
+def _match_batch_file(hash_to_password: HashLookup, hash_file: str,
+                      output_file: str) -> Tuple[int, int, Optional[str]]:
+    """Join one dump of a batch; returns (lines processed, matches, error message or None)."""
+    def warn(line_num: int, text: str) -> None:
+        print(f"Warning: {hash_file}: Line {line_num} {text}")
+    
     try:
-        with open(output_file, 'w', encoding='utf-8') as f:
-            for match in matches:
-                f.write(match + '\n')
-        
-        print("\nProcessing complete!")
-        print(f"Found {len(matches)} matches out of {len(hash_to_password)} cracked hashes.")
-        print(f"Results written to: {output_file}")
-        
-        # Print first few matches as preview
-        if matches:
-            print("\nFirst few matches:")
-            for i in range(min(5, len(matches))):
-                # Truncate long usernames/passwords for display
-                parts = matches[i].split(':')
-                if len(parts) >= 3:
-                    user = parts[0][:30] + '...' if len(parts[0]) > 30 else parts[0]
-                    hash_part = parts[1][:16] + '...' if len(parts[1]) > 16 else parts[1]
-                    pwd = parts[2][:20] + '...' if len(parts[2]) > 20 else parts[2]
-                    print(f"  {user}:{hash_part}:{pwd}")
-                else:
-                    print(f"  {matches[i]}")
-            if len(matches) > 5:
-                print(f"  ... and {len(matches) - 5} more")
+        with open(output_file, 'w', encoding='utf-8', buffering=OUTPUT_BUFFER_SIZE) as out:
+            processed_lines, match_count = match_hash_file(hash_to_password, hash_file, out, [],
+                                                           warn=warn)
+        return processed_lines, match_count, None
+    except Exception as e:
+        return 0, 0, str(e)
+
+def _match_batch_task(task: Tuple[str, str]) -> Tuple[int, int, Optional[str]]:
+    return _match_batch_file(_worker_lookup, *task)
+
+def process_batch(cracked_file: str, hash_files: List[str], output_dir: str,
+                  compact_index: bool = False, index_file: Optional[str] = None,
+                  workers: Optional[int] = None, bloom_fp: Optional[float] = None) -> bool:
+    """
+    Match many NTDS dumps against one cracked passwords file.
+    
+    The cracked hash lookup table is loaded once and the dumps are joined
+    concurrently in a process pool, each into its own <name>_matched.txt file in
+    output_dir. A combined summary is written to batch_summary.txt.
+    
+    Args:
+        cracked_file: Path to file containing hash:password pairs
+        hash_files: Paths to NTDS dump files
+        output_dir: Directory receiving the matched files and the summary
+        compact_index: Hold cracked hashes in a compact NTLMIndex instead of a dict
+        index_file: Memory-map this on-disk index of the cracked file instead of parsing it
+        workers: Number of dumps joined at once (default: one per CPU, up to the number of dumps)
+        bloom_fp: Put a Bloom filter with this false-positive rate in front of the compact
+            or on-disk index (ignored for a plain dict lookup)
+        
+    Returns:
+        bool: True if every dump was processed successfully, False otherwise
+    """
+    if not Path(cracked_file).is_file():
+        print(f"Error: Cracked passwords file '{cracked_file}' not found.")
+        return False
+    
+    if not hash_files:
+        print("Error: No hash files to process.")
+        return False
+    
+    for hash_file in hash_files:
+        if not Path(hash_file).is_file():
+            print(f"Error: Hash file '{hash_file}' not found.")
+            return False
+    
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except Exception as e:
+        print(f"Error creating output directory: {e}")
+        return False
+    
+    hash_to_password = _load_lookup(cracked_file, compact_index, index_file, bloom_fp)
+    if hash_to_password is None:
+        return False
+    cracked_count = len(hash_to_password)
+    
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(hash_files)))
+    output_files = _batch_output_paths(hash_files, output_dir)
+    tasks = list(zip(hash_files, output_files))
+    
+    print(f"Matching {len(hash_files)} hash files using {workers} worker(s)...")
+    try:
+        if workers > 1:
+            with pool_context().Pool(workers, initializer=_init_match_worker,
+                                     initargs=(hash_to_password,)) as pool:
+                results = pool.map(_match_batch_task, tasks, chunksize=1)
         else:
-            print("\nNo matches found. Check that:")
-            print("  - Hash formats match between files")
-            print("  - NTDS file contains the expected format")
-            print("  - Cracked passwords file uses hash:password format")
+            results = [_match_batch_file(hash_to_password, *task) for task in tasks]
+    finally:
+        _close_lookup(hash_to_password)
+    
+    summary_file = os.path.join(output_dir, BATCH_SUMMARY_NAME)
+    total_lines = 0
+    total_matches = 0
+    failures = 0
+    
+    print("\nBatch processing complete!")
+    print(f"{'Hash file':<40} {'Lines':>12} {'Matches':>10}")
+    print("-" * 64)
+    try:
+        with open(summary_file, 'w', encoding='utf-8') as summary:
+            summary.write("hash_file\toutput_file\tlines\tmatches\tstatus\n")
+            for (hash_file, output_file), (lines, matches, error) in zip(tasks, results):
+                status = f"error: {error}" if error else "ok"
+                summary.write(f"{hash_file}\t{output_file}\t{lines}\t{matches}\t{status}\n")
                 
-        return True
-        
+                display_name = hash_file if len(hash_file) <= 40 else '...' + hash_file[-37:]
+                if error:
+                    failures += 1
+                    print(f"{display_name:<40} Error: {error}")
+                else:
+                    print(f"{display_name:<40} {lines:>12,} {matches:>10,}")
+                total_lines += lines
+                total_matches += matches
+            summary.write(f"TOTAL\t\t{total_lines}\t{total_matches}\t"
+                          f"{len(tasks) - failures} ok, {failures} failed\n")
     except Exception as e:
-        print(f"Error writing to output file: {e}")
+        print(f"Error writing batch summary: {e}")
         return False
+    
+    print("-" * 64)
+    print(f"{'Total':<40} {total_lines:>12,} {total_matches:>10,}")
+    print(f"\nMatched against {cracked_count} cracked hashes.")
+    print(f"Matched files written to: {output_dir}")
+    print(f"Summary written to: {summary_file}")
+    
+    return failures == 0
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options; anything not given is prompted for interactively."""
+    parser = argparse.ArgumentParser(
+        description='Match cracked passwords with NTDS dumps to create credential files.')
+    parser.add_argument('-c', '--cracked', help='Path to the cracked passwords file (hash:password)')
+    parser.add_argument('-n', '--hashes', help='Path to the NTLM hash file (NTDS dump or NTDS cache)')
+    parser.add_argument('-o', '--output', help="Output file name (default: 'Userandpasswords.txt')")
+    parser.add_argument('--compact-index', action='store_true',
+                        help='Hold cracked hashes in a compact binary index (for very large potfiles)')
+    parser.add_argument('--index', nargs='?', const='', metavar='INDEX_FILE',
+                        help='Memory-map an on-disk index of the cracked file, building it if missing '
+                             'or stale (default path: <cracked file>.idx)')
+    parser.add_argument('--bloom', nargs='?', type=float, const=DEFAULT_FP_RATE, metavar='FP_RATE',
+                        help='Reject uncracked hashes with a Bloom filter before the --compact-index '
+                             'or --index lookup; stored next to --index when given '
+                             f'(default false-positive rate: {DEFAULT_FP_RATE})')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='Number of processes used to match the hash file (default: 1), or '
+                             'dumps joined at once in batch mode (default: one per CPU)')
+    parser.add_argument('--join-side', choices=('auto', 'cracked', 'hashes'), default='auto',
+                        help="Input to index in memory while streaming the other: 'cracked', "
+                             "'hashes' (the NTDS dump) or 'auto' for the smaller file (default)")
+    parser.add_argument('--batch', nargs='+', metavar='NTDS',
+                        help='Match several NTDS files or glob patterns against the cracked file, '
+                             'writing one <name>_matched.txt per dump')
+    parser.add_argument('--output-dir', default='matched',
+                        help="Output directory for batch mode (default: 'matched')")
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep running and match new potfile entries as a crack session '
+                             'appends them, until interrupted')
+    parser.add_argument('--poll-interval', type=float, default=FOLLOW_POLL_INTERVAL, metavar='SECONDS',
+                        help=f'Seconds between potfile checks in follow mode (default: {FOLLOW_POLL_INTERVAL:g})')
+    args = parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+    if args.bloom is not None and not 0 < args.bloom < 1:
+        parser.error('--bloom false-positive rate must be between 0 and 1')
+    if args.bloom is not None and not (args.compact_index or args.index is not None or args.follow):
+        parser.error('--bloom requires --compact-index or --index; a plain dictionary lookup '
+                     'is faster without it')
+    if args.poll_interval <= 0:
+        parser.error('--poll-interval must be positive')
+    if args.follow and (args.batch or args.compact_index or args.index is not None or
+                        args.bloom is not None or args.workers is not None or
+                        args.join_side == 'cracked'):
+        parser.error('--follow indexes the hash file and cannot be combined with --batch, '
+                     '--compact-index, --index, --bloom, --workers or --join-side cracked')
+    return args
+
+def _resolve_index_file(index_arg: Optional[str], cracked_file: str) -> Optional[str]:
+    """Map a bare --index flag to the default index path of the cracked file."""
+    if index_arg == '':
+        return default_index_path(cracked_file)
+    return index_arg
 
 def main():
     """Main function to handle user interaction and coordinate file processing."""
+    args = parse_args()
+    
     print("NTLM Hash and Password Matcher")
     print("=" * 35)
     print("This tool matches cracked passwords with NTDS dumps to create credential files.\n")
     
     try:
-        cracked_file = input("Enter the path to the cracked passwords file: ").strip()
+        cracked_file = args.cracked or input("Enter the path to the cracked passwords file: ").strip()
         if not cracked_file:
             print("Error: Cracked passwords file path is required.")
             sys.exit(1)
             
-        hash_file = input("Enter the path to the NTLM hash file: ").strip()
+        if args.batch:
+            success = process_batch(cracked_file, expand_hash_files(args.batch), args.output_dir,
+                                    compact_index=args.compact_index,
+                                    index_file=_resolve_index_file(args.index, cracked_file),
+                                    workers=args.workers,
+                                    bloom_fp=args.bloom)
+            if not success:
+                sys.exit(1)
+            return
+        
+        hash_file = args.hashes or input("Enter the path to the NTLM hash file: ").strip()
         if not hash_file:
             print("Error: NTLM hash file path is required.")
             sys.exit(1)
             
-        output_file = input("Enter the output file name (or press Enter for 'Userandpasswords.txt'): ").strip()
+        output_file = args.output
+        if output_file is None:
+            output_file = input("Enter the output file name (or press Enter for 'Userandpasswords.txt'): ").strip()
         if not output_file:
             output_file = "Userandpasswords.txt"
         
@@ -176,7 +989,19 @@ def main():
                 print("Operation cancelled.")
                 sys.exit(0)
         
-        success = process_password_files(cracked_file, hash_file, output_file)
+        if args.follow:
+            success = follow_password_files(cracked_file, hash_file, output_file,
+                                            poll_interval=args.poll_interval)
+            if not success:
+                sys.exit(1)
+            return
+        
+        success = process_password_files(cracked_file, hash_file, output_file,
+                                         compact_index=args.compact_index,
+                                         index_file=_resolve_index_file(args.index, cracked_file),
+                                         workers=args.workers or 1,
+                                         join_side=args.join_side,
+                                         bloom_fp=args.bloom)
         
         if not success:
             sys.exit(1)
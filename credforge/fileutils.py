@@ -0,0 +1,170 @@
+"""
+File helpers shared by the CredForge tools for processing large inputs in parallel.
+"""
+
+import heapq
+import multiprocessing
+import os
+import tempfile
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bound for a single byte range handed to a worker process
+MAX_CHUNK_SIZE = 32 * 1024 * 1024
+
+# Lower bound so tiny files are not cut into many near-empty ranges
+MIN_CHUNK_SIZE = 64 * 1024
+
+# Ranges per worker, so a slow range does not leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+def split_line_ranges(path: str, workers: int, max_chunk_size: int = MAX_CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges that start and end on line boundaries.
+
+    Every range ends just after a newline (or at end of file), so each one can be
+    read and split into lines independently of its neighbours.
+
+    Args:
+        path: Path to the file to split
+        workers: Number of worker processes the ranges will be spread over
+        max_chunk_size: Largest range size in bytes before alignment
+
+    Returns:
+        List of (start, end) byte offsets in file order
+    """
+    size = os.path.getsize(path)
+    chunk_size = -(-size // max(1, workers * CHUNKS_PER_WORKER))
+    chunk_size = max(MIN_CHUNK_SIZE, min(max_chunk_size, chunk_size))
+
+    ranges: List[Tuple[int, int]] = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                # Extend the range to the end of the line it cuts into
+                f.seek(end - 1)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def split_count(count: int, workers: int, min_size: int = 4096) -> List[Tuple[int, int]]:
+    """
+    Split the item numbers 0..count-1 into contiguous (start, end) ranges for a worker pool.
+    
+    Like split_line_ranges, several ranges are made per worker, but none smaller than
+    min_size items.
+    """
+    size = max(min_size, -(-count // max(1, workers * CHUNKS_PER_WORKER)))
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+def read_range(path: str, start: int, end: int) -> bytes:
+    """Read the bytes in [start, end) from a file."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+# Default memory budget of an external sort
+DEFAULT_SORT_MEMORY = 512 * 1024 * 1024
+
+# Estimated bytes held per item beyond its length: the bytes object, its list slot and
+# its sort key
+SORT_ITEM_OVERHEAD = 100
+
+# Most sorted runs merged at once; more runs are merged in several passes
+MAX_MERGE_RUNS = 64
+
+def _write_run(path: str, items: Iterable[bytes]) -> None:
+    with open(path, 'wb', buffering=1024 * 1024) as f:
+        for item in items:
+            f.write(item)
+            f.write(b'\n')
+
+def _read_run(path: str) -> Iterator[bytes]:
+    with open(path, 'rb', buffering=1024 * 1024) as f:
+        for line in f:
+            yield line[:-1]
+
+def external_sort(items: Iterable[bytes], key: Optional[Callable[[bytes], bytes]] = None,
+                  max_memory: int = DEFAULT_SORT_MEMORY,
+                  temp_dir: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Sort byte strings that may not fit in memory.
+
+    Items are collected into runs of about max_memory bytes; each run is sorted and, if
+    the input does not fit in one run, written to a temporary file. The runs are then
+    merged lazily. The sort is stable, so items with equal keys keep their input order.
+
+    Args:
+        items: Byte strings without newlines, e.g. stripped lines
+        key: Function computing the sort key of an item (default: the item itself)
+        max_memory: Approximate memory budget in bytes for a run
+        temp_dir: Directory for the run files (default: the system temp directory)
+
+    Returns:
+        Iterator over the items in sorted order
+    """
+    run: List[bytes] = []
+    run_bytes = 0
+    items = iter(items)
+    for item in items:
+        run.append(item)
+        run_bytes += 2 * len(item) + SORT_ITEM_OVERHEAD
+        if run_bytes > max_memory:
+            break
+    else:
+        run.sort(key=key)
+        yield from run
+        return
+
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix='credforge_sort_') as run_dir:
+        runs: List[str] = []
+
+        def flush() -> None:
+            run.sort(key=key)
+            path = os.path.join(run_dir, f"run{len(runs):06d}")
+            _write_run(path, run)
+            runs.append(path)
+            run.clear()
+
+        flush()
+        run_bytes = 0
+        for item in items:
+            run.append(item)
+            run_bytes += 2 * len(item) + SORT_ITEM_OVERHEAD
+            if run_bytes > max_memory:
+                flush()
+                run_bytes = 0
+        if run:
+            flush()
+
+        # Merge in passes until few enough runs are left to open at once
+        merge_pass = 0
+        while len(runs) > MAX_MERGE_RUNS:
+            merge_pass += 1
+            merged = []
+            for start in range(0, len(runs), MAX_MERGE_RUNS):
+                group = runs[start:start + MAX_MERGE_RUNS]
+                path = os.path.join(run_dir, f"merge{merge_pass}_{len(merged):06d}")
+                _write_run(path, heapq.merge(*map(_read_run, group), key=key))
+                for old in group:
+                    os.remove(old)
+                merged.append(path)
+            runs = merged
+
+        yield from heapq.merge(*map(_read_run, runs), key=key)
+
+def pool_context():
+    """
+    Return the multiprocessing context used for worker pools.
+
+    Fork is preferred where available: large read-only lookup tables built by the
+    parent are then shared with the workers copy-on-write instead of being pickled.
+    """
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Fingerprint Set for Line Deduplication
+
+A compact set of lines that stores a fixed-size hash fingerprint of each line instead of
+the line itself. Fingerprints live in an open-addressing table with linear probing,
+backed by array('Q') columns; an empty slot holds 0. The table doubles as it fills, so
+it stays between 35% and 70% full once past its initial size: a 64-bit set needs 11 to
+23, about 16, bytes per distinct line, against roughly 100 bytes for a Python set of
+the lines themselves.
+
+Fingerprints:
+    - 64 bits: the interpreter's keyed SipHash of the line (hash(), cached on the bytes
+      object); BLAKE2b on builds where hash() is narrower than 64 bits
+    - 128 bits: BLAKE2b with a 16-byte digest
+
+Two different lines with the same fingerprint are taken for one line, so the second
+is reported as a duplicate. Over n distinct lines the chance of at least one such
+collision is about n^2 / 2^(bits + 1) (see collision_probability):
+
+    lines       64-bit           128-bit
+    10^7        2.7 * 10^-6      1.5 * 10^-25
+    10^8        2.7 * 10^-4      1.5 * 10^-23
+    10^9        2.7%             1.5 * 10^-21
+
+For an exact result the set can also store the byte offset of each line's first
+occurrence (add_offset), so a caller can re-read that line and compare it whenever a
+fingerprint repeats.
+"""
+
+import hashlib
+import math
+import sys
+from array import array
+from typing import Optional
+
+# The table grows (doubles) once more than this fraction of its slots is used
+MAX_LOAD = 0.7
+
+MIN_SLOTS = 1024
+
+_MASK64 = (1 << 64) - 1
+
+def collision_probability(lines: int, bits: int = 64) -> float:
+    """Probability that two of `lines` distinct lines share a fingerprint of `bits` bits."""
+    return -math.expm1(-lines * (lines - 1) / 2 ** (bits + 1))
+
+def fingerprint64(line: bytes) -> int:
+    """Non-zero 64-bit fingerprint of a line."""
+    return (hash(line) & _MASK64) or 1
+
+def _fingerprint64_blake2b(line: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(line, digest_size=8).digest(), 'little') or 1
+
+if sys.hash_info.width < 64:  # pragma: no cover - 32-bit builds
+    fingerprint64 = _fingerprint64_blake2b
+
+def fingerprint128(line: bytes) -> int:
+    """Non-zero 128-bit fingerprint of a line."""
+    return int.from_bytes(hashlib.blake2b(line, digest_size=16).digest(), 'little') or 1
+
+class FingerprintSet:
+    """
+    Open-addressing set of line fingerprints.
+
+    Args:
+        capacity: Expected number of distinct lines; the table is preallocated for it
+            and grows beyond it
+        bits: Fingerprint size, 64 or 128
+        with_offsets: Also store a 64-bit offset per line, for add_offset
+    """
+
+    def __init__(self, capacity: int = 0, bits: int = 64, with_offsets: bool = False):
+        if bits not in (64, 128):
+            raise ValueError("Fingerprints must be 64 or 128 bits.")
+        self.bits = bits
+        self.with_offsets = with_offsets
+        self._count = 0
+        self._allocate(max(MIN_SLOTS, math.ceil(capacity / MAX_LOAD)))
+
+    def _allocate(self, slots: int) -> None:
+        self._slots = slots
+        self._limit = int(slots * MAX_LOAD)
+        # Low 64 bits of each fingerprint; 128-bit sets keep the high bits alongside
+        self._low = array('Q', [0]) * slots
+        self._high = array('Q', [0]) * slots if self.bits == 128 else None
+        self._offsets = array('Q', [0]) * slots if self.with_offsets else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the table in bytes."""
+        return sum(8 * len(column) for column in (self._low, self._high, self._offsets)
+                   if column is not None)
+
+    def _fingerprint(self, line: bytes) -> int:
+        return fingerprint64(line) if self.bits == 64 else fingerprint128(line)
+
+    def _find(self, fingerprint: int) -> int:
+        """Slot holding fingerprint, or the empty slot where it belongs."""
+        low_column, high_column = self._low, self._high
+        slots = self._slots
+        low = fingerprint & _MASK64
+        high = fingerprint >> 64
+        index = fingerprint % slots
+        while True:
+            value = low_column[index]
+            if not value and (high_column is None or not high_column[index]):
+                return index
+            if value == low and (high_column is None or high_column[index] == high):
+                return index
+            index += 1
+            if index == slots:
+                index = 0
+
+    def _is_empty(self, index: int) -> bool:
+        return not self._low[index] and (self._high is None or not self._high[index])
+
+    def _insert(self, index: int, fingerprint: int) -> None:
+        self._low[index] = fingerprint & _MASK64
+        if self._high is not None:
+            self._high[index] = fingerprint >> 64
+        self._count += 1
+
+    def _grow(self) -> None:
+        """Double the table and reinsert every fingerprint."""
+        low, high, offsets = self._low, self._high, self._offsets
+        self._allocate(self._slots * 2)
+        for index, value in enumerate(low):
+            fingerprint = value if high is None else value | (high[index] << 64)
+            if fingerprint:
+                slot = self._find(fingerprint)
+                self._low[slot] = value
+                if high is not None:
+                    self._high[slot] = high[index]
+                if offsets is not None:
+                    self._offsets[slot] = offsets[index]
+
+    def add(self, line: bytes) -> bool:
+        """Add a line; returns True if its fingerprint was not in the set yet."""
+        if self._high is not None:
+            fingerprint = fingerprint128(line)
+            index = self._find(fingerprint)
+            if not self._is_empty(index):
+                return False
+            self._insert(index, fingerprint)
+        else:
+            # The 64-bit probe loop is inlined; it runs once per input line
+            fingerprint = fingerprint64(line)
+            table = self._low
+            slots = self._slots
+            index = fingerprint % slots
+            while True:
+                value = table[index]
+                if value == fingerprint:
+                    return False
+                if not value:
+                    break
+                index += 1
+                if index == slots:
+                    index = 0
+            table[index] = fingerprint
+            self._count += 1
+        if self._count > self._limit:
+            self._grow()
+        return True
+
+    def add_offset(self, line: bytes, offset: int) -> Optional[int]:
+        """
+        Add a line with the offset of its occurrence.
+
+        Returns:
+            None if the fingerprint is new, otherwise the offset stored with it, so the
+            caller can check whether the earlier line really is the same line
+        """
+        if self._offsets is None:
+            raise ValueError("Set was created without offsets.")
+        fingerprint = self._fingerprint(line)
+        index = self._find(fingerprint)
+        if not self._is_empty(index):
+            return self._offsets[index]
+        self._insert(index, fingerprint)
+        self._offsets[index] = offset
+        if self._count > self._limit:
+            self._grow()
+        return None
+
+    def __contains__(self, line: bytes) -> bool:
+        if self._high is not None:
+            return not self._is_empty(self._find(fingerprint128(line)))
+        # Inlined like add, for callers that stream many lookups
+        fingerprint = fingerprint64(line)
+        table = self._low
+        slots = self._slots
+        index = fingerprint % slots
+        while True:
+            value = table[index]
+            if value == fingerprint:
+                return True
+            if not value:
+                return False
+            index += 1
+            if index == slots:
+                index = 0
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+NTDS Dump Toolkit
+
+Command line front end for working with NTDS dumps through the columnar cache.
+
+Usage:
+    python ntds.py import <ntds_file> [-o CACHE_FILE] [--force]
+    python ntds.py info <cache_file>
+    python ntds.py clusters <ntds_file> [-o OUTPUT] [--min-size N] [--memory-limit MB] [--top N]
+    python ntds.py diff <old_file> <new_file> [-o OUTPUT_DIR] [--max-memory MB]
+
+The cache file written by 'import' can be passed in place of the text dump to
+process_ntds (-w) and combine_list_passwords (-n, --batch).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from credforge.ntds_cache import (FLAG_DISABLED, FLAG_EMPTY_NT, FLAG_MACHINE, FLAG_RAW,
+                                  NTDSCache, default_cache_path, import_ntds, is_cache_current)
+from credforge.ntds_clusters import find_hash_clusters, write_cluster_report
+from credforge.ntds_diff import DIFF_FILES, diff_ntds_files
+
+def print_cache_summary(cache: NTDSCache) -> None:
+    """Print account statistics computed from the cache columns."""
+    total = len(cache)
+    print(f"Records: {total:,}")
+    for label, flag in (('Disabled', FLAG_DISABLED), ('Machine accounts', FLAG_MACHINE),
+                        ('Empty NT hash', FLAG_EMPTY_NT), ('Stored verbatim', FLAG_RAW)):
+        count = cache.count_flag(flag)
+        share = f" ({count/total:.1%})" if total else ''
+        print(f"{label}: {count:,}{share}")
+
+    domains = sorted(cache.domain_counts().items(), key=lambda item: -item[1])
+    if domains:
+        print("Accounts per domain:")
+        for domain, count in domains:
+            print(f"  {domain or '(none)'}: {count:,}")
+
+def import_command(args) -> None:
+    if not Path(args.ntds_file).is_file():
+        print(f"Error: Input file '{args.ntds_file}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+
+    cache_file = args.output or default_cache_path(args.ntds_file)
+    if not args.force and is_cache_current(cache_file, args.ntds_file):
+        print(f"Cache '{cache_file}' is up to date.")
+        return
+
+    print(f"Importing {args.ntds_file}...")
+    records = import_ntds(args.ntds_file, cache_file)
+    print(f"Imported {records:,} records.")
+    print(f"Cache written to: {cache_file} ({Path(cache_file).stat().st_size:,} bytes)")
+
+def info_command(args) -> None:
+    cache = NTDSCache.open(args.cache_file)
+    try:
+        print_cache_summary(cache)
+    finally:
+        cache.close()
+
+def clusters_command(args) -> None:
+    if not Path(args.ntds_file).is_file():
+        print(f"Error: Input file '{args.ntds_file}' does not exist.", file=sys.stderr)
+        sys.exit(1)
+    if args.min_size < 2:
+        print("Error: --min-size must be at least 2.", file=sys.stderr)
+        sys.exit(1)
+    if args.memory_limit <= 0:
+        print("Error: --memory-limit must be positive.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Grouping accounts of {args.ntds_file} by NT hash...")
+    clusters, stats = find_hash_clusters(args.ntds_file, args.min_size,
+                                         args.memory_limit * 1024 * 1024)
+    write_cluster_report(clusters, args.output)
+
+    shared = sum(len(cluster.members) for cluster in clusters)
+    print(f"Accounts: {stats['accounts']:,} ({stats['distinct_hashes']:,} distinct NT hashes)")
+    print(f"Clusters of {args.min_size}+ accounts: {len(clusters):,} covering {shared:,} accounts")
+    if clusters and args.top:
+        print("Largest clusters:")
+        for cluster in clusters[:args.top]:
+            print(f"  {cluster.nt_hash}: {len(cluster.members):,} accounts, "
+                  f"{cluster.privileged_count} privileged")
+    print(f"Report written to: {args.output}")
+
+def diff_command(args) -> None:
+    for path in (args.old_file, args.new_file):
+        if not Path(path).is_file():
+            print(f"Error: Input file '{path}' does not exist.", file=sys.stderr)
+            sys.exit(1)
+    if args.max_memory <= 0:
+        print("Error: --max-memory must be positive.", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Comparing {args.old_file} with {args.new_file}...")
+    counts = diff_ntds_files(args.old_file, args.new_file, args.output_dir,
+                             args.max_memory * 1024 * 1024)
+    print(f"Unchanged accounts: {counts['unchanged']:,}")
+    if counts['duplicates']:
+        print(f"Warning: {counts['duplicates']:,} repeated account lines skipped; "
+              "the last line of each account was compared.")
+    for category, name in DIFF_FILES.items():
+        label = category.replace('_', ' ').capitalize()
+        print(f"{label}: {counts[category]:,} -> {Path(args.output_dir) / name}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Work with NTDS dumps through a columnar cache.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser(
+        'import', help='Parse an NTDS dump once into a memory-mappable cache file')
+    import_parser.add_argument('ntds_file', help='Path to the NTDS dump')
+    import_parser.add_argument('-o', '--output',
+                               help='Path of the cache file (default: <ntds_file>.ntdsc)')
+    import_parser.add_argument('--force', action='store_true',
+                               help='Re-import even if the cache is up to date')
+    import_parser.set_defaults(func=import_command)
+
+    info_parser = subparsers.add_parser('info', help='Print account statistics of a cache file')
+    info_parser.add_argument('cache_file', help='Path to the cache file')
+    info_parser.set_defaults(func=info_command)
+
+    clusters_parser = subparsers.add_parser(
+        'clusters', help='Report groups of accounts sharing an NT hash')
+    clusters_parser.add_argument('ntds_file', help='Path to the NTDS dump or cache file')
+    clusters_parser.add_argument('-o', '--output', default='hash_clusters.txt',
+                                 help='Path of the report (default: hash_clusters.txt)')
+    clusters_parser.add_argument('--min-size', type=int, default=2,
+                                 help='Smallest number of accounts reported as a cluster (default: 2)')
+    clusters_parser.add_argument('--memory-limit', type=int, default=1024, metavar='MB',
+                                 help='Memory budget before spilling to disk partitions (default: 1024)')
+    clusters_parser.add_argument('--top', type=int, default=10,
+                                 help='Number of largest clusters to print (default: 10)')
+    clusters_parser.set_defaults(func=clusters_command)
+
+    diff_parser = subparsers.add_parser(
+        'diff', help='Write the accounts that changed between two dumps of a domain')
+    diff_parser.add_argument('old_file', help='Path to the earlier dump or cache file')
+    diff_parser.add_argument('new_file', help='Path to the later dump or cache file')
+    diff_parser.add_argument('-o', '--output-dir', default='ntds_diff',
+                             help='Directory for the delta files (default: ntds_diff)')
+    diff_parser.add_argument('--max-memory', type=int, default=512, metavar='MB',
+                             help='Memory budget for sorting each dump before using disk (default: 512)')
+    diff_parser.set_defaults(func=diff_command)
+
+    args = parser.parse_args()
+
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Columnar NTDS Cache
+
+Parses an NTDS dump (username:rid:lmhash:nthash:...) once into a compact binary file
+that the CredForge tools memory-map instead of splitting the text again on every run.
+
+Each account is stored in fixed-width columns:
+    - LM and NT hashes as 16-byte digests
+    - RID as a signed 32-bit integer
+    - A status byte (disabled, machine account, empty NT hash, raw line)
+    - Domain and trailing-field ids into small interned string tables
+    - The username as an offset into a string blob
+
+Every line of the dump becomes one record, so record numbers are line numbers and
+statistics computed from the cache match those computed from the text. Lines that
+do not round-trip exactly through the columns (blank lines, malformed records,
+upper-case hashes, ...) are kept verbatim as raw records, so the original dump can
+always be reproduced byte for byte.
+
+The cache records the size and modification time of the dump it was built from.
+"""
+
+import binascii
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DIGEST_SIZE = 16
+
+# Status byte bits
+FLAG_DISABLED = 0x01
+FLAG_RAW = 0x02
+FLAG_MACHINE = 0x04
+FLAG_EMPTY_NT = 0x08
+
+# NTLM hash of the empty password
+EMPTY_NT_DIGEST = binascii.unhexlify('31d6cfe0d16ae931b73c59d7e0c089c0')
+
+# Header: magic, version, reserved, record count, source size, source mtime (ns), then the
+# byte offsets of the ten sections: lm, nt, rid, flags, domain ids, tail ids, username
+# offsets, username blob, domain table, tail table
+CACHE_MAGIC = b'CFNTDSC1'
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('<8sIIQQQ10Q')
+CACHE_HEADER_SIZE = 128
+CACHE_SUFFIX = '.ntdsc'
+
+# Approximate number of bytes of dump lines parsed per batch
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+# A row as yielded by NTDSCache.iter_rows(): (flags, account, rid, lm digest, nt digest, tail)
+CacheRow = Tuple[int, bytes, int, bytes, bytes, bytes]
+
+_EMPTY_DIGEST = bytes(DIGEST_SIZE)
+_MAX_RID = 2 ** 31 - 1
+
+def _is_disabled(line: bytes) -> bool:
+    """Status rule of process_ntds.is_account_disabled: the 5th field reads 'disabled'."""
+    parts = line.split(b':', 5)
+    return len(parts) >= 5 and parts[4].lower() == b'disabled'
+
+def _parse_hash(value: bytes) -> Optional[bytes]:
+    """Return the digest of a lowercase 32-character hex hash, or None if it is not one."""
+    if len(value) != 2 * DIGEST_SIZE or value.lower() != value:
+        return None
+    try:
+        return binascii.unhexlify(value)
+    except binascii.Error:
+        return None
+
+def _le_column(values: array) -> bytes:
+    """Serialize an array column in little-endian order."""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _column_view(buffer, offset: int, count: int, typecode: str):
+    """Return the little-endian column at offset as an indexable sequence."""
+    size = array(typecode).itemsize
+    view = memoryview(buffer)[offset:offset + size * count]
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+    data = array(typecode, view.tobytes())
+    view.release()
+    data.byteswap()
+    return data
+
+def _string_table(strings: List[bytes]) -> bytes:
+    """Serialize strings as a count, count + 1 offsets and the concatenated bytes."""
+    offsets = array('Q', [0])
+    for value in strings:
+        offsets.append(offsets[-1] + len(value))
+    return struct.pack('<Q', len(strings)) + _le_column(offsets) + b''.join(strings)
+
+def _read_string_table(buffer, offset: int) -> List[bytes]:
+    count, = struct.unpack_from('<Q', buffer, offset)
+    offsets = _column_view(buffer, offset + 8, count + 1, 'Q')
+    blob = offset + 8 + 8 * (count + 1)
+    strings = [bytes(buffer[blob + offsets[i]:blob + offsets[i + 1]]) for i in range(count)]
+    if isinstance(offsets, memoryview):
+        offsets.release()
+    return strings
+
+class _CacheBuilder:
+    """Accumulates parsed dump lines into columns."""
+
+    def __init__(self):
+        self.lm = bytearray()
+        self.nt = bytearray()
+        self.rids = array('i')
+        self.flags = bytearray()
+        self.domain_ids = array('I')
+        self.tail_ids = array('I')
+        self.name_offsets = array('Q', [0])
+        self.names = bytearray()
+        # Interned strings; id 0 is the empty string in both tables
+        self.domains: Dict[bytes, int] = {b'': 0}
+        self.tails: Dict[bytes, int] = {b'': 0}
+
+    def add(self, line: bytes) -> None:
+        """Add one stripped dump line."""
+        flags = FLAG_DISABLED if _is_disabled(line) else 0
+        parts = line.split(b':', 4)
+        lm = nt = None
+        rid = -1
+        if len(parts) >= 4:
+            account, rid_field, lm_field, nt_field = parts[:4]
+            lm = _parse_hash(lm_field)
+            nt = _parse_hash(nt_field)
+            # The RID must print back exactly as it was written
+            if rid_field.isdigit() and int(rid_field) <= _MAX_RID and \
+                    str(int(rid_field)).encode() == rid_field:
+                rid = int(rid_field)
+
+        if lm is None or nt is None or rid < 0:
+            # Keep the line verbatim
+            self.flags.append(flags | FLAG_RAW)
+            self.lm += _EMPTY_DIGEST
+            self.nt += _EMPTY_DIGEST
+            self.rids.append(-1)
+            self.domain_ids.append(0)
+            self.tail_ids.append(0)
+            self.names += line
+            self.name_offsets.append(len(self.names))
+            return
+
+        domain, sep, username = account.rpartition(b'\\')
+        prefix = domain + sep
+        tail = b':' + parts[4] if len(parts) == 5 else b''
+        if username.endswith(b'$'):
+            flags |= FLAG_MACHINE
+        if nt == EMPTY_NT_DIGEST:
+            flags |= FLAG_EMPTY_NT
+        self.flags.append(flags)
+        self.lm += lm
+        self.nt += nt
+        self.rids.append(rid)
+        self.domain_ids.append(self.domains.setdefault(prefix, len(self.domains)))
+        self.tail_ids.append(self.tails.setdefault(tail, len(self.tails)))
+        self.names += username
+        self.name_offsets.append(len(self.names))
+
+    def write(self, cache_file: str, source_size: int, source_mtime_ns: int) -> None:
+        """Write the columns to cache_file through a temporary file."""
+        sections = [
+            self.lm,
+            self.nt,
+            _le_column(self.rids),
+            self.flags,
+            _le_column(self.domain_ids),
+            _le_column(self.tail_ids),
+            _le_column(self.name_offsets),
+            self.names,
+            _string_table(list(self.domains)),
+            _string_table(list(self.tails)),
+        ]
+
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(bytes(CACHE_HEADER_SIZE))
+                offsets = []
+                for section in sections:
+                    # Keep every section 8-byte aligned for the column views
+                    f.write(bytes(-f.tell() % 8))
+                    offsets.append(f.tell())
+                    f.write(section)
+                f.seek(0)
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, 0, len(self.flags),
+                                          source_size, source_mtime_ns, *offsets))
+            os.replace(temp_file, cache_file)
+        except BaseException:
+            if Path(temp_file).exists():
+                os.remove(temp_file)
+            raise
+
+def import_ntds(dump_file: str, cache_file: str) -> int:
+    """
+    Parse an NTDS dump into a columnar cache file.
+
+    Args:
+        dump_file: Path to the NTDS dump
+        cache_file: Path of the cache file to write
+
+    Returns:
+        Number of records (lines) imported
+    """
+    stat = os.stat(dump_file)
+    builder = _CacheBuilder()
+    with open(dump_file, 'rb') as f:
+        while True:
+            lines = f.readlines(READ_BLOCK_SIZE)
+            if not lines:
+                break
+            for line in lines:
+                builder.add(line.strip())
+    builder.write(cache_file, stat.st_size, stat.st_mtime_ns)
+    return len(builder.flags)
+
+def is_ntds_cache(path: str) -> bool:
+    """Check whether a file is an NTDS cache rather than a text dump."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(CACHE_MAGIC)) == CACHE_MAGIC
+    except OSError:
+        return False
+
+def default_cache_path(dump_file: str) -> str:
+    """Return the cache file path used for a dump when none is given."""
+    return dump_file + CACHE_SUFFIX
+
+def is_cache_current(cache_file: str, dump_file: str) -> bool:
+    """Check that a cache file exists and was built from the dump as it is now."""
+    try:
+        with open(cache_file, 'rb') as f:
+            header = f.read(CACHE_HEADER.size)
+        stat = os.stat(dump_file)
+    except OSError:
+        return False
+    if len(header) < CACHE_HEADER.size:
+        return False
+    magic, version, _, _, source_size, source_mtime_ns = CACHE_HEADER.unpack(header)[:6]
+    return (magic == CACHE_MAGIC and version == CACHE_VERSION and
+            source_size == stat.st_size and source_mtime_ns == stat.st_mtime_ns)
+
+class NTDSCache:
+    """Read-only, memory-mapped view of a cache file written by import_ntds()."""
+
+    def __init__(self, mm: mmap.mmap, path: str):
+        (magic, version, _, count, self.source_size, self.source_mtime_ns,
+         lm, nt, rids, flags, domain_ids, tail_ids, name_offsets, names,
+         domain_table, tail_table) = CACHE_HEADER.unpack_from(mm, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            raise ValueError(f"'{path}' is not an NTDS cache file.")
+
+        self._mmap = mm
+        self._path = path
+        self._count = count
+        self._lm_base = lm
+        self._nt_base = nt
+        self._flags_base = flags
+        self._names_base = names
+        self._rids = _column_view(mm, rids, count, 'i')
+        self._domain_ids = _column_view(mm, domain_ids, count, 'I')
+        self._tail_ids = _column_view(mm, tail_ids, count, 'I')
+        self._name_offsets = _column_view(mm, name_offsets, count + 1, 'Q')
+        self.domains = _read_string_table(mm, domain_table)
+        self.tails = _read_string_table(mm, tail_table)
+
+    @classmethod
+    def open(cls, cache_file: str) -> 'NTDSCache':
+        """
+        Memory-map a cache file.
+
+        Raises:
+            ValueError: If the file is not a compatible cache file
+        """
+        with open(cache_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < CACHE_HEADER_SIZE:
+                raise ValueError(f"'{cache_file}' is not an NTDS cache file.")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mm, cache_file)
+        except BaseException:
+            mm.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __reduce__(self):
+        # Sent to worker processes by path and mapped again
+        return (NTDSCache.open, (self._path,))
+
+    def flags(self, i: int) -> int:
+        """Status byte of record i (FLAG_DISABLED, FLAG_RAW)."""
+        return self._mmap[self._flags_base + i]
+
+    def flag_counts(self) -> Dict[int, int]:
+        """Return the number of records with each distinct status byte."""
+        column = self._mmap[self._flags_base:self._flags_base + self._count]
+        counts = {}
+        for flags in range(FLAG_EMPTY_NT << 1):
+            count = column.count(flags)
+            if count:
+                counts[flags] = count
+        return counts
+
+    def count_flag(self, flag: int) -> int:
+        """Return the number of records with the given status bit set."""
+        return sum(count for flags, count in self.flag_counts().items() if flags & flag)
+
+    def domain_counts(self) -> Dict[str, int]:
+        """Return the number of parsed (non-raw) records per domain ('' for none)."""
+        counts = [0] * len(self.domains)
+        for domain_id in self._domain_ids:
+            counts[domain_id] += 1
+        # Raw records carry domain id 0 as well
+        counts[0] -= self.count_flag(FLAG_RAW)
+        return {domain[:-1].decode('utf-8', errors='ignore'): count
+                for domain, count in zip(self.domains, counts) if count}
+
+    def iter_rows(self, start: int = 0, end: Optional[int] = None) -> Iterator[CacheRow]:
+        """
+        Yield (flags, account, rid, lm digest, nt digest, tail) for records start..end-1.
+
+        For raw records (FLAG_RAW) the account is the whole original line and the
+        other fields are empty.
+        """
+        end = self._count if end is None else min(end, self._count)
+        mm = self._mmap
+        rids = self._rids
+        domain_ids = self._domain_ids
+        tail_ids = self._tail_ids
+        name_offsets = self._name_offsets
+        domains = self.domains
+        tails = self.tails
+        flags_base = self._flags_base
+        names_base = self._names_base
+        lm_pos = self._lm_base + start * DIGEST_SIZE
+        nt_pos = self._nt_base + start * DIGEST_SIZE
+        for i in range(start, end):
+            flags = mm[flags_base + i]
+            name = mm[names_base + name_offsets[i]:names_base + name_offsets[i + 1]]
+            if flags & FLAG_RAW:
+                yield flags, name, -1, b'', b'', b''
+            else:
+                yield (flags, domains[domain_ids[i]] + name, rids[i],
+                       mm[lm_pos:lm_pos + DIGEST_SIZE], mm[nt_pos:nt_pos + DIGEST_SIZE],
+                       tails[tail_ids[i]])
+            lm_pos += DIGEST_SIZE
+            nt_pos += DIGEST_SIZE
+
+    def iter_nt_hashes(self, start: int = 0, end: Optional[int] = None) -> Iterator[Optional[str]]:
+        """
+        Yield the lowercase hex NT hash of records start..end-1 (None for raw records).
+
+        Reads only the status and NT columns, for scans that need the account name of
+        a few matching records only (see account()).
+        """
+        end = self._count if end is None else min(end, self._count)
+        mm = self._mmap
+        flags = mm[self._flags_base + start:self._flags_base + end]
+        pos = self._nt_base + start * DIGEST_SIZE
+        for flag in flags:
+            if flag & FLAG_RAW:
+                yield None
+            else:
+                yield mm[pos:pos + DIGEST_SIZE].hex()
+            pos += DIGEST_SIZE
+
+    def iter_nt_digests(self, start: int = 0, end: Optional[int] = None) -> Iterator[Optional[bytes]]:
+        """Yield the 16-byte NT digest of records start..end-1 (None for raw records)."""
+        end = self._count if end is None else min(end, self._count)
+        mm = self._mmap
+        flags = mm[self._flags_base + start:self._flags_base + end]
+        pos = self._nt_base + start * DIGEST_SIZE
+        for flag in flags:
+            yield None if flag & FLAG_RAW else mm[pos:pos + DIGEST_SIZE]
+            pos += DIGEST_SIZE
+
+    def rid(self, i: int) -> Optional[int]:
+        """RID of record i, or None for a raw record."""
+        rid = self._rids[i]
+        return None if rid < 0 else rid
+
+    def account(self, i: int) -> bytes:
+        """Account name (domain\\username) of record i, or the whole line of a raw record."""
+        mm = self._mmap
+        name = mm[self._names_base + self._name_offsets[i]:self._names_base + self._name_offsets[i + 1]]
+        if mm[self._flags_base + i] & FLAG_RAW:
+            return name
+        return self.domains[self._domain_ids[i]] + name
+
+    def iter_lines(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the original (stripped) dump lines of records start..end-1."""
+        for row in self.iter_rows(start, end):
+            yield row_to_line(row)
+
+    def close(self) -> None:
+        """Release the memory map."""
+        if self._mmap is None:
+            return
+        for view in (self._rids, self._domain_ids, self._tail_ids, self._name_offsets):
+            if isinstance(view, memoryview):
+                view.release()
+        self._mmap.close()
+        self._mmap = None
+
+def row_to_line(row: CacheRow) -> bytes:
+    """Rebuild the original (stripped) dump line of a cache row."""
+    flags, account, rid, lm, nt, tail = row
+    if flags & FLAG_RAW:
+        return account
+    return b'%s:%d:%s:%s%s' % (account, rid, binascii.hexlify(lm), binascii.hexlify(nt), tail)
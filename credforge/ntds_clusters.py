@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Shared NT Hash Clustering
+
+Finds accounts in an NTDS dump that share an NT hash, i.e. the same password, without
+cracking anything. Accounts are grouped by their 16-byte NT digest in a single pass;
+each group keeps its members as record numbers in compact arrays rather than lists of
+strings, and account names are only looked up for the clusters that are reported.
+
+When the grouping table outgrows a memory limit, the (digest, member) pairs are spilled
+into partition files by hash and each partition is grouped separately, so dumps with
+tens of millions of accounts can be clustered in bounded memory.
+
+Used by the 'ntds clusters' command.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from binascii import unhexlify
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from credforge.ntds_cache import FLAG_RAW, NTDSCache, is_ntds_cache
+from credforge.process_ntds import EMPTY_NT_HASH, PRIVILEGED_RIDS, parse_ntds_line
+
+# Default memory budget for the in-memory grouping table
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+
+# Estimated bytes per distinct digest (bytes object plus dict slot) and per account
+# (group id and member arrays) used to decide when to spill
+BYTES_PER_GROUP = 150
+BYTES_PER_MEMBER = 12
+
+# Records added between checks of the memory estimate
+LIMIT_CHECK_INTERVAL = 1024
+
+# Spilled pair: 16-byte digest and 64-bit member id
+SPILL_RECORD = struct.Struct('<16sQ')
+SPILL_BUFFER_SIZE = 1024 * 1024
+MAX_PARTITIONS = 256
+
+class ClusterMember(NamedTuple):
+    """One account of a cluster."""
+    account: str
+    rid: Optional[int]
+
+    @property
+    def privileged(self) -> bool:
+        return self.rid in PRIVILEGED_RIDS
+
+class HashCluster(NamedTuple):
+    """Accounts sharing one NT hash."""
+    nt_hash: str
+    members: List[ClusterMember]
+
+    @property
+    def privileged_count(self) -> int:
+        return sum(member.privileged for member in self.members)
+
+def _digest(nt_hash: bytes) -> Optional[bytes]:
+    """Return the 16-byte digest of a hex NT hash field, or None if it is not one."""
+    if len(nt_hash) != 32:
+        return None
+    try:
+        return unhexlify(nt_hash)
+    except ValueError:
+        return None
+
+class _HashReader:
+    """
+    Yields (NT digest, member id) for every account of a text dump or NTDS cache.
+
+    Member ids are byte offsets of lines in a text dump and record numbers in a cache.
+    The fraction of the input consumed so far is available as `fraction`.
+    """
+
+    def __init__(self, input_file: str):
+        self.input_file = input_file
+        self.from_cache = is_ntds_cache(input_file)
+        self.fraction = 0.0
+
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        if self.from_cache:
+            yield from self._iter_cache()
+        else:
+            yield from self._iter_text()
+        self.fraction = 1.0
+
+    def _iter_text(self) -> Iterator[Tuple[bytes, int]]:
+        total = os.path.getsize(self.input_file) or 1
+        offset = 0
+        with open(self.input_file, 'rb') as f:
+            for line in f:
+                # Only the NT hash field is needed here, so skip decoding the whole line
+                fields = line.split(b':', 4)
+                if len(fields) > 3:
+                    digest = _digest(fields[3].strip())
+                    if digest is not None:
+                        yield digest, offset
+                offset += len(line)
+                self.fraction = offset / total
+
+    def _iter_cache(self) -> Iterator[Tuple[bytes, int]]:
+        cache = NTDSCache.open(self.input_file)
+        try:
+            total = len(cache) or 1
+            for i, digest in enumerate(cache.iter_nt_digests()):
+                if digest is None:
+                    # Lines kept verbatim are parsed like the text would be
+                    fields = cache.account(i).split(b':', 4)
+                    digest = _digest(fields[3].strip()) if len(fields) > 3 else None
+                    if digest is None:
+                        continue
+                yield digest, i
+                if not i % 65536:
+                    self.fraction = i / total
+        finally:
+            cache.close()
+
+class _Grouper:
+    """Groups member ids by digest with one dict entry per digest and flat arrays per member."""
+
+    def __init__(self):
+        self.groups: Dict[bytes, int] = {}
+        self.digests: List[bytes] = []
+        self.group_ids = array('I')
+        self.members = array('Q')
+
+    @property
+    def estimated_bytes(self) -> int:
+        return len(self.digests) * BYTES_PER_GROUP + len(self.members) * BYTES_PER_MEMBER
+
+    def add_pairs(self, pairs: Iterator[Tuple[bytes, int]], memory_limit: Optional[int] = None) -> bool:
+        """
+        Add (digest, member) pairs until they run out or the estimate exceeds memory_limit.
+
+        Returns:
+            True if all pairs were added, False if stopped at the memory limit
+        """
+        groups = self.groups
+        digests = self.digests
+        add_group = self.group_ids.append
+        add_member = self.members.append
+        countdown = LIMIT_CHECK_INTERVAL
+        for digest, member in pairs:
+            group = groups.get(digest)
+            if group is None:
+                group = groups[digest] = len(digests)
+                digests.append(digest)
+            add_group(group)
+            add_member(member)
+            countdown -= 1
+            if not countdown:
+                if memory_limit is not None and self.estimated_bytes > memory_limit:
+                    return False
+                countdown = LIMIT_CHECK_INTERVAL
+        return True
+
+    def pairs(self) -> Iterator[Tuple[bytes, int]]:
+        digests = self.digests
+        for group, member in zip(self.group_ids, self.members):
+            yield digests[group], member
+
+    def clusters(self, min_size: int) -> List[Tuple[bytes, array]]:
+        """Return (digest, member ids in input order) for groups of at least min_size."""
+        sizes = array('I', bytes(4 * len(self.digests)))
+        for group in self.group_ids:
+            sizes[group] += 1
+        selected = {group: array('Q') for group, size in enumerate(sizes) if size >= min_size}
+        for group, member in zip(self.group_ids, self.members):
+            members = selected.get(group)
+            if members is not None:
+                members.append(member)
+        return [(self.digests[group], members) for group, members in selected.items()]
+
+class _SpillPartitions:
+    """Fixed-size (digest, member) records spilled into partition files by digest."""
+
+    def __init__(self, spill_dir: str, count: int):
+        self.paths = [os.path.join(spill_dir, f"part{i:03d}.bin") for i in range(count)]
+        self.files = [open(path, 'wb') for path in self.paths]
+        self.buffers = [bytearray() for _ in range(count)]
+
+    def add(self, digest: bytes, member: int) -> None:
+        # NT digests are uniformly distributed, so their leading bytes partition evenly
+        part = int.from_bytes(digest[:4], 'little') % len(self.files)
+        buffer = self.buffers[part]
+        buffer += SPILL_RECORD.pack(digest, member)
+        if len(buffer) >= SPILL_BUFFER_SIZE:
+            self.files[part].write(buffer)
+            buffer.clear()
+
+    def close(self) -> None:
+        for f, buffer in zip(self.files, self.buffers):
+            f.write(buffer)
+            f.close()
+
+    def iter_partitions(self) -> Iterator[Iterator[Tuple[bytes, int]]]:
+        """Yield the pairs of each partition in turn, deleting partition files once read."""
+        for path in self.paths:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.remove(path)
+            yield SPILL_RECORD.iter_unpack(data)
+
+def _group_digests(reader: _HashReader, min_size: int, memory_limit: int,
+                   spill_dir: Optional[str]) -> Tuple[List[Tuple[bytes, array]], int, int, int]:
+    """
+    Group the reader's pairs into clusters of at least min_size members.
+
+    Returns:
+        Tuple of (clusters as (digest, member ids), accounts, distinct hashes, partitions
+        used; 0 when everything fitted in memory)
+    """
+    grouper = _Grouper()
+    pairs = iter(reader)
+    if grouper.add_pairs(pairs, memory_limit):
+        return grouper.clusters(min_size), len(grouper.members), len(grouper.digests), 0
+
+    # Size the partitions so each is expected to fit the limit with room to spare
+    expected = grouper.estimated_bytes / max(reader.fraction, 1e-6)
+    count = min(MAX_PARTITIONS, max(2, int(2 * expected // memory_limit) + 1))
+    print(f"Grouping table exceeded {memory_limit:,} bytes; spilling to {count} partitions...")
+
+    accounts = 0
+    distinct = 0
+    clusters: List[Tuple[bytes, array]] = []
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix='ntds_clusters_') as temp_dir:
+        partitions = _SpillPartitions(temp_dir, count)
+        try:
+            for digest, member in grouper.pairs():
+                partitions.add(digest, member)
+            del grouper
+            for digest, member in pairs:
+                partitions.add(digest, member)
+        finally:
+            partitions.close()
+
+        for partition in partitions.iter_partitions():
+            grouper = _Grouper()
+            grouper.add_pairs(partition)
+            accounts += len(grouper.members)
+            distinct += len(grouper.digests)
+            clusters.extend(grouper.clusters(min_size))
+    return clusters, accounts, distinct, count
+
+def _resolve_members(input_file: str, from_cache: bool,
+                     clusters: List[Tuple[bytes, array]]) -> List[HashCluster]:
+    """Look up the account name and RID of every member of the clusters."""
+    resolved = []
+    if from_cache:
+        cache = NTDSCache.open(input_file)
+        try:
+            for digest, member_ids in clusters:
+                members = []
+                for i in member_ids:
+                    account = cache.account(i).decode('utf-8', errors='ignore')
+                    if cache.flags(i) & FLAG_RAW:
+                        record = parse_ntds_line(account)
+                        members.append(ClusterMember(record.account, record.rid))
+                    else:
+                        members.append(ClusterMember(account, cache.rid(i)))
+                resolved.append(HashCluster(digest.hex(), members))
+        finally:
+            cache.close()
+        return resolved
+
+    with open(input_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for digest, member_ids in clusters:
+            members = []
+            for offset in member_ids:
+                end = mm.find(b'\n', offset)
+                line = mm[offset:end if end >= 0 else len(mm)]
+                record = parse_ntds_line(line.decode('utf-8', errors='ignore'))
+                members.append(ClusterMember(record.account, record.rid))
+            resolved.append(HashCluster(digest.hex(), members))
+    return resolved
+
+def find_hash_clusters(input_file: str, min_size: int = 2,
+                       memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                       spill_dir: Optional[str] = None) -> Tuple[List[HashCluster], Dict[str, int]]:
+    """
+    Find groups of accounts sharing an NT hash.
+
+    Args:
+        input_file: Path to an NTDS dump or NTDS cache
+        min_size: Smallest number of accounts reported as a cluster
+        memory_limit: Approximate memory budget of the grouping table in bytes
+        spill_dir: Directory for spill partitions (default: the system temp directory)
+
+    Returns:
+        Tuple of (clusters sorted by size, largest first, then by first appearance;
+        statistics with 'accounts', 'distinct_hashes' and 'partitions')
+    """
+    reader = _HashReader(input_file)
+    clusters, accounts, distinct, partitions = _group_digests(reader, min_size, memory_limit,
+                                                              spill_dir)
+    # Largest first; ties keep the order in which the hashes first appear in the dump
+    clusters.sort(key=lambda cluster: (-len(cluster[1]), cluster[1][0]))
+    stats = {'accounts': accounts, 'distinct_hashes': distinct, 'partitions': partitions}
+    return _resolve_members(input_file, reader.from_cache, clusters), stats
+
+def write_cluster_report(clusters: List[HashCluster], output_file: str) -> None:
+    """Write clusters as a readable report, one block per shared hash."""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for cluster in clusters:
+            note = ' (empty password)' if cluster.nt_hash == EMPTY_NT_HASH else ''
+            f.write(f"NT hash {cluster.nt_hash}{note}: {len(cluster.members)} accounts, "
+                    f"{cluster.privileged_count} privileged\n")
+            for member in cluster.members:
+                rid = 'unknown' if member.rid is None else member.rid
+                privileged = ', privileged' if member.privileged else ''
+                f.write(f"    {member.account} (RID {rid}{privileged})\n")
+            f.write("\n")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+NTDS Snapshot Diff
+
+Compares two NTDS dumps of the same domain taken at different times and writes only
+what changed: accounts that appeared, accounts that disappeared, accounts whose NT
+hash changed (a password reset) and accounts that were enabled or disabled.
+
+Both dumps are sorted by (domain, username) with an external merge sort, so dumps
+larger than memory can be compared, and then merge-joined in a single streaming pass.
+Account names are compared case-insensitively, as Windows does. If a dump lists an
+account more than once, only its last line is compared and the others are counted.
+
+Used by the 'ntds diff' command.
+"""
+
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+from credforge.fileutils import DEFAULT_SORT_MEMORY, external_sort
+from credforge.ntds_cache import NTDSCache, is_ntds_cache
+from credforge.process_ntds import IO_BUFFER_SIZE, parse_ntds_line
+
+# Delta files written to the output directory, by category
+DIFF_FILES = {
+    'added': 'added.ntds',
+    'removed': 'removed.ntds',
+    'changed_hash': 'changed_hash.ntds',
+    'status_changed': 'status_changed.ntds',
+}
+
+def account_key(line: bytes) -> bytes:
+    """Sort key of a dump line: lower-cased domain and username, domain first."""
+    account = line.split(b':', 1)[0]
+    domain, _, username = account.rpartition(b'\\')
+    return domain.lower() + b'\0' + username.lower()
+
+def _iter_dump_lines(input_file: str) -> Iterator[bytes]:
+    """Yield the non-blank lines of a text dump or NTDS cache, without line endings."""
+    if is_ntds_cache(input_file):
+        cache = NTDSCache.open(input_file)
+        try:
+            for line in cache.iter_lines():
+                if line.strip():
+                    yield line.strip()
+        finally:
+            cache.close()
+        return
+
+    with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+def _last_per_account(lines: Iterator[bytes], counts: Dict[str, int]) -> Iterator[Tuple[bytes, bytes]]:
+    """
+    Yield (account key, line) for the last line of each account in a sorted dump.
+
+    The sort is stable, so the last line of a run of equal keys is the last one in
+    the dump. The other lines are counted in counts['duplicates'].
+    """
+    previous_key = previous_line = None
+    for line in lines:
+        key = account_key(line)
+        if key == previous_key:
+            counts['duplicates'] += 1
+        elif previous_line is not None:
+            yield previous_key, previous_line
+        previous_key, previous_line = key, line
+    if previous_line is not None:
+        yield previous_key, previous_line
+
+def _next(accounts: Iterator[Tuple[bytes, bytes]]):
+    return next(accounts, (None, None))
+
+def diff_ntds_files(old_file: str, new_file: str, output_dir: str,
+                    max_memory: int = DEFAULT_SORT_MEMORY,
+                    temp_dir: Optional[str] = None) -> Dict[str, int]:
+    """
+    Write the differences between two NTDS dumps to per-category files.
+
+    Added accounts and accounts with a changed hash or status are written as their line
+    in the new dump, removed accounts as their line in the old dump. An account whose
+    hash and status both changed appears in both files. Each file is ordered by
+    (domain, username). An account listed more than once in a dump is compared by its
+    last line there.
+
+    Args:
+        old_file: Path to the earlier dump or NTDS cache
+        new_file: Path to the later dump or NTDS cache
+        output_dir: Directory for the files named in DIFF_FILES
+        max_memory: Memory budget in bytes for sorting each dump
+        temp_dir: Directory for sort runs (default: the system temp directory)
+
+    Returns:
+        Number of accounts in each category, plus 'unchanged' and 'duplicates' (repeated
+        lines of an account that were skipped, over both dumps)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = dict.fromkeys(DIFF_FILES, 0)
+    counts['unchanged'] = 0
+    counts['duplicates'] = 0
+
+    old_lines = _last_per_account(
+        external_sort(_iter_dump_lines(old_file), account_key, max_memory, temp_dir), counts)
+    new_lines = _last_per_account(
+        external_sort(_iter_dump_lines(new_file), account_key, max_memory, temp_dir), counts)
+
+    outputs = {category: open(os.path.join(output_dir, name), 'wb', buffering=IO_BUFFER_SIZE)
+               for category, name in DIFF_FILES.items()}
+    try:
+        def emit(category: str, line: bytes) -> None:
+            outputs[category].write(line + b'\n')
+            counts[category] += 1
+
+        old_key, old_line = _next(old_lines)
+        new_key, new_line = _next(new_lines)
+        while old_line is not None or new_line is not None:
+            if new_line is None or (old_line is not None and old_key < new_key):
+                emit('removed', old_line)
+                old_key, old_line = _next(old_lines)
+            elif old_line is None or new_key < old_key:
+                emit('added', new_line)
+                new_key, new_line = _next(new_lines)
+            elif old_line == new_line:
+                # Most accounts are untouched between snapshots; skip parsing them
+                counts['unchanged'] += 1
+                old_key, old_line = _next(old_lines)
+                new_key, new_line = _next(new_lines)
+            else:
+                old = parse_ntds_line(old_line.decode('utf-8', errors='ignore'))
+                new = parse_ntds_line(new_line.decode('utf-8', errors='ignore'))
+                changed = False
+                if old.nt_hash != new.nt_hash:
+                    emit('changed_hash', new_line)
+                    changed = True
+                if old.disabled != new.disabled:
+                    emit('status_changed', new_line)
+                    changed = True
+                if not changed:
+                    counts['unchanged'] += 1
+                old_key, old_line = _next(old_lines)
+                new_key, new_line = _next(new_lines)
+    finally:
+        for output in outputs.values():
+            output.close()
+    return counts
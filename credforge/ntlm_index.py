@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Compact NTLM Index
+
+This module provides a memory-efficient lookup table for cracked NTLM hashes. Instead of a
+dictionary keyed by 32-character hex strings, each NTLM digest is stored as 16 raw bytes in a
+sorted contiguous buffer, and the cracked passwords are kept in a separate blob addressed by
+offsets. Lookups go through a 65,536-entry bucket table on the first two digest bytes followed
+by a binary search inside the bucket.
+
+A dictionary costs well over 100 bytes per entry before the password is counted; this index
+needs 24 bytes per entry plus the UTF-8 password bytes.
+
+Keys that are not 32-character hex digests (e.g. other hash types found in a shared potfile)
+are kept in a small side dictionary so lookups behave exactly like the plain dictionary. They
+are left out of saved index files, which only count them, so opening an index never has to
+parse anything.
+
+The index can be saved to disk and memory-mapped by later runs, so a large master potfile is
+parsed once and then shared through the OS page cache by every job that uses it. The index
+file records the size and modification time of the potfile it was built from, and a stale
+index is rebuilt automatically.
+
+A Bloom filter over the indexed digests can be stored alongside the index as a prefilter
+that rejects uncracked hashes without a binary search.
+
+Usage:
+    python ntlm_index.py <cracked_file> [-o INDEX_FILE] [--force] [--bloom [FP_RATE]]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from credforge.bloom_filter import (BLOOM_SUFFIX, DEFAULT_FP_RATE, BloomFilter,
+                                    optimal_parameters, read_source_stamp)
+
+DIGEST_SIZE = 16
+BUCKET_BITS = 16
+NUM_BUCKETS = 1 << BUCKET_BITS
+
+# On-disk header: magic, version, entry count, password blob size, number of skipped
+# non-NTLM keys, source file size and source file mtime (ns). Sections follow in
+# little-endian order: bucket table, digests, password offsets, password blob.
+INDEX_MAGIC = b'CFNTIDX1'
+INDEX_VERSION = 2
+INDEX_HEADER = struct.Struct('<8sIIQQQQQ')
+INDEX_HEADER_SIZE = 64
+INDEX_SUFFIX = '.idx'
+
+def iter_cracked_pairs(cracked_file: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (lowercase hash, password) pairs from a hash:password file.
+
+    Malformed lines are reported with a warning and skipped.
+
+    Args:
+        cracked_file: Path to file containing hash:password pairs
+
+    Yields:
+        Tuple of lowercase hash and cracked password
+    """
+    with open(cracked_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if line and ':' in line:
+                # Split only on first colon in case password contains colons
+                hash_part, password = line.split(':', 1)
+                yield hash_part.lower(), password
+            elif line:  # Non-empty line without colon
+                print(f"Warning: Line {line_num} in cracked file has invalid format: {line}")
+
+def hash_to_digest(hash_value: str) -> Optional[bytes]:
+    """
+    Convert a 32-character hex NTLM hash into its 16-byte digest.
+
+    Returns:
+        The raw digest, or None if the value is not a 32-character hex string
+    """
+    if len(hash_value) != 2 * DIGEST_SIZE:
+        return None
+    try:
+        digest = bytes.fromhex(hash_value)
+    except ValueError:
+        return None
+    # fromhex() skips whitespace, so make sure nothing was dropped
+    return digest if len(digest) == DIGEST_SIZE else None
+
+class NTLMIndex:
+    """
+    Read-only hash -> password lookup backed by contiguous buffers.
+
+    The index supports the subset of the dictionary interface used by the matching
+    code: len(), `in` and get().
+    """
+
+    def __init__(self, buckets, digests, offsets, blob, extra: Dict[str, str],
+                 digest_base: int = 0, blob_base: int = 0):
+        # buckets[b]..buckets[b + 1] is the slot range of digests starting with prefix b
+        self._buckets = buckets
+        # Sorted 16-byte digests, starting at digest_base inside the digests buffer
+        self._digests = digests
+        self._digest_base = digest_base
+        # Password i lives at blob[offsets[i]:offsets[i + 1]], relative to blob_base
+        self._offsets = offsets
+        self._blob = blob
+        self._blob_base = blob_base
+        self._extra = extra
+        self._count = buckets[NUM_BUCKETS]
+        # Set when the index is memory-mapped from an index file
+        self._mmap: Optional[mmap.mmap] = None
+        self._path: Optional[str] = None
+        self.source_size: Optional[int] = None
+        self.source_mtime_ns: Optional[int] = None
+        # Non-NTLM keys that were left out when the index was saved
+        self.skipped_keys = 0
+
+    @classmethod
+    def from_pairs(cls, pairs) -> 'NTLMIndex':
+        """
+        Build an index from (lowercase hash, password) pairs.
+
+        Later pairs override earlier pairs with the same hash, like dictionary assignment.
+        """
+        digests = bytearray()
+        blob = bytearray()
+        offsets = array('Q', [0])
+        extra: Dict[str, str] = {}
+
+        for hash_value, password in pairs:
+            digest = hash_to_digest(hash_value)
+            if digest is None:
+                extra[hash_value] = password
+                continue
+            digests += digest
+            blob += password.encode('utf-8')
+            offsets.append(len(blob))
+
+        return cls._from_unsorted(digests, offsets, blob, extra)
+
+    @classmethod
+    def from_cracked_file(cls, cracked_file: str) -> 'NTLMIndex':
+        """Build an index from a hash:password file."""
+        return cls.from_pairs(iter_cracked_pairs(cracked_file))
+
+    @classmethod
+    def _from_unsorted(cls, digests: bytearray, offsets: array, blob: bytearray,
+                       extra: Dict[str, str]) -> 'NTLMIndex':
+        """Sort the collected entries with a counting sort on the bucket prefix."""
+        count = len(offsets) - 1
+
+        # Counting sort on the 16-bit prefix gives the bucket layout directly and
+        # leaves only small buckets to be sorted by the full digest
+        starts = array('Q', bytes(8 * (NUM_BUCKETS + 1)))
+        for i in range(0, count * DIGEST_SIZE, DIGEST_SIZE):
+            starts[(digests[i] << 8 | digests[i + 1]) + 1] += 1
+        for b in range(NUM_BUCKETS):
+            starts[b + 1] += starts[b]
+
+        positions = array('Q', starts)
+        order = array('Q', bytes(8 * count))
+        for i in range(count):
+            pos = i * DIGEST_SIZE
+            b = digests[pos] << 8 | digests[pos + 1]
+            order[positions[b]] = i
+            positions[b] += 1
+        del positions
+
+        sorted_digests = bytearray()
+        sorted_blob = bytearray()
+        sorted_offsets = array('Q', [0])
+        buckets = array('Q', bytes(8 * (NUM_BUCKETS + 1)))
+
+        def digest_at(i: int) -> bytes:
+            return bytes(digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE])
+
+        for b in range(NUM_BUCKETS):
+            buckets[b] = len(sorted_offsets) - 1
+            members: List[int] = order[starts[b]:starts[b + 1]].tolist()
+            if not members:
+                continue
+            # Stable sort keeps duplicates in file order; the last one wins
+            members.sort(key=digest_at)
+            for j, i in enumerate(members):
+                if j + 1 < len(members) and digest_at(members[j + 1]) == digest_at(i):
+                    continue
+                sorted_digests += digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]
+                sorted_blob += blob[offsets[i]:offsets[i + 1]]
+                sorted_offsets.append(len(sorted_blob))
+        buckets[NUM_BUCKETS] = len(sorted_offsets) - 1
+
+        return cls(buckets, sorted_digests, sorted_offsets, sorted_blob, extra)
+
+    def __len__(self) -> int:
+        return self._count + len(self._extra)
+
+    def __contains__(self, hash_value) -> bool:
+        return self.get(hash_value) is not None
+
+    def get(self, hash_value: str, default: Optional[str] = None) -> Optional[str]:
+        """Return the password for a lowercase hash, or default if it is not cracked."""
+        digest = hash_to_digest(hash_value)
+        if digest is None:
+            return self._extra.get(hash_value, default)
+        password = self.get_digest(digest)
+        return default if password is None else password
+
+    def get_digest(self, digest: bytes) -> Optional[str]:
+        """Return the password for a 16-byte digest, or None if it is not cracked."""
+        b = digest[0] << 8 | digest[1]
+        lo = self._buckets[b]
+        hi = self._buckets[b + 1]
+        digests = self._digests
+        base = self._digest_base
+
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            pos = base + mid * DIGEST_SIZE
+            candidate = digests[pos:pos + DIGEST_SIZE]
+            if candidate < digest:
+                lo = mid + 1
+            elif candidate == digest:
+                start = self._blob_base + self._offsets[mid]
+                end = self._blob_base + self._offsets[mid + 1]
+                return self._blob[start:end].decode('utf-8')
+            else:
+                hi = mid
+        return None
+
+    @property
+    def digest_count(self) -> int:
+        """Number of 16-byte digests in the index, excluding non-hex keys."""
+        return self._count
+
+    def iter_digests(self) -> Iterator[bytes]:
+        """Yield every 16-byte digest in the index in sorted order."""
+        digests = self._digests
+        start = self._digest_base
+        for pos in range(start, start + self._count * DIGEST_SIZE, DIGEST_SIZE):
+            yield bytes(digests[pos:pos + DIGEST_SIZE])
+
+    def save(self, index_file: str, source_size: int = 0, source_mtime_ns: int = 0) -> None:
+        """
+        Write the index to disk in a form that can be memory-mapped by open().
+
+        Keys that are not NTLM digests are not written, only counted in the header.
+        The file is written next to its destination and renamed into place, so jobs
+        reading an existing index never see a partial file.
+
+        Args:
+            index_file: Path of the index file to write
+            source_size: Size of the potfile the index was built from
+            source_mtime_ns: Modification time (ns) of that potfile
+        """
+        count = self._count
+        blob_size = self._offsets[count]
+        header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, count, blob_size,
+                                   len(self._extra) + self.skipped_keys, source_size,
+                                   source_mtime_ns)
+
+        temp_file = f"{index_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(header.ljust(INDEX_HEADER_SIZE, b'\0'))
+                f.write(_le_bytes(self._buckets))
+                f.write(self._digests[self._digest_base:self._digest_base + count * DIGEST_SIZE])
+                f.write(_le_bytes(self._offsets[:count + 1]))
+                f.write(self._blob[self._blob_base:self._blob_base + blob_size])
+            os.replace(temp_file, index_file)
+        except BaseException:
+            if Path(temp_file).exists():
+                os.remove(temp_file)
+            raise
+
+    @classmethod
+    def open(cls, index_file: str) -> 'NTLMIndex':
+        """
+        Memory-map an index file written by save().
+
+        Raises:
+            ValueError: If the file is not a compatible index file
+        """
+        with open(index_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < INDEX_HEADER_SIZE:
+                raise ValueError(f"'{index_file}' is not an NTLM index file.")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, count, blob_size, skipped_keys, source_size, source_mtime_ns = \
+            INDEX_HEADER.unpack_from(mm, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            mm.close()
+            raise ValueError(f"'{index_file}' is not an NTLM index file.")
+
+        digest_base = INDEX_HEADER_SIZE + 8 * (NUM_BUCKETS + 1)
+        offsets_base = digest_base + count * DIGEST_SIZE
+        blob_base = offsets_base + 8 * (count + 1)
+        if len(mm) != blob_base + blob_size:
+            mm.close()
+            raise ValueError(f"NTLM index file '{index_file}' is truncated or corrupt.")
+
+        buckets = _le_view(mm, INDEX_HEADER_SIZE, NUM_BUCKETS + 1)
+        offsets = _le_view(mm, offsets_base, count + 1)
+
+        index = cls(buckets, mm, offsets, mm, {}, digest_base=digest_base, blob_base=blob_base)
+        index._mmap = mm
+        index._path = index_file
+        index.source_size = source_size
+        index.source_mtime_ns = source_mtime_ns
+        index.skipped_keys = skipped_keys
+        return index
+
+    def __reduce__(self):
+        # A memory-mapped index is sent to worker processes by path and mapped again
+        if self._mmap is not None:
+            return (NTLMIndex.open, (self._path,))
+        return (NTLMIndex, (self._buckets, self._digests, self._offsets, self._blob, self._extra,
+                            self._digest_base, self._blob_base))
+
+    def close(self) -> None:
+        """Release the memory map of an index opened from disk."""
+        if self._mmap is not None:
+            # Views onto the map must be released before it can be closed
+            for view in (self._buckets, self._offsets):
+                if isinstance(view, memoryview):
+                    view.release()
+            self._mmap.close()
+            self._mmap = None
+
+def _le_bytes(values) -> bytes:
+    """Serialize a sequence of unsigned 64-bit integers in little-endian order."""
+    data = array('Q', values)
+    if sys.byteorder != 'little':
+        data.byteswap()
+    return data.tobytes()
+
+def _le_view(buffer, offset: int, count: int):
+    """Return the little-endian unsigned 64-bit integers at offset as an indexable sequence."""
+    view = memoryview(buffer)[offset:offset + 8 * count]
+    if sys.byteorder == 'little':
+        return view.cast('Q')
+    data = array('Q', view.tobytes())
+    view.release()
+    data.byteswap()
+    return data
+
+def default_index_path(cracked_file: str) -> str:
+    """Return the index file path used for a potfile when none is given."""
+    return cracked_file + INDEX_SUFFIX
+
+def is_index_current(index_file: str, cracked_file: str) -> bool:
+    """
+    Check whether an index file exists and was built from the current potfile.
+
+    The potfile's size and modification time must match the values recorded in the index.
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+    except OSError:
+        return False
+    if len(header) < INDEX_HEADER.size:
+        return False
+    magic, version, _, _, _, _, source_size, source_mtime_ns = INDEX_HEADER.unpack(header)
+    return (magic == INDEX_MAGIC and version == INDEX_VERSION and
+            _matches_source(source_size, source_mtime_ns, cracked_file))
+
+def _matches_source(source_size: int, source_mtime_ns: int, cracked_file: str) -> bool:
+    """Check a recorded potfile size and mtime against the potfile on disk."""
+    try:
+        stat = os.stat(cracked_file)
+    except OSError:
+        return False
+    return source_size == stat.st_size and source_mtime_ns == stat.st_mtime_ns
+
+def build_index_file(cracked_file: str, index_file: str) -> Tuple[int, int]:
+    """
+    Parse a hash:password file and write it as an on-disk index.
+
+    Returns:
+        Tuple of (NTLM hashes indexed, non-NTLM keys skipped)
+    """
+    # Stat before reading so a potfile that changes during the build is seen as stale
+    stat = os.stat(cracked_file)
+    index = NTLMIndex.from_cracked_file(cracked_file)
+    index.save(index_file, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+    return index.digest_count, len(index._extra)
+
+def load_or_build_index(cracked_file: str, index_file: Optional[str] = None) -> NTLMIndex:
+    """
+    Memory-map the index for a potfile, building or rebuilding it first if needed.
+
+    Args:
+        cracked_file: Path to file containing hash:password pairs
+        index_file: Path of the index file (default: cracked_file + '.idx')
+
+    Returns:
+        The memory-mapped index
+    """
+    if index_file is None:
+        index_file = default_index_path(cracked_file)
+    if not is_index_current(index_file, cracked_file):
+        if Path(index_file).exists():
+            print(f"Index '{index_file}' is out of date with '{cracked_file}', rebuilding...")
+        else:
+            print(f"Building index '{index_file}' from '{cracked_file}'...")
+        _, skipped = build_index_file(cracked_file, index_file)
+        if skipped:
+            print(f"Skipped {skipped:,} non-NTLM potfile entries; the index only holds NTLM hashes.")
+    return NTLMIndex.open(index_file)
+
+class BloomFilteredLookup:
+    """
+    Cracked-hash lookup with a Bloom filter in front of it.
+
+    NTLM hashes the filter rules out are answered without touching the main lookup
+    table, which pays off when most hashes are not cracked and the table is a compact
+    or memory-mapped NTLMIndex. Non-hex keys always go to the main table.
+    """
+
+    def __init__(self, lookup, bloom: BloomFilter):
+        self._lookup = lookup
+        self._bloom = bloom
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def __contains__(self, hash_value) -> bool:
+        return self.get(hash_value) is not None
+
+    def get(self, hash_value: str, default: Optional[str] = None) -> Optional[str]:
+        """Return the password for a lowercase hash, or default if it is not cracked."""
+        digest = hash_to_digest(hash_value)
+        if digest is None:
+            return self._lookup.get(hash_value, default)
+        if not self._bloom.might_contain(digest):
+            return default
+        if isinstance(self._lookup, NTLMIndex):
+            password = self._lookup.get_digest(digest)
+            return default if password is None else password
+        return self._lookup.get(hash_value, default)
+
+    def close(self) -> None:
+        """Release the memory maps of the lookup table and the filter."""
+        close = getattr(self._lookup, 'close', None)
+        if close is not None:
+            close()
+        self._bloom.close()
+
+def build_bloom_filter(lookup, fp_rate: float = DEFAULT_FP_RATE) -> BloomFilter:
+    """Build a Bloom filter over the NTLM digests of a dict or NTLMIndex lookup table."""
+    if isinstance(lookup, NTLMIndex):
+        return BloomFilter.from_digests(lookup.iter_digests(), lookup.digest_count, fp_rate)
+    digests = [digest for digest in map(hash_to_digest, lookup) if digest is not None]
+    return BloomFilter.from_digests(digests, len(digests), fp_rate)
+
+def default_bloom_path(index_file: str) -> str:
+    """Return the Bloom filter path stored alongside an index file."""
+    return index_file + BLOOM_SUFFIX
+
+def load_or_build_bloom(index: NTLMIndex, cracked_file: str, bloom_file: Optional[str] = None,
+                        fp_rate: float = DEFAULT_FP_RATE) -> BloomFilter:
+    """
+    Memory-map the Bloom filter stored alongside an index, building it first if needed.
+
+    The filter is rebuilt when the potfile changed since it was written or when it was
+    sized for a different false-positive rate.
+
+    Args:
+        index: The index of cracked_file, freshly built or verified current
+        cracked_file: Path to file containing hash:password pairs
+        bloom_file: Path of the filter file (default: the index path + '.bloom')
+        fp_rate: Target false-positive rate
+
+    Returns:
+        The memory-mapped filter
+    """
+    if bloom_file is None:
+        if index._path is None:
+            raise ValueError("A Bloom filter path is required for an in-memory index.")
+        bloom_file = default_bloom_path(index._path)
+
+    stamp = read_source_stamp(bloom_file)
+    if stamp is not None and _matches_source(stamp[0], stamp[1], cracked_file):
+        bloom = BloomFilter.open(bloom_file)
+        if (bloom.num_bits, bloom.num_hashes) == optimal_parameters(index.digest_count, fp_rate):
+            return bloom
+        bloom.close()
+
+    print(f"Building Bloom filter '{bloom_file}' (false-positive rate {fp_rate:g})...")
+    bloom = build_bloom_filter(index, fp_rate)
+    if index.source_size is not None:
+        bloom.save(bloom_file, source_size=index.source_size, source_mtime_ns=index.source_mtime_ns)
+    else:
+        stat = os.stat(cracked_file)
+        bloom.save(bloom_file, source_size=stat.st_size, source_mtime_ns=stat.st_mtime_ns)
+    return BloomFilter.open(bloom_file)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build an on-disk NTLM index from a hash:password file.')
+    parser.add_argument('cracked_file', help='Path to the cracked passwords file (hash:password)')
+    parser.add_argument('-o', '--output', help='Path of the index file (default: <cracked_file>.idx)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild the index even if it is up to date')
+    parser.add_argument('--bloom', nargs='?', type=float, const=DEFAULT_FP_RATE, metavar='FP_RATE',
+                        help='Also write a Bloom filter prefilter next to the index '
+                             f'(default false-positive rate: {DEFAULT_FP_RATE})')
+    
+    args = parser.parse_args()
+    
+    if not Path(args.cracked_file).is_file():
+        print(f"Error: Cracked passwords file '{args.cracked_file}' not found.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.bloom is not None and not 0 < args.bloom < 1:
+        print("Error: Bloom filter false-positive rate must be between 0 and 1.", file=sys.stderr)
+        sys.exit(1)
+    
+    index_file = args.output or default_index_path(args.cracked_file)
+    try:
+        if not args.force and is_index_current(index_file, args.cracked_file):
+            print(f"Index '{index_file}' is up to date.")
+        else:
+            print(f"Building index from {args.cracked_file}...")
+            entries, skipped = build_index_file(args.cracked_file, index_file)
+            print(f"Indexed {entries:,} cracked hashes.")
+            if skipped:
+                print(f"Skipped {skipped:,} non-NTLM potfile entries.")
+            print(f"Index written to: {index_file} ({Path(index_file).stat().st_size:,} bytes)")
+        
+        if args.bloom is not None:
+            bloom_file = default_bloom_path(index_file)
+            if args.force and Path(bloom_file).exists():
+                os.remove(bloom_file)
+            index = NTLMIndex.open(index_file)
+            bloom = load_or_build_bloom(index, args.cracked_file, bloom_file, args.bloom)
+            print(f"Bloom filter: {bloom_file} ({bloom.num_bits // 8:,} bytes, "
+                  f"{bloom.num_hashes} hash functions)")
+            bloom.close()
+            index.close()
+    except Exception as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
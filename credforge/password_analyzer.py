@@ -5,32 +5,108 @@ Password Analyzer
 This script analyzes a password file and shows the top 10 most common passwords
 along with their frequency count.
 
+By default every distinct password is counted exactly. For corpora too large to hold
+in memory, --stream counts in bounded memory instead: a Space-Saving summary finds the
+most common passwords with a guaranteed error bound and a HyperLogLog sketch estimates
+the number of unique passwords.
+
+With --workers the file is split into byte ranges analyzed in parallel. Exact counts
+are combined map-reduce style: each range is counted and its passwords are written to
+hash partitions on disk, then each partition is reduced by one worker, so no process
+ever holds the counts of the whole corpus. Streaming sketches are merged directly.
+
+--composition adds length, character-class, entropy and policy statistics (see
+password_composition.py), --masks the hashcat mask distribution (see password_masks.py)
+and --patterns keyboard walks, seasons, months, years and organization terms (see
+password_patterns.py).
+
 Usage:
-    python password_analyzer.py <password_file>
+    python password_analyzer.py <password_file> [--stream] [--memory-budget MB] [--workers N]
+                                [--composition] [--masks] [--masks-file HCMASK_FILE]
+                                [--patterns] [--org-terms TERMS_FILE]
 """
 
+import argparse
+import heapq
+import os
 import sys
+import tempfile
+import zlib
 from collections import Counter
+from functools import lru_cache
 from pathlib import Path
 
-def analyze_passwords(password_file):
-    """Analyze the password file and return password frequencies."""
+from credforge.fileutils import CHUNKS_PER_WORKER, pool_context, read_range, split_line_ranges
+from credforge.password_composition import analyze_composition, print_composition
+from credforge.password_masks import MaskStats, print_mask_report
+from credforge.password_patterns import (PatternMatcher, PatternStats, default_patterns,
+                                         print_pattern_report, read_org_terms)
+from credforge.sketches import HyperLogLog, SpaceSaving
+
+# Default memory budget of the streaming summary
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Size hint in bytes for each batch of lines read in streaming mode
+READ_BATCH_SIZE = 1024 * 1024
+
+# Largest byte range counted by one parallel task; bounds a worker's Counter
+MAP_CHUNK_SIZE = 8 * 1024 * 1024
+
+MAX_PARTITIONS = 256
+
+def _iter_password_batches(password_file):
+    """Yield lists of non-empty, stripped passwords read in large batches."""
     try:
         with open(password_file, 'r', encoding='utf-8', errors='ignore') as f:
-            passwords = [line.strip() for line in f if line.strip()]
+            while True:
+                lines = f.readlines(READ_BATCH_SIZE)
+                if not lines:
+                    break
+                yield [password for password in map(str.strip, lines) if password]
     except FileNotFoundError:
         raise FileNotFoundError(f"File '{password_file}' not found.")
-    except Exception as e:
+    except OSError as e:
         raise Exception(f"Error reading file: {e}")
+
+def analyze_passwords(password_file, stream=False, memory_budget=DEFAULT_MEMORY_BUDGET, workers=1,
+                      temp_dir=None):
+    """
+    Analyze the password file and return password frequencies.
     
-    if not passwords:
-        raise ValueError("No passwords found in the file.")
+    Args:
+        password_file: Path to a file with one password per line
+        stream: Count in bounded memory with approximate results
+        memory_budget: Approximate memory in bytes for the streaming summary; with
+            workers, each worker's summary gets an equal share of it
+        workers: Number of worker processes
+        temp_dir: Directory for the partitions of an exact parallel run (default: the
+            system temp directory)
+    
+    Returns:
+        Dictionary with 'total_passwords', 'unique_passwords' and 'top_passwords'. In
+        streaming mode it also has 'approximate', 'count_errors' (the largest possible
+        overcount of each top password), 'count_error' (the bound for every count) and
+        'unique_error' (relative standard error of unique_passwords).
+    """
+    if workers > 1:
+        if not Path(password_file).is_file():
+            raise FileNotFoundError(f"File '{password_file}' not found.")
+        if stream:
+            return _analyze_stream_parallel(password_file, memory_budget, workers)
+        return _analyze_parallel(password_file, workers, temp_dir)
+    if stream:
+        return _analyze_stream(password_file, memory_budget)
+    
+    # Count password occurrences without keeping a separate list of the lines
+    password_counter = Counter()
+    for batch in _iter_password_batches(password_file):
+        password_counter.update(batch)
     
-    # Count password occurrences
-    password_counter = Counter(passwords)
+    if not password_counter:
+        raise ValueError("No passwords found in the file.")
     
     # Get total unique and total passwords
-    total_passwords = len(passwords)
+    total_passwords = sum(password_counter.values())
     unique_passwords = len(password_counter)
     
     # Get top 10 most common passwords
@@ -42,40 +118,307 @@ def analyze_passwords(password_file):
         'top_passwords': top_passwords
     }
 
+def _analyze_stream(password_file, memory_budget):
+    """Streaming analysis with a Space-Saving summary and a HyperLogLog sketch."""
+    summary = SpaceSaving.for_memory(memory_budget)
+    distinct = HyperLogLog()
+    for batch in _iter_password_batches(password_file):
+        # Passwords already tracked by the summary were added to the sketch on insertion
+        distinct.update(summary.update(batch))
+    return _stream_results(summary, distinct)
+
+def _stream_results(summary, distinct):
+    """Build the analysis result of a streaming summary and distinct-count sketch."""
+    if not summary.total:
+        raise ValueError("No passwords found in the file.")
+    
+    top_passwords = summary.most_common(10)
+    if summary.exact:
+        # Nothing was evicted, so the table holds every distinct password
+        unique_passwords, unique_error = len(summary.counts), 0.0
+    else:
+        unique_passwords, unique_error = distinct.count(), distinct.relative_error
+    return {
+        'total_passwords': summary.total,
+        'unique_passwords': max(1, unique_passwords),
+        'top_passwords': top_passwords,
+        'approximate': not summary.exact,
+        'count_errors': [summary.error(password) for password, _ in top_passwords],
+        'count_error': summary.floor,
+        'unique_error': unique_error,
+    }
+
+def _read_passwords(password_file, start, end):
+    """Return the non-empty, stripped passwords of a newline-aligned byte range."""
+    text = read_range(password_file, start, end).decode('utf-8', errors='ignore')
+    # Split like text-mode reading does, which treats \r\n and \r as line endings
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return [password for password in map(str.strip, text.split('\n')) if password]
+
+def _partition_path(spill_dir, chunk, partition):
+    return os.path.join(spill_dir, f"chunk{chunk:06d}.part{partition:03d}")
+
+def _map_range(task):
+    """
+    Count the passwords of one byte range and spill the counts to hash partitions.
+    
+    Each spilled record is "count<TAB>order<TAB>password", where order is the position of
+    the password's first occurrence among the distinct passwords of the range.
+    """
+    password_file, start, end, chunk, spill_dir, partitions = task
+    passwords = _read_passwords(password_file, start, end)
+    buffers = [[] for _ in range(partitions)]
+    for order, (password, count) in enumerate(Counter(passwords).items()):
+        data = password.encode('utf-8')
+        buffers[zlib.crc32(data) % partitions].append(b'%d\t%d\t%s' % (count, order, data))
+    for partition, records in enumerate(buffers):
+        if records:
+            with open(_partition_path(spill_dir, chunk, partition), 'wb') as f:
+                f.write(b'\n'.join(records))
+    return len(passwords)
+
+def _reduce_partition(task):
+    """
+    Add up the spilled counts of one partition.
+    
+    Returns:
+        Tuple of (distinct passwords, top 10 as (password, count, first occurrence))
+    """
+    spill_dir, partition, chunks = task
+    counts = {}
+    first_seen = {}
+    for chunk in range(chunks):
+        path = _partition_path(spill_dir, chunk, partition)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            records = f.read().split(b'\n')
+        for record in records:
+            count, order, password = record.split(b'\t', 2)
+            if password in counts:
+                counts[password] += int(count)
+            else:
+                counts[password] = int(count)
+                # Chunks are read in file order, so the first chunk seen is the earliest
+                first_seen[password] = (chunk, int(order))
+    # Only passwords reaching the tenth-highest count can be in the top 10
+    highest = heapq.nlargest(10, counts.values())
+    threshold = highest[-1] if highest else 0
+    top = sorted((password for password, count in counts.items() if count >= threshold),
+                 key=lambda password: (-counts[password], first_seen[password]))[:10]
+    return len(counts), [(password.decode('utf-8'), counts[password], first_seen[password])
+                         for password in top]
+
+def _analyze_parallel(password_file, workers, temp_dir=None):
+    """Exact analysis split across worker processes, reduced through hash partitions."""
+    ranges = split_line_ranges(password_file, workers, max_chunk_size=MAP_CHUNK_SIZE)
+    partitions = min(MAX_PARTITIONS, workers * CHUNKS_PER_WORKER)
+    
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix='password_analyzer_') as spill_dir, \
+            pool_context().Pool(workers) as pool:
+        tasks = [(password_file, start, end, chunk, spill_dir, partitions)
+                 for chunk, (start, end) in enumerate(ranges)]
+        total_passwords = sum(pool.imap_unordered(_map_range, tasks))
+        reduced = pool.map(_reduce_partition,
+                           [(spill_dir, partition, len(ranges)) for partition in range(partitions)],
+                           chunksize=1)
+    
+    if not total_passwords:
+        raise ValueError("No passwords found in the file.")
+    
+    # Each password lives in exactly one partition, so the partition top 10s hold the
+    # overall top 10; ties keep first-occurrence order like Counter.most_common
+    candidates = [entry for _, top in reduced for entry in top]
+    candidates.sort(key=lambda entry: (-entry[1], entry[2]))
+    return {
+        'total_passwords': total_passwords,
+        'unique_passwords': sum(unique for unique, _ in reduced),
+        'top_passwords': [(password, count) for password, count, _ in candidates[:10]]
+    }
+
+def _sketch_range(task):
+    """Build streaming sketches over one byte range."""
+    password_file, start, end, memory_budget = task
+    summary = SpaceSaving.for_memory(memory_budget)
+    distinct = HyperLogLog()
+    distinct.update(summary.update(_read_passwords(password_file, start, end)))
+    return summary, distinct
+
+def _analyze_stream_parallel(password_file, memory_budget, workers):
+    """Streaming analysis with per-range sketches merged as they arrive."""
+    # Only the range summaries share the budget; the merged one keeps all of it
+    tasks = [(password_file, start, end, memory_budget // workers)
+             for start, end in split_line_ranges(password_file, workers, max_chunk_size=MAP_CHUNK_SIZE)]
+    summary = SpaceSaving.for_memory(memory_budget)
+    distinct = HyperLogLog()
+    with pool_context().Pool(workers) as pool:
+        for part_summary, part_distinct in pool.imap(_sketch_range, tasks):
+            summary.merge(part_summary)
+            distinct.merge(part_distinct)
+    return _stream_results(summary, distinct)
+
+def _mask_range(task):
+    """Count the masks of one byte range."""
+    password_file, start, end = task
+    stats = MaskStats()
+    stats.update(_read_passwords(password_file, start, end))
+    return stats
+
+def analyze_masks(password_file, workers=1):
+    """
+    Count the hashcat masks of the passwords in a file.
+    
+    Args:
+        password_file: Path to a file with one password per line
+        workers: Number of worker processes
+    
+    Returns:
+        MaskStats holding the counts of every mask
+    """
+    stats = MaskStats()
+    if workers > 1:
+        if not Path(password_file).is_file():
+            raise FileNotFoundError(f"File '{password_file}' not found.")
+        tasks = [(password_file, start, end)
+                 for start, end in split_line_ranges(password_file, workers, max_chunk_size=MAP_CHUNK_SIZE)]
+        with pool_context().Pool(workers) as pool:
+            for part in pool.imap_unordered(_mask_range, tasks):
+                stats.merge(part)
+    else:
+        for batch in _iter_password_batches(password_file):
+            stats.update(batch)
+    
+    if not stats.total:
+        raise ValueError("No passwords found in the file.")
+    return stats
+
+@lru_cache(maxsize=4)
+def _pattern_matcher(org_terms):
+    """Build the pattern automaton once per process and set of org terms."""
+    return PatternMatcher(default_patterns(org_terms))
+
+def _pattern_range(task):
+    """Scan one byte range for patterns."""
+    password_file, start, end, org_terms = task
+    stats = PatternStats(_pattern_matcher(org_terms))
+    stats.update(_read_passwords(password_file, start, end))
+    return stats
+
+def analyze_patterns(password_file, org_terms=(), workers=1):
+    """
+    Count keyboard walks, seasons, months, years and organization terms in a file.
+    
+    Args:
+        password_file: Path to a file with one password per line
+        org_terms: Organization terms to look for, such as the company name
+        workers: Number of worker processes
+    
+    Returns:
+        PatternStats holding the count of every pattern found
+    """
+    org_terms = tuple(org_terms)
+    stats = PatternStats(_pattern_matcher(org_terms))
+    if workers > 1:
+        if not Path(password_file).is_file():
+            raise FileNotFoundError(f"File '{password_file}' not found.")
+        tasks = [(password_file, start, end, org_terms)
+                 for start, end in split_line_ranges(password_file, workers, max_chunk_size=MAP_CHUNK_SIZE)]
+        with pool_context().Pool(workers) as pool:
+            for part in pool.imap_unordered(_pattern_range, tasks):
+                stats.merge(part)
+    else:
+        for batch in _iter_password_batches(password_file):
+            stats.update(batch)
+    
+    if not stats.total:
+        raise ValueError("No passwords found in the file.")
+    return stats
+
 def print_results(results, filename):
     """Print the analysis results in a formatted way."""
     print(f"\nPassword Analysis for: {filename}")
     print("=" * 60)
     print(f"Total passwords analyzed: {results['total_passwords']:,}")
-    print(f"Unique passwords found: {results['unique_passwords']:,}")
+    if results.get('unique_error'):
+        print(f"Unique passwords found: ~{results['unique_passwords']:,} "
+              f"(±{results['unique_error']:.1%} standard error)")
+    else:
+        print(f"Unique passwords found: {results['unique_passwords']:,}")
     print(f"Password reuse rate: {results['total_passwords']/results['unique_passwords']:.1f}x")
     print("\nTop 10 Most Common Passwords:")
     print("-" * 40)
     print(f"{'Rank':<5} {'Password':<30} {'Count':<10} {'% of Total'}")
     print("-" * 60)
     
-    for i, (password, count) in enumerate(results['top_passwords'], 1):
+    count_errors = results.get('count_errors') or [0] * len(results['top_passwords'])
+    for i, ((password, count), error) in enumerate(zip(results['top_passwords'], count_errors), 1):
         percent = (count / results['total_passwords']) * 100
         # Truncate long passwords for display
         display_pw = (password[:27] + '...') if len(password) > 30 else password
-        print(f"{i:<5} {display_pw:<30} {count:<10} {percent:.2f}%")
+        display_count = f"{count - error}-{count}" if error else str(count)
+        print(f"{i:<5} {display_pw:<30} {display_count:<10} {percent:.2f}%")
     
+    if results.get('approximate'):
+        print("-" * 60)
+        print("Approximate counts: ranges give the lowest and highest possible count;")
+        print(f"no count is overestimated by more than {results['count_error']:,}.")
     print("=" * 60)
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python password_analyzer.py <password_file>", file=sys.stderr)
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Show the most common passwords in a password file.')
+    parser.add_argument('password_file', help='Path to the password file (one password per line)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Count in bounded memory with approximate results, for very large files')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET // (1024 * 1024),
+                        metavar='MB',
+                        help='Memory for the streaming summary in MB (default: 256)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes (default: 1)')
+    parser.add_argument('--temp-dir', metavar='DIR',
+                        help='Directory for the partitions of an exact --workers run '
+                             '(default: system temp)')
+    parser.add_argument('--composition', action='store_true',
+                        help='Also report length, character-class, entropy and policy statistics')
+    parser.add_argument('--masks', action='store_true',
+                        help='Also report the hashcat mask distribution')
+    parser.add_argument('--masks-file', metavar='HCMASK_FILE',
+                        help='Write every mask, most cracks per keyspace first, to a .hcmask file '
+                             '(implies --masks)')
+    parser.add_argument('--patterns', action='store_true',
+                        help='Also report keyboard walks, seasons, months and years')
+    parser.add_argument('--org-terms', metavar='TERMS_FILE',
+                        help='File of organization terms to look for, one per line '
+                             '(implies --patterns)')
     
-    password_file = sys.argv[1]
+    args = parser.parse_args()
+    password_file = args.password_file
     
     if not Path(password_file).is_file():
         print(f"Error: '{password_file}' is not a valid file.", file=sys.stderr)
         sys.exit(1)
+    if args.memory_budget <= 0:
+        print("Error: --memory-budget must be positive.", file=sys.stderr)
+        sys.exit(1)
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.", file=sys.stderr)
+        sys.exit(1)
     
     try:
-        results = analyze_passwords(password_file)
+        results = analyze_passwords(password_file, args.stream, args.memory_budget * 1024 * 1024,
+                                    args.workers, args.temp_dir)
         print_results(results, password_file)
+        if args.composition:
+            print_composition(analyze_composition(password_file))
+        if args.masks or args.masks_file:
+            mask_stats = analyze_masks(password_file, args.workers)
+            print_mask_report(mask_stats.results())
+            if args.masks_file:
+                count = mask_stats.write_hcmask(args.masks_file)
+                print(f"{count:,} masks written to: {args.masks_file}")
+        if args.patterns or args.org_terms:
+            org_terms = read_org_terms(args.org_terms) if args.org_terms else []
+            pattern_stats = analyze_patterns(password_file, org_terms, args.workers)
+            print_pattern_report(pattern_stats.results(), org_terms)
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
         sys.exit(1)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Password Composition Statistics
+
+Aggregate statistics for password audit reports:
+    - length histogram
+    - character-class composition (lower, upper, digit, special)
+    - Shannon entropy of each password, as a histogram of bits
+    - pass rates of common password policies
+
+The file is read in large binary blocks. With NumPy installed each block is analyzed as
+one offset-encoded byte array: every feature is computed with array operations over all
+passwords of the block at once. Without NumPy a per-password loop computes the same
+numbers, only slower.
+
+Lines are stripped of ASCII whitespace. Lengths count characters (UTF-8 continuation
+bytes are not counted) and non-ASCII characters count as special characters. Entropy
+is computed over a password's bytes, which is the same as per character for ASCII.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is not installed
+    np = None
+
+# Character classes as bits of a composition mask
+CLASS_LOWER = 1
+CLASS_UPPER = 2
+CLASS_DIGIT = 4
+CLASS_SPECIAL = 8
+CLASS_NAMES = ((CLASS_LOWER, 'lower'), (CLASS_UPPER, 'upper'), (CLASS_DIGIT, 'digit'),
+               (CLASS_SPECIAL, 'special'))
+
+# Lengths from this value up share the last histogram bucket
+MAX_LENGTH_BUCKET = 32
+
+# Width and number of the entropy histogram bins; the last bin is open-ended
+ENTROPY_BIN_BITS = 10
+ENTROPY_BINS = 10
+
+# (name, minimum length, minimum number of character classes)
+POLICIES = (
+    ('8+ characters', 8, 1),
+    ('8+ characters, 3 of 4 classes', 8, 3),
+    ('12+ characters', 12, 1),
+    ('14+ characters, 3 of 4 classes', 14, 3),
+)
+
+# Bytes read per block; NumPy needs about 40 bytes of working memory per input byte
+BLOCK_SIZE = 4 * 1024 * 1024
+
+WHITESPACE = b' \t\n\r\x0b\x0c'
+
+def _class_of(byte: int) -> int:
+    if 0x61 <= byte <= 0x7A:
+        return CLASS_LOWER
+    if 0x41 <= byte <= 0x5A:
+        return CLASS_UPPER
+    if 0x30 <= byte <= 0x39:
+        return CLASS_DIGIT
+    if 0x80 <= byte <= 0xBF:
+        # UTF-8 continuation byte: part of a character already classified by its lead byte
+        return 0
+    return CLASS_SPECIAL
+
+# Byte -> class bit, as a bytes.translate table
+CLASS_TABLE = bytes(_class_of(byte) for byte in range(256))
+CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+
+# Number of classes in each composition mask
+CLASS_COUNTS = [bin(mask).count('1') for mask in range(16)]
+
+def mask_label(mask: int) -> str:
+    """Readable name of a composition mask, e.g. 'lower+digit'."""
+    return '+'.join(name for bit, name in CLASS_NAMES if mask & bit) or 'none'
+
+class CompositionStats:
+    """Composition histograms accumulated over blocks of passwords."""
+
+    def __init__(self):
+        self.total = 0
+        self.lengths = [0] * (MAX_LENGTH_BUCKET + 1)
+        self.masks = [0] * 16
+        self.entropy_bins = [0] * ENTROPY_BINS
+        self.entropy_sum = 0.0
+        self.policy_passes = [0] * len(POLICIES)
+
+    def add_python(self, block: bytes) -> None:
+        """Add the passwords of a block of whole lines with a per-password loop."""
+        for line in block.split(b'\n'):
+            password = line.strip(WHITESPACE)
+            if not password:
+                continue
+            mask = 0
+            for bit in set(password.translate(CLASS_TABLE)):
+                mask |= bit
+            length = len(password.translate(None, CONTINUATION_BYTES))
+            size = len(password)
+            # Rounded so both implementations bin values on a bin edge alike
+            bits = round(size * math.log2(size) - sum(count * math.log2(count)
+                                                     for count in Counter(password).values()), 6)
+
+            self.total += 1
+            self.lengths[min(length, MAX_LENGTH_BUCKET)] += 1
+            self.masks[mask] += 1
+            self.entropy_bins[min(int(bits // ENTROPY_BIN_BITS), ENTROPY_BINS - 1)] += 1
+            self.entropy_sum += bits
+            classes = CLASS_COUNTS[mask]
+            for i, (_, min_length, min_classes) in enumerate(POLICIES):
+                if length >= min_length and classes >= min_classes:
+                    self.policy_passes[i] += 1
+
+    def add_numpy(self, block: bytes) -> None:
+        """Add the passwords of a block of whole lines with array operations."""
+        if not block.endswith(b'\n'):
+            block += b'\n'
+        data = np.frombuffer(block, dtype=np.uint8)
+        size = len(data)
+
+        # Each line is a segment ending with (and including) its newline, so none is empty
+        newlines = np.flatnonzero(data == 10).astype(np.int32)
+        starts = np.empty_like(newlines)
+        starts[0] = 0
+        starts[1:] = newlines[:-1] + 1
+        segment_of = np.repeat(np.arange(len(newlines), dtype=np.int32), newlines - starts + 1)
+
+        # First and last non-whitespace byte of each line
+        position = np.arange(size, dtype=np.int32)
+        text = ~_WHITESPACE_ARRAY[data]
+        first = np.minimum.reduceat(np.where(text, position, size), starts)
+        last = np.maximum.reduceat(np.where(text, position, -1), starts)
+        valid = last >= first
+        inside = (position >= first[segment_of]) & (position <= last[segment_of])
+
+        classes = np.where(inside, _CLASS_ARRAY[data], 0)
+        masks = np.bitwise_or.reduceat(classes, starts)[valid]
+        characters = (inside & ~_CONTINUATION_ARRAY[data]).astype(np.int32)
+        lengths = np.add.reduceat(characters, starts)[valid]
+
+        # Shannon entropy in bits: L*log2(L) - sum(c*log2(c)) over the byte counts c
+        keys = (segment_of[inside].astype(np.int64) << 8) | data[inside]
+        keys.sort()
+        group_starts = np.flatnonzero(np.diff(keys, prepend=-1))
+        counts = np.diff(np.append(group_starts, len(keys))).astype(np.float64)
+        weighted = np.bincount(keys[group_starts] >> 8, weights=counts * np.log2(counts),
+                               minlength=len(newlines))[valid]
+        byte_lengths = (last - first + 1)[valid].astype(np.float64)
+        bits = np.round(byte_lengths * np.log2(byte_lengths) - weighted, 6)
+
+        self.total += int(valid.sum())
+        self._add_counts(self.lengths, np.bincount(np.minimum(lengths, MAX_LENGTH_BUCKET),
+                                                   minlength=MAX_LENGTH_BUCKET + 1))
+        self._add_counts(self.masks, np.bincount(masks, minlength=16))
+        bins = np.minimum((bits // ENTROPY_BIN_BITS).astype(np.int64), ENTROPY_BINS - 1)
+        self._add_counts(self.entropy_bins, np.bincount(bins, minlength=ENTROPY_BINS))
+        self.entropy_sum += float(bits.sum())
+        class_counts = np.array(CLASS_COUNTS, dtype=np.int64)[masks]
+        for i, (_, min_length, min_classes) in enumerate(POLICIES):
+            self.policy_passes[i] += int(((lengths >= min_length) & (class_counts >= min_classes)).sum())
+
+    @staticmethod
+    def _add_counts(totals: List[int], counts) -> None:
+        for i, count in enumerate(counts.tolist()):
+            totals[i] += count
+
+    def results(self) -> Dict:
+        """
+        Return the statistics as a dictionary with 'total_passwords', 'length_histogram'
+        (length -> count; the last key stands for that length and longer),
+        'class_composition' (mask label -> count), 'class_count_histogram',
+        'entropy_histogram' ((low bits, high bits or None) -> count), 'mean_entropy'
+        and 'policy_pass_rates' (policy name -> fraction of passwords).
+        """
+        total = self.total or 1
+        class_counts: Dict[int, int] = {}
+        for mask, count in enumerate(self.masks):
+            if count:
+                class_counts[CLASS_COUNTS[mask]] = class_counts.get(CLASS_COUNTS[mask], 0) + count
+        entropy_histogram: Dict[Tuple[int, Optional[int]], int] = {}
+        for i, count in enumerate(self.entropy_bins):
+            high = (i + 1) * ENTROPY_BIN_BITS if i < ENTROPY_BINS - 1 else None
+            entropy_histogram[(i * ENTROPY_BIN_BITS, high)] = count
+        return {
+            'total_passwords': self.total,
+            'length_histogram': {length: count for length, count in enumerate(self.lengths) if count},
+            'class_composition': dict(sorted(((mask_label(mask), count)
+                                              for mask, count in enumerate(self.masks) if count),
+                                             key=lambda item: -item[1])),
+            'class_count_histogram': dict(sorted(class_counts.items())),
+            'entropy_histogram': entropy_histogram,
+            'mean_entropy': self.entropy_sum / total,
+            'policy_pass_rates': {name: passes / total
+                                  for (name, _, _), passes in zip(POLICIES, self.policy_passes)},
+        }
+
+if np is not None:
+    _CLASS_ARRAY = np.frombuffer(CLASS_TABLE, dtype=np.uint8)
+    _WHITESPACE_ARRAY = np.zeros(256, dtype=bool)
+    _WHITESPACE_ARRAY[list(WHITESPACE)] = True
+    _CONTINUATION_ARRAY = np.zeros(256, dtype=bool)
+    _CONTINUATION_ARRAY[0x80:0xC0] = True
+
+def analyze_composition(password_file: str, use_numpy: Optional[bool] = None) -> Dict:
+    """
+    Compute composition statistics of a password file.
+
+    Args:
+        password_file: Path to a file with one password per line
+        use_numpy: Force (True) or avoid (False) the NumPy implementation; by default it
+            is used when NumPy is installed
+
+    Returns:
+        The dictionary described in CompositionStats.results
+
+    Raises:
+        ImportError: If use_numpy is True and NumPy is not installed
+        ValueError: If the file contains no passwords
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ImportError("NumPy is not installed.")
+
+    stats = CompositionStats()
+    add_block = stats.add_numpy if use_numpy else stats.add_python
+    try:
+        with open(password_file, 'rb') as f:
+            pending = b''
+            while True:
+                data = f.read(BLOCK_SIZE)
+                if not data:
+                    break
+                data = pending + data
+                # Analyze whole lines only; the partial last line waits for the next block
+                cut = data.rfind(b'\n') + 1
+                pending = data[cut:]
+                if cut:
+                    add_block(data[:cut])
+            if pending:
+                add_block(pending)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File '{password_file}' not found.")
+
+    if not stats.total:
+        raise ValueError("No passwords found in the file.")
+    return stats.results()
+
+def print_composition(results: Dict) -> None:
+    """Print composition statistics in the layout of the password analysis report."""
+    total = results['total_passwords']
+
+    def row(label: str, count: int) -> None:
+        print(f"{label:<34} {count:>12,} {count / total:>8.2%}")
+
+    print("\nPassword Length:")
+    print("-" * 60)
+    for length, count in results['length_histogram'].items():
+        row(f"{length}+" if length == MAX_LENGTH_BUCKET else str(length), count)
+
+    print("\nCharacter Classes:")
+    print("-" * 60)
+    for label, count in results['class_composition'].items():
+        row(label, count)
+    for classes, count in results['class_count_histogram'].items():
+        row(f"{classes} class{'es' if classes != 1 else ''}", count)
+
+    print(f"\nShannon Entropy (mean {results['mean_entropy']:.1f} bits):")
+    print("-" * 60)
+    for (low, high), count in results['entropy_histogram'].items():
+        if count:
+            row(f"{low}-{high} bits" if high is not None else f"{low}+ bits", count)
+
+    print("\nPolicy Pass Rates:")
+    print("-" * 60)
+    for name, rate in results['policy_pass_rates'].items():
+        print(f"{name:<34} {rate:>21.2%}")
+    print("=" * 60)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Hashcat Mask Analysis
+
+Maps passwords to hashcat masks (Password1! -> ?u?l?l?l?l?l?l?l?d?s) and aggregates
+their distribution, statsgen style:
+    - the most common masks and the share of passwords each covers
+    - simple mask classes such as stringdigit or allstring
+    - the most efficient masks, ranked by cracks per keyspace, for targeted mask attacks
+
+Passwords are mapped with a single str.translate call over a precomputed table that
+turns each character into its mask letter. Non-ASCII characters become one ?b per UTF-8
+byte, as hashcat sees them. Masks of repeated passwords are memoized, and counts are
+aggregated one batch of passwords at a time, so corpora of any size can be streamed.
+"""
+
+import math
+import re
+import string
+import sys
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+# Hashcat built-in charsets by mask letter, as used for keyspace sizes
+CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': ' ' + string.punctuation,
+}
+CHARSET_SIZES = {'l': 26, 'u': 26, 'd': 10, 's': 33, 'b': 256}
+
+# Bounded cache of password -> compact mask; cleared when full
+MASK_MEMO_LIMIT = 1_000_000
+
+class _MaskTable(dict):
+    """str.translate table: ASCII characters map to their mask letter, others to 'b' per byte."""
+
+    def __missing__(self, codepoint: int) -> str:
+        letters = 'b' * len(chr(codepoint).encode('utf-8', errors='surrogatepass'))
+        self[codepoint] = letters
+        return letters
+
+MASK_TABLE = _MaskTable({ord(char): letter for letter, chars in CHARSETS.items() for char in chars})
+# ASCII control characters have no named charset either
+MASK_TABLE.update({codepoint: 'b' for codepoint in range(128) if codepoint not in MASK_TABLE})
+
+# Compact mask -> letter groups of simple masks: letters, digits and specials
+_SIMPLE_TABLE = str.maketrans({'l': 'a', 'u': 'a', 'd': 'd', 's': 's', 'b': 's'})
+_SIMPLE_NAMES = {'a': 'string', 'd': 'digit', 's': 'special'}
+_RUNS = re.compile(r'(.)\1+')
+
+def compact_mask(password: str) -> str:
+    """Return the mask letters of a password, e.g. 'ulllllllds' for Password1!."""
+    return password.translate(MASK_TABLE)
+
+def hashcat_mask(compact: str) -> str:
+    """Format compact mask letters as a hashcat mask, e.g. ?u?l?d."""
+    return ''.join('?' + letter for letter in compact)
+
+def keyspace(compact: str) -> int:
+    """Number of candidates a mask covers."""
+    return math.prod(CHARSET_SIZES[letter] for letter in compact)
+
+def format_keyspace(size: int) -> str:
+    """
+    Keyspace in scientific notation with three significant digits, e.g. 2.09e+12.
+
+    Keyspaces of long ?a or ?b masks can exceed the largest float; those are
+    formatted from the integer itself, with the digits truncated rather than rounded.
+    """
+    if size <= sys.float_info.max:
+        return f"{size:.3g}"
+    exponent = int(math.log10(size))
+    # log10 of a huge int can be off by one near a power of ten
+    if 10 ** exponent > size:
+        exponent -= 1
+    elif 10 ** (exponent + 1) <= size:
+        exponent += 1
+    leading = size // 10 ** (exponent - 2)
+    return f"{leading // 100}.{leading % 100:02d}e+{exponent}"
+
+def cracks_per_key(count: int, size: int) -> float:
+    """Cracks per candidate of a mask; 0 for a keyspace too large for a float."""
+    return count / size if size <= sys.float_info.max else 0.0
+
+def simple_mask(compact: str) -> str:
+    """
+    statsgen-style simple mask: runs of letters, digits and specials collapsed, e.g.
+    'stringdigit' for Password1, 'allstring' for password and 'complex' for more than
+    three runs.
+    """
+    runs = _RUNS.sub(r'\1', compact.translate(_SIMPLE_TABLE))
+    if len(runs) == 1:
+        return 'all' + _SIMPLE_NAMES[runs]
+    if len(runs) > 3:
+        return 'complex'
+    return ''.join(_SIMPLE_NAMES[group] for group in runs)
+
+class MaskStats:
+    """Mask counts aggregated over batches of passwords."""
+
+    def __init__(self):
+        self.total = 0
+        self.masks: Counter = Counter()
+        self._memo: Dict[str, str] = {}
+
+    def update(self, passwords: Iterable[str]) -> None:
+        """Count the masks of a batch of passwords."""
+        memo = self._memo
+        masks = self.masks
+        # Map each distinct password of the batch once and weight it by its count
+        for password, count in Counter(passwords).items():
+            mask = memo.get(password)
+            if mask is None:
+                mask = password.translate(MASK_TABLE)
+                if len(memo) >= MASK_MEMO_LIMIT:
+                    memo.clear()
+                memo[password] = mask
+            masks[mask] += count
+            self.total += count
+
+    def __getstate__(self):
+        # The memo is only a cache; leave it out when sending counts between processes
+        return {'total': self.total, 'masks': self.masks, '_memo': {}}
+
+    def merge(self, other: 'MaskStats') -> None:
+        """Fold another set of counts into this one."""
+        self.masks.update(other.masks)
+        self.total += other.total
+
+    def results(self, top: int = 10) -> Dict:
+        """
+        Return the mask distribution.
+
+        Returns:
+            Dictionary with 'total_passwords', 'distinct_masks', 'top_masks' and
+            'efficient_masks' as (hashcat mask, count, keyspace) tuples, and
+            'simple_masks' as (simple mask, count) tuples, all largest first
+        """
+        simple: Counter = Counter()
+        for mask, count in self.masks.items():
+            simple[simple_mask(mask)] += count
+        return {
+            'total_passwords': self.total,
+            'distinct_masks': len(self.masks),
+            'top_masks': [(hashcat_mask(mask), count, keyspace(mask))
+                          for mask, count in self.masks.most_common(top)],
+            'efficient_masks': [(hashcat_mask(mask), count, keyspace(mask))
+                                for mask, count in self.efficient_masks()[:top]],
+            'simple_masks': simple.most_common(top),
+        }
+
+    def efficient_masks(self) -> List[Tuple[str, int]]:
+        """All (compact mask, count) pairs, most cracks per keyspace first."""
+        return sorted(self.masks.items(),
+                      key=lambda item: (-cracks_per_key(item[1], keyspace(item[0])), item[0]))
+
+    def write_hcmask(self, output_file: str) -> int:
+        """
+        Write every mask, most efficient first, as a hashcat .hcmask file.
+
+        Returns:
+            Number of masks written
+        """
+        masks = self.efficient_masks()
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for mask, _ in masks:
+                f.write(hashcat_mask(mask) + '\n')
+        return len(masks)
+
+def print_mask_report(results: Dict) -> None:
+    """Print mask statistics in the layout of the password analysis report."""
+    total = results['total_passwords']
+    print(f"\nHashcat Masks ({results['distinct_masks']:,} distinct):")
+    print("-" * 72)
+    print(f"{'Mask':<34} {'Count':>10} {'% of Total':>10} {'Keyspace':>14}")
+    for mask, count, size in results['top_masks']:
+        display = (mask[:31] + '...') if len(mask) > 34 else mask
+        print(f"{display:<34} {count:>10,} {count / total:>10.2%} {format_keyspace(size):>14}")
+
+    print("\nSimple Masks:")
+    print("-" * 72)
+    for name, count in results['simple_masks']:
+        print(f"{name:<34} {count:>10,} {count / total:>10.2%}")
+
+    print("\nMost Efficient Masks (cracks per keyspace):")
+    print("-" * 72)
+    print(f"{'Mask':<34} {'Count':>10} {'Keyspace':>14} {'Cracks/key':>11}")
+    for mask, count, size in results['efficient_masks']:
+        display = (mask[:31] + '...') if len(mask) > 34 else mask
+        print(f"{display:<34} {count:>10,} {format_keyspace(size):>14} "
+              f"{cracks_per_key(count, size):>11.3g}")
+    print("=" * 72)
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Password Pattern Detection
+
+Finds well-known building blocks in passwords:
+    - keyboard walks such as qwerty, asdf, 1qaz2wsx or 4321
+    - season and month names
+    - years from 1950 to 2039
+    - organization terms supplied by the user (company name, products, city, ...)
+
+All patterns are compiled into one Aho-Corasick automaton, so every password is
+scanned once, one character at a time, however many patterns there are. The automaton
+is flattened into a full transition table over a small alphabet, and a single
+str.translate call per password lowercases it, folds leetspeak (P@55w0rd -> password)
+and maps each character to its alphabet index. Patterns are folded with the same table,
+so leet variants of every pattern match without being enumerated.
+
+Folding is many-to-one: 1, l, i, | and ! are one letter, as are 0 and o, so a digit
+pattern also matches its letter look-alikes (1990 matches l99O). Matches inside a longer
+match of the same category are dropped, so qwerty counts once as qwerty and not also as
+qwer and werty. Matches of different categories may overlap: with the org term arch,
+March2024 counts as both a month and the org term.
+"""
+
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+CATEGORY_KEYBOARD = 'keyboard walk'
+CATEGORY_SEASON = 'season'
+CATEGORY_MONTH = 'month'
+CATEGORY_YEAR = 'year'
+CATEGORY_ORG = 'org term'
+CATEGORIES = (CATEGORY_KEYBOARD, CATEGORY_SEASON, CATEGORY_MONTH, CATEGORY_YEAR, CATEGORY_ORG)
+
+# Keyboard rows and columns; walks are runs of at least KEYBOARD_WALK_MIN keys along them
+KEYBOARD_ROWS = ('1234567890', 'qwertyuiop', 'asdfghjkl', 'zxcvbnm')
+KEYBOARD_COLUMNS = ('1qaz', '2wsx', '3edc', '4rfv', '5tgb', '6yhn', '7ujm')
+KEYBOARD_WALK_MIN = 4
+# Common walks that zigzag between rows
+KEYBOARD_COMBOS = ('1qaz2wsx', '1qaz2wsx3edc', 'qazwsx', 'qazwsxedc', 'zaq12wsx', 'zaq1xsw2',
+                   '1q2w3e', '1q2w3e4r', '1q2w3e4r5t', 'q1w2e3r4', 'qweasd', 'qweasdzxc',
+                   'asdzxc', 'qwer1234', '1234qwer')
+
+SEASONS = ('spring', 'summer', 'autumn', 'fall', 'winter')
+MONTHS = ('january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+          'september', 'october', 'november', 'december')
+YEARS = range(1950, 2040)
+
+# Leetspeak substitutions and their letters; each group folds to one character
+LEET_GROUPS = {
+    'a': '4@',
+    'b': '8',
+    'e': '3',
+    'g': '9',
+    'i': '1l|!',
+    'o': '0',
+    's': '5$',
+    't': '7+',
+}
+LEET_TABLE = {char: letter for letter, chars in LEET_GROUPS.items() for char in chars}
+_FOLD_TABLE = str.maketrans(LEET_TABLE)
+
+# The same folding as a bytes.translate table, for ASCII-lowercasing and folding raw bytes
+FOLD_BYTES = bytes(ord(LEET_TABLE.get(chr(byte).lower(), chr(byte).lower())) if byte < 128 else byte
+                   for byte in range(256))
+
+# Bounded number of passwords kept per pattern as examples in reports
+EXAMPLES_PER_PATTERN = 3
+
+def fold(text: str) -> str:
+    """Lowercase a string and fold leetspeak, e.g. 'P@55w0rd' -> 'password'."""
+    return text.lower().translate(_FOLD_TABLE)
+
+def keyboard_walks() -> List[str]:
+    """All keyboard walks: row and column runs, both directions, and common zigzags."""
+    walks = []
+    for line in KEYBOARD_ROWS + KEYBOARD_COLUMNS:
+        for sequence in (line, line[::-1]):
+            for length in range(KEYBOARD_WALK_MIN, len(sequence) + 1):
+                for start in range(len(sequence) - length + 1):
+                    walks.append(sequence[start:start + length])
+    walks.extend(KEYBOARD_COMBOS)
+    return walks
+
+def default_patterns(org_terms: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """(category, pattern) pairs for the built-in patterns and the given org terms."""
+    patterns = [(CATEGORY_KEYBOARD, walk) for walk in keyboard_walks()]
+    patterns += [(CATEGORY_SEASON, season) for season in SEASONS]
+    patterns += [(CATEGORY_MONTH, month) for month in MONTHS]
+    patterns += [(CATEGORY_YEAR, str(year)) for year in YEARS]
+    patterns += [(CATEGORY_ORG, term.strip().lower()) for term in org_terms if term.strip()]
+    return patterns
+
+class _InputTable(dict):
+    """str.translate table: character -> its alphabet index after lowercasing and folding."""
+
+    def __init__(self, alphabet: Dict[str, int]):
+        super().__init__()
+        self.alphabet = alphabet
+
+    def __missing__(self, codepoint: int) -> str:
+        code = self.alphabet.get(fold(chr(codepoint)), 0)
+        self[codepoint] = chr(code)
+        return chr(code)
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over folded patterns.
+
+    Args:
+        patterns: (category, pattern) pairs; a pattern may appear in several categories
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        self.patterns: List[Tuple[str, str]] = []
+        seen = set()
+        for category, pattern in patterns:
+            key = (category, fold(pattern))
+            if key[1] and key not in seen:
+                seen.add(key)
+                self.patterns.append((category, pattern))
+        folded = [fold(pattern) for _, pattern in self.patterns]
+
+        # Alphabet index 0 stands for every character that appears in no pattern
+        alphabet: Dict[str, int] = {}
+        for text in folded:
+            for char in text:
+                alphabet.setdefault(char, len(alphabet) + 1)
+        if len(alphabet) >= 256:
+            raise ValueError("Patterns use too many distinct characters.")
+        self.table = _InputTable(alphabet)
+        width = len(alphabet) + 1
+
+        # Trie of the folded patterns
+        children: List[Dict[int, int]] = [{}]
+        depth = [0]
+        outputs: List[List[int]] = [[]]
+        for index, text in enumerate(folded):
+            state = 0
+            for char in text:
+                code = alphabet[char]
+                if code not in children[state]:
+                    children[state][code] = len(children)
+                    children.append({})
+                    depth.append(depth[state] + 1)
+                    outputs.append([])
+                state = children[state][code]
+            outputs[state].append(index)
+
+        # Breadth-first failure links, flattened into a full transition table
+        self.transitions: List[List[int]] = [[0] * width for _ in children]
+        fail = [0] * len(children)
+        # (length, pattern) of the patterns ending at each state, following the failure
+        # chain; of each category only the longest, as shorter ones lie inside it
+        self.matches: List[Tuple[Tuple[int, int], ...]] = [()] * len(children)
+        queue = []
+        for code, child in children[0].items():
+            self.transitions[0][code] = child
+            queue.append(child)
+        for state in queue:
+            row = self.transitions[state]
+            fallback = self.transitions[fail[state]]
+            for code in range(width):
+                row[code] = fallback[code]
+            for code, child in children[state].items():
+                row[code] = child
+                fail[child] = fallback[code]
+                queue.append(child)
+            own = [(depth[state], index) for index in outputs[state]]
+            categories = {self.patterns[index][0] for index in outputs[state]}
+            self.matches[state] = tuple(own) + tuple(
+                match for match in self.matches[fail[state]]
+                if self.patterns[match[1]][0] not in categories)
+
+    def find(self, password: str) -> Set[int]:
+        """
+        Indexes into self.patterns of the patterns found in a password, dropping matches
+        inside a longer match of the same category.
+        """
+        transitions = self.transitions
+        matches = self.matches
+        state = 0
+        found = []
+        for position, code in enumerate(password.translate(self.table).encode('latin-1')):
+            state = transitions[state][code]
+            if matches[state]:
+                for length, index in matches[state]:
+                    found.append((position - length + 1, position + 1, index))
+        if len(found) < 2:
+            return {index for _, _, index in found}
+
+        patterns = self.patterns
+        result = set()
+        for start, end, index in found:
+            category = patterns[index][0]
+            if not any(other_start <= start and end <= other_end
+                       and (other_start, other_end) != (start, end)
+                       and patterns[other][0] == category
+                       for other_start, other_end, other in found):
+                result.add(index)
+        return result
+
+class PatternStats:
+    """Pattern counts aggregated over batches of passwords."""
+
+    def __init__(self, matcher: PatternMatcher):
+        self.matcher = matcher
+        self.total = 0
+        self.covered = 0
+        self.categories: Counter = Counter()
+        self.patterns: Counter = Counter()
+        self.examples: Dict[int, List[str]] = {}
+
+    def update(self, passwords: Iterable[str]) -> None:
+        """Scan a batch of passwords."""
+        find = self.matcher.find
+        patterns = self.matcher.patterns
+        # Scan each distinct password of the batch once and weight it by its count
+        for password, count in Counter(passwords).items():
+            self.total += count
+            found = find(password)
+            if not found:
+                continue
+            self.covered += count
+            for category in {patterns[index][0] for index in found}:
+                self.categories[category] += count
+            for index in found:
+                self.patterns[index] += count
+                examples = self.examples.setdefault(index, [])
+                if len(examples) < EXAMPLES_PER_PATTERN:
+                    examples.append(password)
+
+    def __getstate__(self):
+        # Workers build their own matcher; only the counts travel between processes
+        state = self.__dict__.copy()
+        state['matcher'] = None
+        return state
+
+    def merge(self, other: 'PatternStats') -> None:
+        """Fold counts of the same patterns into this one."""
+        self.total += other.total
+        self.covered += other.covered
+        self.categories.update(other.categories)
+        self.patterns.update(other.patterns)
+        for index, examples in other.examples.items():
+            mine = self.examples.setdefault(index, [])
+            mine.extend(examples[:EXAMPLES_PER_PATTERN - len(mine)])
+
+    def results(self, top: int = 10) -> Dict:
+        """
+        Return the pattern statistics.
+
+        Returns:
+            Dictionary with 'total_passwords', 'covered_passwords' (passwords with at
+            least one pattern), 'category_counts' (category -> passwords, for every
+            category in CATEGORIES) and 'top_patterns' (category -> list of
+            (pattern, count, examples) tuples, most common first)
+        """
+        patterns = self.matcher.patterns
+        top_patterns: Dict[str, List[Tuple[str, int, List[str]]]] = {category: [] for category in CATEGORIES}
+        ranked = sorted(self.patterns.items(), key=lambda item: (-item[1], item[0]))
+        for index, count in ranked:
+            category, pattern = patterns[index]
+            entries = top_patterns.setdefault(category, [])
+            if len(entries) < top:
+                entries.append((pattern, count, self.examples.get(index, [])))
+        return {
+            'total_passwords': self.total,
+            'covered_passwords': self.covered,
+            'category_counts': {category: self.categories.get(category, 0)
+                                for category in top_patterns},
+            'top_patterns': top_patterns,
+        }
+
+def read_org_terms(terms_file: str) -> List[str]:
+    """Read organization terms, one per line; blank lines and # comments are skipped."""
+    try:
+        with open(terms_file, 'r', encoding='utf-8', errors='ignore') as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File '{terms_file}' not found.")
+
+def print_pattern_report(results: Dict, org_terms: Sequence[str] = ()) -> None:
+    """Print pattern statistics in the layout of the password analysis report."""
+    total = results['total_passwords']
+    print("\nPassword Patterns:")
+    print("-" * 60)
+    print(f"{'Any pattern':<34} {results['covered_passwords']:>12,} "
+          f"{results['covered_passwords'] / total:>8.2%}")
+    for category, count in results['category_counts'].items():
+        if category == CATEGORY_ORG and not org_terms:
+            continue
+        print(f"{category:<34} {count:>12,} {count / total:>8.2%}")
+
+    for category, entries in results['top_patterns'].items():
+        if not entries:
+            continue
+        print(f"\nTop {category.title()} Patterns:")
+        print("-" * 60)
+        for pattern, count, examples in entries:
+            sample = ', '.join(examples)
+            sample = (sample[:27] + '...') if len(sample) > 30 else sample
+            print(f"{pattern:<20} {count:>10,} {count / total:>8.2%}  {sample}")
+    print("=" * 60)
@@ -5,14 +5,40 @@ NTDS File Processor
 This script processes an NTDS file and removes any lines containing disabled accounts.
 Disabled accounts are identified by the account status flag in the NTDS dump.
 
+Accounts can also be routed to several outputs in a single scan, each selected by a
+combination of predicates (active, disabled, machine, empty-hash, privileged, RID
+ranges and domains).
+
 Usage:
-    python process_ntds.py -w <input_ntds_file> -o <output_file>
+    python process_ntds.py -w <input_ntds_file> -o <output_file> [--workers N]
+    python process_ntds.py -w <input_ntds_file> --route PREDICATES=PATH [--route ...]
+    python process_ntds.py -w <input_ntds_file> --split-dir DIR
 """
 
 import argparse
+import mmap
+import os
 import re
+import shutil
 import sys
+import tempfile
+import time
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from credforge.fileutils import pool_context, split_count, split_line_ranges
+from credforge.ntds_cache import (FLAG_DISABLED, FLAG_RAW, CacheRow, NTDSCache, is_ntds_cache,
+                                  row_to_line)
+
+# Buffer size for reading the dump and writing the filtered output
+IO_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Approximate number of bytes of lines filtered per batch
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Records per batch when reading an NTDS cache
+CACHE_BATCH_RECORDS = 65536
 
 def is_account_disabled(ntds_line):
     """
@@ -26,48 +52,344 @@ def is_account_disabled(ntds_line):
         return status == 'disabled'
     return False
 
-def process_ntds_file(input_file, output_file):
-    """Process the NTDS file and write non-disabled accounts to the output file."""
+def _is_disabled_record(line: bytes) -> bool:
+    """Byte-string version of is_account_disabled for a stripped NTDS line."""
+    parts = line.split(b':', 5)
+    return len(parts) >= 5 and parts[4].lower() == b'disabled'
+
+# NTLM hash of the empty password
+EMPTY_NT_HASH = '31d6cfe0d16ae931b73c59d7e0c089c0'
+
+# Well-known RIDs of privileged accounts: the built-in Administrator and krbtgt. Privileged
+# groups such as Domain Admins (512) have RIDs too, but groups have no rows in a hash dump.
+PRIVILEGED_RIDS = frozenset({500, 502})
+
+# Outputs written by --split-dir: (predicates, file name)
+STANDARD_ROUTES = [
+    ('active', 'active.ntds'),
+    ('disabled', 'disabled.ntds'),
+    ('machine', 'machine.ntds'),
+    ('empty-hash', 'empty_hash.ntds'),
+    ('privileged', 'privileged.ntds'),
+]
+
+class NTDSRecord(NamedTuple):
+    """One account parsed from an NTDS dump line (username:rid:lmhash:nthash:...)."""
+    account: str
+    domain: str
+    username: str
+    rid: Optional[int]
+    lm_hash: str
+    nt_hash: str
+    disabled: bool
+
+def parse_ntds_line(line: str) -> Optional[NTDSRecord]:
+    """
+    Parse an NTDS dump line into an NTDSRecord.
+    
+    Missing fields are left empty (and the RID None) rather than rejected, so every
+    non-blank line produces a record.
+    
+    Returns:
+        The parsed record, or None for a blank line
+    """
+    line = line.strip()
+    if not line:
+        return None
+    
+    parts = line.split(':', 5)
+    account = parts[0]
+    domain, _, username = account.rpartition('\\')
+    rid_field = parts[1] if len(parts) > 1 else ''
+    return NTDSRecord(
+        account=account,
+        domain=domain,
+        username=username,
+        rid=int(rid_field) if _is_decimal(rid_field) else None,
+        lm_hash=parts[2].lower() if len(parts) > 2 else '',
+        nt_hash=parts[3].lower() if len(parts) > 3 else '',
+        disabled=len(parts) >= 5 and parts[4].lower() == 'disabled',
+    )
+
+def _is_decimal(text: str) -> bool:
+    """True if text is a run of ASCII digits; str.isdigit() alone accepts e.g. '²'."""
+    return text.isascii() and text.isdigit()
+
+# Predicates selected by name in a route
+PREDICATES: Dict[str, Callable[[NTDSRecord], bool]] = {
+    'active': lambda record: not record.disabled,
+    'disabled': lambda record: record.disabled,
+    'machine': lambda record: record.username.endswith('$'),
+    'empty-hash': lambda record: record.nt_hash == EMPTY_NT_HASH,
+    'privileged': lambda record: record.rid in PRIVILEGED_RIDS,
+}
+
+def _compile_term(term: str) -> Callable[[NTDSRecord], bool]:
+    """Compile one predicate term: a name, rid:LO-HI, domain:NAME[|NAME], optionally negated with !."""
+    if term.startswith('!'):
+        predicate = _compile_term(term[1:])
+        return lambda record: not predicate(record)
+    
+    name, _, argument = term.partition(':')
+    if name == 'rid' and argument:
+        low, _, high = argument.partition('-')
+        if not _is_decimal(low) or (high and not _is_decimal(high)):
+            raise ValueError(f"Invalid RID range '{argument}' (expected N or LOW-HIGH).")
+        low_rid = int(low)
+        high_rid = int(high) if high else low_rid
+        return lambda record: record.rid is not None and low_rid <= record.rid <= high_rid
+    if name == 'domain' and argument:
+        domains = frozenset(domain.lower() for domain in argument.split('|'))
+        return lambda record: record.domain.lower() in domains
+    if argument or name not in PREDICATES:
+        raise ValueError(f"Unknown predicate '{term}'. Use one of: "
+                         f"{', '.join(PREDICATES)}, rid:LOW-HIGH, domain:NAME")
+    return PREDICATES[name]
+
+def compile_predicates(spec: str) -> Callable[[NTDSRecord], bool]:
+    """
+    Compile a comma-separated list of predicate terms into one function matching records
+    that satisfy all of them, e.g. 'active,!machine,rid:1000-1999'.
+    
+    Raises:
+        ValueError: If a term is not a known predicate
+    """
+    terms = [term.strip() for term in spec.split(',') if term.strip()]
+    if not terms:
+        raise ValueError("A route needs at least one predicate.")
+    predicates = [_compile_term(term) for term in terms]
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda record: all(predicate(record) for predicate in predicates)
+
+def parse_route(route: str) -> Tuple[str, str]:
+    """Split a PREDICATES=PATH route argument into its (predicates, path) parts."""
+    spec, sep, path = route.partition('=')
+    if not sep or not spec.strip() or not path:
+        raise ValueError(f"Invalid route '{route}' (expected PREDICATES=PATH).")
+    return spec.strip(), path
+
+def _format_eta(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+def _print_progress(lines: int, done: int, total: int, start_time: float,
+                    unit: str = 'bytes') -> None:
+    """Print accounts processed, percentage of the input consumed and the estimated time left."""
+    elapsed = time.monotonic() - start_time
+    if done and elapsed:
+        eta = _format_eta((total - done) * elapsed / done)
+    else:
+        eta = 'unknown'
+    print(f"Processed {lines:,} accounts ({done / total:.0%} of {total:,} {unit}, ETA {eta})...")
+
+def _read_batches(input_file: str, from_cache: bool) -> Iterator[Tuple[list, int, int]]:
+    """
+    Yield (batch, input consumed, input size) for a text dump or an NTDS cache.
+    
+    Text dumps are read in large binary blocks and yield raw lines, with progress in
+    bytes; caches yield rows (see NTDSCache.iter_rows), with progress in records.
+    """
+    if from_cache:
+        cache = NTDSCache.open(input_file)
+        try:
+            total = len(cache)
+            for start in range(0, total, CACHE_BATCH_RECORDS):
+                end = min(start + CACHE_BATCH_RECORDS, total)
+                yield list(cache.iter_rows(start, end)), end, total
+        finally:
+            cache.close()
+        return
+    
+    total = os.stat(input_file).st_size
+    with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as infile:
+        while True:
+            lines = infile.readlines(READ_BLOCK_SIZE)
+            if not lines:
+                break
+            yield lines, infile.tell(), total
+
+def _describe_input(input_file: str, from_cache: bool) -> Tuple[int, str]:
+    """Print the input size; returns (size, unit) for progress reporting."""
+    if from_cache:
+        cache = NTDSCache.open(input_file)
+        size = len(cache)
+        cache.close()
+        print(f"Input: NTDS cache with {size:,} records")
+        return size, 'records'
+    size = os.stat(input_file).st_size
+    print(f"Input size: {size:,} bytes")
+    return size, 'bytes'
+
+def _filter_text_batch(lines: List[bytes]) -> Tuple[List[bytes], int]:
+    """Return the active lines of a batch of dump lines and the number of disabled ones."""
+    active = []
+    disabled_lines = 0
+    for line in lines:
+        # Skip empty lines
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Check if account is disabled
+        if _is_disabled_record(line):
+            disabled_lines += 1
+            continue
+        
+        active.append(line)
+    return active, disabled_lines
+
+def _filter_cache_batch(rows: List[CacheRow]) -> Tuple[List[bytes], int]:
+    """Cache version of _filter_text_batch, using the stored status flags."""
+    active = []
+    disabled_lines = 0
+    for row in rows:
+        flags = row[0]
+        if flags & FLAG_DISABLED:
+            disabled_lines += 1
+        elif flags & FLAG_RAW and not row[1]:
+            continue  # blank line
+        else:
+            active.append(row_to_line(row))
+    return active, disabled_lines
+
+def _filter_serial(input_file: str, from_cache: bool) -> Iterator[Tuple[int, int, bytes, int, int]]:
+    """Yield (lines, disabled lines, active output, input consumed, input size) per batch."""
+    filter_batch = _filter_cache_batch if from_cache else _filter_text_batch
+    for batch, done, total in _read_batches(input_file, from_cache):
+        active, disabled = filter_batch(batch)
+        yield len(batch), disabled, b'\n'.join(active) + b'\n' if active else b'', done, total
+
+def _split_lines(data: bytes) -> List[bytes]:
+    """Split a newline-aligned chunk into lines the way readlines() would."""
+    lines = data.split(b'\n')
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+def _filter_range(task: Tuple[str, int, int, bool, str]) -> Tuple[int, int, str]:
+    """
+    Filter one chunk of the input inside a worker process.
+    
+    The chunk is a newline-aligned byte range of a memory-mapped text dump, or a
+    range of record numbers of an NTDS cache. Active lines are written to a temporary
+    segment file so the parent only has to concatenate segments in order.
+    
+    Returns:
+        Tuple of (lines, disabled lines, segment file path)
+    """
+    input_file, start, end, from_cache, segment_file = task
+    if from_cache:
+        cache = NTDSCache.open(input_file)
+        try:
+            batch = list(cache.iter_rows(start, end))
+        finally:
+            cache.close()
+        active, disabled = _filter_cache_batch(batch)
+    else:
+        with open(input_file, 'rb') as f, \
+             mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            batch = _split_lines(mm[start:end])
+        active, disabled = _filter_text_batch(batch)
+    
+    with open(segment_file, 'wb') as f:
+        if active:
+            f.write(b'\n'.join(active) + b'\n')
+    return len(batch), disabled, segment_file
+
+def _filter_parallel(input_file: str, from_cache: bool, workers: int,
+                     segment_dir: str) -> Iterator[Tuple[int, int, str, int, int]]:
+    """
+    Filter the input in a process pool.
+    
+    Yields the same items as _filter_serial, in input order, except that the active
+    output is the path of a segment file to append and delete.
+    """
+    if from_cache:
+        cache = NTDSCache.open(input_file)
+        total = len(cache)
+        cache.close()
+        ranges = split_count(total, workers)
+    else:
+        total = os.stat(input_file).st_size
+        ranges = split_line_ranges(input_file, workers)
+    
+    tasks = [(input_file, start, end, from_cache, os.path.join(segment_dir, f"{i:06d}.seg"))
+             for i, (start, end) in enumerate(ranges)]
+    with pool_context().Pool(workers) as pool:
+        # imap returns chunks in submission order, which is input order
+        for (start, end), (lines, disabled, segment_file) in zip(ranges, pool.imap(_filter_range, tasks)):
+            yield lines, disabled, segment_file, end, total
+
+def process_ntds_file(input_file, output_file, workers=1):
+    """
+    Process the NTDS file and write non-disabled accounts to the output file.
+    
+    The input is read once in large binary blocks. Progress and the estimated time
+    left are based on the bytes consumed so far versus the file size, so no
+    separate pass is needed to count lines first.
+    
+    The input may also be an NTDS cache written by 'ntds import'; the output and
+    statistics are the same as for the dump it was imported from.
+    
+    With workers > 1 the input is memory-mapped, cut into newline-aligned chunks and
+    filtered in a process pool. Each chunk is written to a temporary segment next to
+    the output file and the segments are concatenated in input order, so the output
+    and statistics are identical to a serial run.
+    """
     total_lines = 0
     disabled_lines = 0
     
     try:
-        # Count total lines for progress reporting
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-            total_lines = sum(1 for _ in f)
+        from_cache = is_ntds_cache(input_file)
         
-        # Process the file
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as infile, \
-             open(output_file, 'w', encoding='utf-8') as outfile:
-            
-            print(f"Processing {input_file}...")
-            print(f"Total accounts to process: {total_lines:,}")
-            print("Filtering out disabled accounts...")
+        print(f"Processing {input_file}...")
+        total_size, unit = _describe_input(input_file, from_cache)
+        
+        with open(output_file, 'wb', buffering=IO_BUFFER_SIZE) as outfile, ExitStack() as stack:
+            if workers > 1:
+                print(f"Filtering out disabled accounts with {workers} workers...")
+                output_dir = os.path.dirname(os.path.abspath(output_file))
+                segment_dir = stack.enter_context(
+                    tempfile.TemporaryDirectory(dir=output_dir, prefix='.ntds_segments_'))
+                chunks = _filter_parallel(input_file, from_cache, workers, segment_dir)
+            else:
+                print("Filtering out disabled accounts...")
+                chunks = _filter_serial(input_file, from_cache)
             
-            for i, line in enumerate(infile, 1):
-                # Show progress every 10,000 lines
-                if i % 10000 == 0:
-                    print(f"Processed {i:,} of {total_lines:,} accounts...")
-                
-                # Skip empty lines
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Check if account is disabled
-                if is_account_disabled(line):
-                    disabled_lines += 1
-                    continue
+            start_time = time.monotonic()
+            reported_percent = 0
+            for lines, disabled, active, done, total in chunks:
+                total_lines += lines
+                disabled_lines += disabled
                 
                 # Write non-disabled accounts to output
-                outfile.write(line + '\n')
+                if isinstance(active, bytes):
+                    outfile.write(active)
+                else:
+                    with open(active, 'rb') as segment:
+                        shutil.copyfileobj(segment, outfile, IO_BUFFER_SIZE)
+                    os.remove(active)
+                
+                # Report progress at most once per percent of the input
+                percent = done * 100 // total
+                if percent > reported_percent and done < total:
+                    reported_percent = percent
+                    _print_progress(total_lines, done, total, start_time, unit)
         
         # Print summary
         active_lines = total_lines - disabled_lines
+        elapsed = time.monotonic() - start_time
         print("\nProcessing complete!")
         print(f"Total accounts processed: {total_lines:,}")
-        print(f"Disabled accounts found: {disabled_lines:,} ({disabled_lines/total_lines:.1%})")
-        print(f"Active accounts written to {output_file}: {active_lines:,} ({active_lines/total_lines:.1%})")
+        if total_lines:
+            print(f"Disabled accounts found: {disabled_lines:,} ({disabled_lines/total_lines:.1%})")
+            print(f"Active accounts written to {output_file}: {active_lines:,} ({active_lines/total_lines:.1%})")
+        else:
+            print("Disabled accounts found: 0")
+            print(f"Active accounts written to {output_file}: 0")
+        print(f"Read {total_size:,} {unit} in {elapsed:.1f}s")
         
     except FileNotFoundError:
         print(f"Error: Input file '{input_file}' not found.", file=sys.stderr)
@@ -79,30 +401,164 @@ def process_ntds_file(input_file, output_file):
         print(f"An error occurred: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
+def _text_batch_records(lines: List[bytes]) -> Iterator[Tuple[bytes, NTDSRecord]]:
+    """Yield (stripped line, record) for the non-blank lines of a batch of dump lines."""
+    for line in lines:
+        line = line.strip()
+        record = parse_ntds_line(line.decode('utf-8', errors='ignore'))
+        if record is not None:
+            yield line, record
+
+def _cache_batch_records(rows: List[CacheRow]) -> Iterator[Tuple[bytes, NTDSRecord]]:
+    """Cache version of _text_batch_records, building records from the columns."""
+    for row in rows:
+        flags, account, rid, lm, nt, _ = row
+        if flags & FLAG_RAW:
+            record = parse_ntds_line(account.decode('utf-8', errors='ignore'))
+            if record is not None:
+                yield account, record
+            continue
+        
+        name = account.decode('utf-8', errors='ignore')
+        domain, _, username = name.rpartition('\\')
+        yield row_to_line(row), NTDSRecord(name, domain, username, rid, lm.hex(), nt.hex(),
+                                           bool(flags & FLAG_DISABLED))
+
+def route_ntds_file(input_file: str, routes: Sequence[Tuple[str, str]]) -> Dict[str, int]:
+    """
+    Route the accounts of an NTDS file to several outputs in a single scan.
+    
+    Each route is a (predicates, output path) pair; see compile_predicates() for the
+    predicate syntax. All routes are compiled once, every line is parsed once, and a
+    line is written to every output whose predicates it satisfies, in input order.
+    The input may be a text dump or an NTDS cache.
+    
+    Args:
+        input_file: Path to the NTDS dump or cache
+        routes: (predicates, output path) pairs
+        
+    Returns:
+        Number of accounts written to each output path
+        
+    Raises:
+        ValueError: If a route is invalid or two routes share an output path
+    """
+    compiled = [(path, compile_predicates(spec)) for spec, path in routes]
+    paths = [path for path, _ in compiled]
+    if len(set(paths)) != len(paths):
+        raise ValueError("Each route needs its own output path.")
+    
+    from_cache = is_ntds_cache(input_file)
+    batch_records = _cache_batch_records if from_cache else _text_batch_records
+    total_lines = 0
+    counts = [0] * len(compiled)
+    outputs = []
+    try:
+        for path in paths:
+            outputs.append(open(path, 'wb', buffering=IO_BUFFER_SIZE))
+        
+        print(f"Processing {input_file}...")
+        total_size, unit = _describe_input(input_file, from_cache)
+        print(f"Routing accounts to {len(compiled)} outputs...")
+        
+        start_time = time.monotonic()
+        reported_percent = 0
+        for batch, done, total in _read_batches(input_file, from_cache):
+            total_lines += len(batch)
+            
+            selected: List[List[bytes]] = [[] for _ in compiled]
+            for line, record in batch_records(batch):
+                for lines, (_, predicate) in zip(selected, compiled):
+                    if predicate(record):
+                        lines.append(line)
+            
+            for i, lines in enumerate(selected):
+                if lines:
+                    outputs[i].write(b'\n'.join(lines) + b'\n')
+                    counts[i] += len(lines)
+            
+            percent = done * 100 // total
+            if percent > reported_percent and done < total:
+                reported_percent = percent
+                _print_progress(total_lines, done, total, start_time, unit)
+    finally:
+        for output in outputs:
+            output.close()
+    
+    elapsed = time.monotonic() - start_time
+    print("\nProcessing complete!")
+    print(f"Total accounts processed: {total_lines:,}")
+    for (spec, path), count in zip(routes, counts):
+        share = f" ({count/total_lines:.1%})" if total_lines else ''
+        print(f"  {spec} -> {path}: {count:,}{share}")
+    print(f"Read {total_size:,} {unit} in {elapsed:.1f}s")
+    return dict(zip(paths, counts))
+
 def main():
     parser = argparse.ArgumentParser(description='Process NTDS file to remove disabled accounts.')
     parser.add_argument('-w', '--ntds-file', required=True, 
                         help='Path to the NTDS file to process')
-    parser.add_argument('-o', '--output', required=True,
+    parser.add_argument('-o', '--output',
                         help='Path to the output file for active accounts')
+    parser.add_argument('--route', action='append', default=[], metavar='PREDICATES=PATH',
+                        help="Also write accounts matching all comma-separated predicates to PATH "
+                             "(active, disabled, machine, empty-hash, privileged, rid:LOW-HIGH, "
+                             "domain:NAME[|NAME], each optionally negated with '!'); repeatable")
+    parser.add_argument('--split-dir', metavar='DIR',
+                        help='Write active, disabled, machine, empty-hash and privileged accounts '
+                             'to separate files in DIR')
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help='Number of processes filtering the input (default: 1)')
     
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    
+    routes = []
+    try:
+        routes.extend(parse_route(route) for route in args.route)
+        for spec, _ in routes:
+            compile_predicates(spec)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.split_dir:
+        os.makedirs(args.split_dir, exist_ok=True)
+        routes.extend((spec, os.path.join(args.split_dir, name)) for spec, name in STANDARD_ROUTES)
+    if not args.output and not routes:
+        parser.error('one of -o/--output, --route or --split-dir is required')
+    if routes and args.workers > 1:
+        parser.error('--workers applies to the -o filter and cannot be combined with --route '
+                     'or --split-dir')
     
     # Validate input file exists
     if not Path(args.ntds_file).is_file():
         print(f"Error: Input file '{args.ntds_file}' does not exist.", file=sys.stderr)
         sys.exit(1)
     
-    # Check if output file already exists
-    if Path(args.output).exists():
-        print(f"Warning: Output file '{args.output}' already exists and will be overwritten.")
+    # Check if any output file already exists
+    output_paths = ([args.output] if args.output else []) + [path for _, path in routes]
+    existing = [path for path in output_paths if Path(path).exists()]
+    if existing:
+        print(f"Warning: Output file(s) {', '.join(repr(p) for p in existing)} already exist "
+              "and will be overwritten.")
         response = input("Continue? (y/n): ").strip().lower()
         if response != 'y':
             print("Operation cancelled by user.")
             sys.exit(0)
     
-    # Process the NTDS file
-    process_ntds_file(args.ntds_file, args.output)
+    if not routes:
+        # Process the NTDS file
+        process_ntds_file(args.ntds_file, args.output, workers=args.workers)
+        return
+    
+    # Route every output, including -o, in a single scan
+    if args.output:
+        routes.insert(0, ('active', args.output))
+    try:
+        route_ntds_file(args.ntds_file, routes)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
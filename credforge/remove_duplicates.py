@@ -7,29 +7,99 @@ order of first occurrences. It provides detailed statistics about duplicates fou
 allows for both in-place modification and output to a new file.
 
 Usage:
-    python remove_duplicates.py <input_file> [output_file]
+    python remove_duplicates.py <input_file> [output_file] [--confirm]
+                                [--fingerprints {64,128}] [--verify]
+                                [--max-memory MB] [--temp-dir DIR] [--unordered]
+                                [--workers N]
     
-If output_file is not provided, the input file will be modified in-place after
-user confirmation.
+If output_file is not provided, the input file will be modified in-place. The file is
+read once: the deduplicated output is written and the duplicate statistics are gathered
+in the same pass, then shown. With --confirm the statistics are gathered first and
+nothing is changed until the user agrees, at the cost of a second pass.
+
+Lines are compared as raw bytes with surrounding ASCII whitespace stripped, so a line
+ending in \r\n repeats the same line ending in \n. Lines end at \n only; a lone \r
+(old Mac line endings) does not split a line. Bytes that are not valid UTF-8 are
+compared as they are, and Unicode whitespace such as a no-break space is part of the
+line. The kept lines are written byte for byte, line endings included.
+
+--fingerprints keeps a 64- or 128-bit fingerprint of each distinct line instead of the
+line itself (see fingerprint_set.py), for wordlists whose distinct lines do not fit in
+memory as Python strings. --verify makes that mode exact.
+
+--max-memory sets a memory budget. If the distinct lines are estimated not to fit it,
+the file is deduplicated externally: lines are hash-partitioned into runs in a temp
+directory with bulk binary writes, each run is deduplicated in memory on its own, and the
+byte offsets of the first occurrences are k-way merged to write the kept lines in their
+original order. --unordered skips that last step and writes each run's lines in turn.
+
+--workers N shards the lines by hash over N worker processes through the same runs:
+each worker deduplicates its own shards, which never share a line, and the input is
+spilled and re-read in parallel byte ranges.
 
 Features:
     - Preserves original line order
     - Shows detailed duplicate statistics
-    - Progress reporting for large files
+    - Progress reporting for large files, based on bytes read
     - Safe in-place modification with backup
     - Handles various text encodings
 """
 
+import argparse
+import heapq
+import io
+import math
 import os
+import shutil
 import sys
+import tempfile
+import time
+import zlib
+from array import array
 from collections import defaultdict
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Dict, List, Tuple, Set
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Set
+
+from credforge.fileutils import pool_context, split_line_ranges
+from credforge.fingerprint_set import FingerprintSet
+
+# Bytes of lines read per block
+READ_BLOCK_SIZE = 4 * 1024 * 1024
+
+IO_BUFFER_SIZE = 1024 * 1024
+
+# Assumed average bytes per distinct line when presizing a fingerprint table from the
+# file size; the table grows if there are more
+ESTIMATED_LINE_BYTES = 16
+
+# Most distinct lines a fingerprint table is presized for (12 MB of slots at 64 bits).
+# A file's size bounds its lines, not its distinct lines, so larger tables are reached
+# by doubling and memory follows the number of distinct lines
+MAX_PRESIZE_LINES = 1 << 20
+
+# Estimated peak memory of the exact in-memory mode per byte of input, for wordlists of
+# short lines (each distinct line costs about 75 bytes on top of its length), used to
+# pick the external mode and size its partitions
+SET_BYTES_PER_INPUT_BYTE = 8
+
+# Hash shards at most; the number of open files does not depend on it
+MAX_PARTITIONS = 256
+
+# Kept offsets read from each run at a time during the final merge
+MERGE_READ_ITEMS = 64 * 1024
+
+# Duplicated lines reported, with the line numbers of their first few repeats
+DUPLICATE_SAMPLES = 5
+SAMPLE_LINE_NUMBERS = 3
 
 def find_duplicates(input_file: str) -> Tuple[Dict[str, List[int]], int]:
     """
     Find and return duplicate lines in the input file along with their line numbers.
     
+    Lines are compared the way deduplicate() compares them; the returned lines are
+    decoded as UTF-8 for display, with invalid bytes replaced.
+    
     Args:
         input_file: Path to the input file to analyze
         
@@ -45,12 +115,12 @@ def find_duplicates(input_file: str) -> Tuple[Dict[str, List[int]], int]:
     if not Path(input_file).is_file():
         raise FileNotFoundError(f"Input file '{input_file}' not found.")
     
-    seen: Dict[str, int] = {}
-    duplicates: Dict[str, List[int]] = defaultdict(list)
+    seen: Dict[bytes, int] = {}
+    duplicates: Dict[bytes, List[int]] = defaultdict(list)
     total_lines = 0
     
     try:
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
+        with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
             for line_num, line in enumerate(f, 1):
                 total_lines += 1
                 line = line.strip()
@@ -71,20 +141,455 @@ def find_duplicates(input_file: str) -> Tuple[Dict[str, List[int]], int]:
     except Exception as e:
         raise IOError(f"Error reading file '{input_file}': {e}")
     
-    return dict(duplicates), len(seen)
+    decoded: Dict[str, List[int]] = {}
+    for line, line_nums in duplicates.items():
+        decoded.setdefault(line.decode('utf-8', errors='replace'), []).extend(line_nums)
+    return decoded, len(seen)
 
-def remove_duplicates(input_file: str, output_file: str = None) -> Tuple[int, int]:
+class DedupResult(NamedTuple):
+    """Outcome and duplicate statistics of a deduplication run."""
+    unique_lines: int
+    duplicates_removed: int
+    duplicate_entries: int  # Distinct lines that occurred more than once
+    samples: List[Tuple[str, List[int], int]]  # First duplicated lines: (line, first repeat line numbers, repeats)
+    bytes_read: int
+    fingerprint_collisions: int = 0  # Distinct lines kept after --verify found a fingerprint collision
+    shards: int = 0  # Hash shards of the external or parallel mode; 0 when deduplicated in memory
+
+class _DuplicateTracker:
+    """Counts removed lines, distinct duplicated lines and a few samples with line numbers."""
+
+    def __init__(self, repeated):
+        # A set of lines, or a FingerprintSet in fingerprint mode
+        self.repeated = repeated
+        self.removed = 0
+        self.entries = 0
+        self.sample_lines: Dict[bytes, List[int]] = {}
+        self.sample_counts: Dict[bytes, int] = {}
+
+    def record(self, key: bytes, line_num: int) -> None:
+        self.removed += 1
+        if key not in self.repeated:
+            self.repeated.add(key)
+            self.entries += 1
+            if len(self.sample_lines) < DUPLICATE_SAMPLES:
+                self.sample_lines[key] = []
+                self.sample_counts[key] = 0
+        if key in self.sample_counts:
+            self.sample_counts[key] += 1
+            if len(self.sample_lines[key]) < SAMPLE_LINE_NUMBERS:
+                self.sample_lines[key].append(line_num)
+
+    def __getstate__(self):
+        # Only the counts and samples travel back from shard workers
+        state = self.__dict__.copy()
+        state['repeated'] = set()
+        return state
+
+    def merge(self, other: '_DuplicateTracker') -> None:
+        """
+        Fold in the statistics of a shard with different lines; samples must have been
+        recorded by byte offset, so the earliest repeated lines can be kept.
+        """
+        self.removed += other.removed
+        self.entries += other.entries
+        counts = {**self.sample_counts, **other.sample_counts}
+        samples = sorted(list(self.sample_lines.items()) + list(other.sample_lines.items()),
+                         key=lambda item: item[1][0])[:DUPLICATE_SAMPLES]
+        self.sample_lines = dict(samples)
+        self.sample_counts = {key: counts[key] for key in self.sample_lines}
+
+    def samples(self) -> List[Tuple[str, List[int], int]]:
+        return [(key.decode('utf-8', errors='replace'), line_nums, self.sample_counts[key])
+                for key, line_nums in self.sample_lines.items()]
+
+def _print_progress(done: int, total: int, lines: int) -> None:
+    print(f"Processed {lines:,} lines ({done / total:.0%} of {total:,} bytes)...", end='\r')
+
+def _read_blocks(infile, end: Optional[int] = None) -> Iterator[Tuple[List[bytes], int]]:
     """
-    Remove duplicate lines from the input file and save to output file.
+    Yield (lines, offset of the first line) for large blocks of a binary file, from its
+    current position up to end, which must be a line boundary (default: end of file).
+    """
+    while True:
+        offset = infile.tell()
+        if end is None:
+            lines = infile.readlines(READ_BLOCK_SIZE)
+        elif offset >= end:
+            break
+        else:
+            lines = infile.readlines(min(READ_BLOCK_SIZE, end - offset))
+            # readlines stops once the hint is exceeded, which can be one line past end
+            if infile.tell() > end:
+                lines.pop()
+                infile.seek(end)
+        if not lines:
+            break
+        yield lines, offset
+
+def _dedup_exact(infile, outfile, tracker: _DuplicateTracker, progress) -> int:
+    """Deduplicate with a set of the lines themselves; returns the number of unique lines."""
+    seen: Set[bytes] = set()
+    line_num = 0
+    for lines, _ in _read_blocks(infile):
+        kept = []
+        for line in lines:
+            line_num += 1
+            key = line.strip()
+            if not key:
+                # Preserve empty lines
+                kept.append(line)
+            elif key not in seen:
+                seen.add(key)
+                kept.append(line)  # Preserve original formatting
+            else:
+                tracker.record(key, line_num)
+        outfile.write(b''.join(kept))
+        progress(line_num)
+    return len(seen)
+
+def presize_lines(input_bytes: int) -> int:
+    """Distinct lines to presize a fingerprint table for, given the bytes of input."""
+    return min(input_bytes // ESTIMATED_LINE_BYTES, MAX_PRESIZE_LINES)
+
+def _dedup_fingerprints(infile, outfile, tracker: _DuplicateTracker, progress, bits: int,
+                        verify: bool, verify_file) -> Tuple[int, int, int]:
+    """
+    Deduplicate with a FingerprintSet; returns (unique lines, fingerprint collisions,
+    bytes used by the fingerprint table).
+    
+    With verify, a repeated fingerprint is confirmed by re-reading the earlier line from
+    verify_file. A different line is kept, and remembered exactly so that its own
+    repeats are still removed.
+    """
+    seen = FingerprintSet(presize_lines(os.fstat(infile.fileno()).st_size), bits, verify)
+    collided: Set[bytes] = set()
+    line_num = 0
+    for lines, offset in _read_blocks(infile):
+        kept = []
+        for line in lines:
+            line_num += 1
+            key = line.strip()
+            if not key:
+                kept.append(line)
+            elif not verify:
+                if seen.add(key):
+                    kept.append(line)
+                else:
+                    tracker.record(key, line_num)
+            else:
+                earlier = seen.add_offset(key, offset)
+                if earlier is None:
+                    kept.append(line)
+                elif key in collided:
+                    tracker.record(key, line_num)
+                else:
+                    verify_file.seek(earlier)
+                    if verify_file.readline().strip() == key:
+                        tracker.record(key, line_num)
+                    else:
+                        collided.add(key)
+                        kept.append(line)
+            offset += len(line)
+        outfile.write(b''.join(kept))
+        progress(line_num)
+    return len(seen) + len(collided), len(collided), seen.nbytes
+
+def _partition_count(input_size: int, max_memory: int) -> int:
+    """Spill runs needed to deduplicate input_size bytes within max_memory; 0 if it fits in memory."""
+    estimate = input_size * SET_BYTES_PER_INPUT_BYTE
+    if estimate <= max_memory:
+        return 0
+    return min(MAX_PARTITIONS, max(2, math.ceil(estimate / max_memory)))
+
+def _run_path(spill_dir: str, range_index: int) -> str:
+    """Base path of the run files holding the lines of one byte range."""
+    return os.path.join(spill_dir, f"r{range_index:04d}")
+
+def _kept_path(spill_dir: str, range_index: int, shard: int) -> str:
+    """Path of the offsets one shard kept from one byte range."""
+    return f"{_run_path(spill_dir, range_index)}s{shard:03d}.kept"
+
+def _spill_range(task) -> Tuple[int, int, int]:
+    """
+    Spill the lines of one byte range, with their byte offsets, into the range's run
+    files, grouped by shard; returns (lines, bytes) read and the offset of the file's
+    last line if it has no newline and lies in this range, else -1.
+    
+    The shard is chosen by a CRC-32 of the stripped line, so all copies of a line share
+    a shard; empty lines all go to shard 0. Each block read is written shard after
+    shard: the raw lines to the .lines file, their offsets as an array('Q') to the
+    .offsets file, and each shard's bytes and lines as one row of array('Q') pairs to
+    the .index file, so three files are open however many shards there are.
+    """
+    input_file, start, end, spill_dir, range_index, shards = task
+    path = _run_path(spill_dir, range_index)
+    line_count = 0
+    unterminated = -1
+    with open(path + '.lines', 'wb', buffering=IO_BUFFER_SIZE) as lines_file, \
+         open(path + '.offsets', 'wb', buffering=IO_BUFFER_SIZE) as offsets_file, \
+         open(path + '.index', 'wb') as index_file, \
+         open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as infile:
+        infile.seek(start)
+        for lines, offset in _read_blocks(infile, end):
+            runs: List[List[bytes]] = [[] for _ in range(shards)]
+            offsets = [array('Q') for _ in range(shards)]
+            for line in lines:
+                shard = zlib.crc32(line.strip()) % shards
+                runs[shard].append(line)
+                offsets[shard].append(offset)
+                offset += len(line)
+            if not line.endswith(b'\n'):
+                # Only the last line of the file can lack a newline; runs need one per line
+                runs[shard][-1] = line + b'\n'
+                unterminated = offsets[shard][-1]
+            index = array('Q')
+            for run_lines, run_offsets in zip(runs, offsets):
+                data = b''.join(run_lines)
+                lines_file.write(data)
+                run_offsets.tofile(offsets_file)
+                index.extend((len(data), len(run_offsets)))
+            index.tofile(index_file)
+            line_count += len(lines)
+    return line_count, end - start, unterminated
+
+def _shard_runs(index_path: str, shard: int, shards: int) -> Iterator[Tuple[int, int, int, int]]:
+    """
+    Yield (position in .lines, position in .offsets in items, bytes, lines) of each
+    non-empty run of one shard, one per block, from a range's .index file.
+    """
+    lines_position = items_position = 0
+    with open(index_path, 'rb') as f:
+        while True:
+            index = array('Q')
+            try:
+                index.fromfile(f, 2 * shards)
+            except EOFError:
+                # Rows are written whole, so only the end of the file is left
+                return
+            sizes, counts = index[0::2], index[1::2]
+            if counts[shard]:
+                yield (lines_position + sum(sizes[:shard]), items_position + sum(counts[:shard]),
+                       sizes[shard], counts[shard])
+            lines_position += sum(sizes)
+            items_position += sum(counts)
+
+def _dedup_shard(task) -> Tuple[int, _DuplicateTracker, bytes]:
+    """
+    Deduplicate one shard in memory, reading its runs from each range's run files in
+    file order; returns the number of unique lines, the duplicates, recorded by byte
+    offset, and the line at offset unterminated if it was kept unordered (else b'').
+    
+    Ordered, the offsets of the kept lines of each run are written to its .kept file (in
+    increasing order, as runs are filled in file order); otherwise the kept lines
+    themselves are written to the shard's .out file. The file's last line, when it has
+    no newline, is returned without the newline the runs gave it instead, to be
+    written at the very end.
+    """
+    spill_dir, shard, shards, range_count, ordered, unterminated = task
+    seen: Set[bytes] = set()
+    tracker = _DuplicateTracker(set())
+    tail = b''
+    with ExitStack() as stack:
+        if not ordered:
+            outfile = stack.enter_context(open(os.path.join(spill_dir, f"s{shard:03d}.out"), 'wb',
+                                               buffering=IO_BUFFER_SIZE))
+        for range_index in range(range_count):
+            path = _run_path(spill_dir, range_index)
+            kept = array('Q')
+            with open(path + '.lines', 'rb') as lines_file, \
+                 open(path + '.offsets', 'rb') as offsets_file:
+                for lines_position, items_position, size, count in _shard_runs(
+                        path + '.index', shard, shards):
+                    lines_file.seek(lines_position)
+                    # Split at \n only, like reading the input
+                    lines = io.BytesIO(lines_file.read(size)).readlines()
+                    offsets_file.seek(items_position * kept.itemsize)
+                    offsets = array('Q')
+                    offsets.fromfile(offsets_file, count)
+                    block = []
+                    for line, offset in zip(lines, offsets):
+                        key = line.strip()
+                        if key in seen:
+                            tracker.record(key, offset)
+                            continue
+                        if key:
+                            seen.add(key)
+                        if ordered:
+                            kept.append(offset)
+                        elif offset == unterminated:
+                            tail = line[:-1]
+                        else:
+                            block.append(line)
+                    if block:
+                        outfile.write(b''.join(block))
+            if ordered:
+                with open(_kept_path(spill_dir, range_index, shard), 'wb') as f:
+                    kept.tofile(f)
+    return len(seen), tracker, tail
+
+def _read_offsets(path: str) -> Iterator[int]:
+    """
+    Yield the offsets stored in a .kept file, reading MERGE_READ_ITEMS at a time.
+    
+    The file is reopened for each read, so merging the .kept files of every shard does
+    not hold one open file per shard.
+    """
+    position = 0
+    while True:
+        chunk = array('Q')
+        with open(path, 'rb') as f:
+            f.seek(position)
+            try:
+                chunk.fromfile(f, MERGE_READ_ITEMS)
+            except EOFError:
+                # fromfile keeps the items it could read before raising
+                pass
+        yield from chunk
+        if len(chunk) < MERGE_READ_ITEMS:
+            return
+        position += len(chunk) * chunk.itemsize
+
+def _write_range(task) -> None:
+    """Copy the lines of one byte range whose offsets are in its runs' merged .kept files."""
+    input_file, start, end, spill_dir, range_index, shards = task
+    kept_paths = [_kept_path(spill_dir, range_index, shard) for shard in range(shards)]
+    kept = heapq.merge(*(_read_offsets(path) for path in kept_paths))
+    next_kept = next(kept, -1)
+    with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as infile, \
+         open(os.path.join(spill_dir, f"r{range_index:04d}.out"), 'wb',
+              buffering=IO_BUFFER_SIZE) as outfile:
+        infile.seek(start)
+        for lines, offset in _read_blocks(infile, end):
+            block = []
+            for line in lines:
+                if offset == next_kept:
+                    block.append(line)
+                    next_kept = next(kept, -1)
+                offset += len(line)
+            outfile.write(b''.join(block))
+    for path in kept_paths:
+        os.remove(path)
+
+def _line_numbers(infile, offsets: List[int]) -> Dict[int, int]:
+    """Map byte offsets of line starts to 1-based line numbers by counting newlines."""
+    numbers = {}
+    infile.seek(0)
+    line_num = 1
+    position = 0
+    for offset in sorted(set(offsets)):
+        while position < offset:
+            data = infile.read(min(IO_BUFFER_SIZE, offset - position))
+            line_num += data.count(b'\n')
+            position += len(data)
+        numbers[offset] = line_num
+    return numbers
+
+def _dedup_external(input_file: str, outfile, progress, shards: int, workers: int,
+                    ordered: bool, temp_dir: Optional[str]) -> Tuple[int, _DuplicateTracker]:
+    """
+    Deduplicate through hash-sharded runs on disk; returns the number of unique lines
+    and the duplicate statistics.
+    
+    Byte ranges of the input are spilled into runs grouped by shard, each shard
+    is deduplicated on its own, and then either the first-occurrence offsets are
+    merged and each range is re-read to copy its kept lines in order, or the shards'
+    kept lines are concatenated. No line is ever shared by two shards, so with workers
+    every stage runs in parallel.
+    """
+    ranges = split_line_ranges(input_file, workers, max_chunk_size=max(1, os.path.getsize(input_file)))
+    with tempfile.TemporaryDirectory(dir=temp_dir, prefix='credforge_dedup_') as spill_dir, \
+         ExitStack() as stack:
+        range_tasks = [(input_file, start, end, spill_dir, index, shards)
+                       for index, (start, end) in enumerate(ranges)]
+        run = stack.enter_context(pool_context().Pool(workers)).imap_unordered if workers > 1 else map
+        
+        lines_read = bytes_read = 0
+        unterminated = -1
+        for line_count, byte_count, range_unterminated in run(_spill_range, range_tasks):
+            lines_read += line_count
+            bytes_read += byte_count
+            unterminated = max(unterminated, range_unterminated)
+            progress(lines_read, bytes_read)
+        
+        unique_count = 0
+        tracker = _DuplicateTracker(set())
+        tail = b''
+        shard_tasks = [(spill_dir, shard, shards, len(ranges), ordered, unterminated)
+                       for shard in range(shards)]
+        for shard_unique, shard_tracker, shard_tail in run(_dedup_shard, shard_tasks):
+            unique_count += shard_unique
+            tracker.merge(shard_tracker)
+            tail += shard_tail
+        for index in range(len(ranges)):
+            for suffix in ('.lines', '.offsets', '.index'):
+                os.remove(_run_path(spill_dir, index) + suffix)
+        
+        if ordered:
+            for _ in run(_write_range, range_tasks):
+                pass
+            parts = [f"r{index:04d}.out" for index in range(len(ranges))]
+        else:
+            parts = [f"s{shard:03d}.out" for shard in range(shards)]
+        for part in parts:
+            with open(os.path.join(spill_dir, part), 'rb') as f:
+                shutil.copyfileobj(f, outfile, IO_BUFFER_SIZE)
+        # Unordered, a kept last line without a newline goes last, as it came
+        outfile.write(tail)
+    
+    # Report the samples' byte offsets as line numbers
+    with open(input_file, 'rb') as infile:
+        numbers = _line_numbers(infile, [offset for offsets in tracker.sample_lines.values()
+                                         for offset in offsets])
+    tracker.sample_lines = {key: [numbers[offset] for offset in offsets]
+                            for key, offsets in tracker.sample_lines.items()}
+    return unique_count, tracker
+
+def deduplicate(input_file: str, output_file: str = None, fingerprint_bits: Optional[int] = None,
+                verify: bool = False, max_memory: Optional[int] = None,
+                temp_dir: Optional[str] = None, ordered: bool = True,
+                workers: int = 1) -> DedupResult:
+    """
+    Remove duplicate lines in a single pass, gathering duplicate statistics on the way.
+    
+    The file is read once in large binary blocks; the first occurrence of each line is
+    written unchanged (line endings included) and empty lines are kept. Lines are
+    compared as bytes with surrounding ASCII whitespace stripped, and only \n ends a
+    line (see the module docstring). Progress is based on the bytes read
+    so far, so no pass is needed to count lines first.
+    
+    By default every distinct line is kept in memory. With fingerprint_bits, only a
+    64- or 128-bit fingerprint of each distinct line is stored (see fingerprint_set.py),
+    about 16 bytes per distinct line at 64 bits; two lines with the same fingerprint are
+    then taken for duplicates unless verify is set.
+    
+    With max_memory, the memory of the in-memory mode is estimated from the file size
+    (SET_BYTES_PER_INPUT_BYTE); if it exceeds the budget, the file is deduplicated
+    externally through hash-partitioned runs on disk instead, which costs another read
+    of the input to restore the original order unless ordered is False.
+    
+    With workers, the same runs are used to shard the lines by hash over that many
+    worker processes, each deduplicating its own shards; every stage of the external
+    mode then runs in parallel.
     
     Args:
         input_file: Path to the input file
-        output_file: Path to the output file (if None, modifies input file in-place)
+        output_file: Path to the output file (if None, modifies input file in-place;
+            the original is kept with a .backup extension unless nothing was removed)
+        fingerprint_bits: Store 64- or 128-bit fingerprints instead of lines
+        verify: With fingerprints, re-read the earlier line whenever a fingerprint
+            repeats, so collisions cannot remove lines
+        max_memory: Memory budget in bytes that selects in-memory or external mode
+            (default: always in memory)
+        temp_dir: Directory for the external mode's runs (default: the system temp
+            directory)
+        ordered: In external mode, keep the original line order; otherwise the kept
+            lines are written shard by shard
+        workers: Number of worker processes; more than one implies external mode, with
+            at least one shard per worker
         
     Returns:
-        Tuple containing:
-        - Number of unique lines kept
-        - Number of duplicate lines removed
+        DedupResult with the counts and up to DUPLICATE_SAMPLES duplicated lines
         
     Raises:
         FileNotFoundError: If input file doesn't exist
@@ -92,6 +597,12 @@ def remove_duplicates(input_file: str, output_file: str = None) -> Tuple[int, in
     """
     if not Path(input_file).is_file():
         raise FileNotFoundError(f"Input file '{input_file}' not found.")
+    if verify and not fingerprint_bits:
+        raise ValueError("verify requires fingerprint_bits.")
+    if (max_memory is not None or workers > 1) and fingerprint_bits:
+        raise ValueError("max_memory and workers cannot be combined with fingerprint_bits.")
+    if workers < 1:
+        raise ValueError("workers must be at least 1.")
     
     # Determine output strategy
     temp_file = False
@@ -99,52 +610,64 @@ def remove_duplicates(input_file: str, output_file: str = None) -> Tuple[int, in
         output_file = input_file + '.tmp'
         temp_file = True
     
-    seen: Set[str] = set()
-    removed_count = 0
-    total_lines = 0
-    processed_lines = 0
-    
+    collisions = table_bytes = shards = 0
     try:
-        # First pass: count total lines for progress
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-            total_lines = sum(1 for _ in f)
+        total = os.stat(input_file).st_size
+        if max_memory is not None:
+            # Each worker holds one shard's distinct lines at a time
+            shards = _partition_count(total, max_memory // workers)
+            if shards:
+                print(f"Estimated memory exceeds {max_memory:,} bytes; spilling to {shards} shards...")
+        if workers > 1:
+            shards = max(shards, workers)
+            print(f"Sharding lines by hash over {workers} workers ({shards} shards)...")
+        start_time = time.monotonic()
+        reported_percent = 0
+        lines_read = 0
         
-        print(f"Processing {total_lines:,} lines...")
+        def progress(line_num: int, done: Optional[int] = None) -> None:
+            # Report progress at most once per percent of the input
+            nonlocal reported_percent, lines_read
+            lines_read = line_num
+            if done is None:
+                done = infile.tell()
+            percent = done * 100 // total
+            if percent > reported_percent and done < total:
+                reported_percent = percent
+                _print_progress(done, total, line_num)
         
-        # Process the file
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as infile, \
-             open(output_file, 'w', encoding='utf-8') as outfile:
-            
-            for i, line in enumerate(infile, 1):
-                original_line = line
-                line = line.strip()
-                
-                if line:  # Process non-empty lines
-                    if line not in seen:
-                        seen.add(line)
-                        outfile.write(original_line)  # Preserve original formatting
-                        processed_lines += 1
-                    else:
-                        removed_count += 1
-                else:
-                    # Preserve empty lines
-                    outfile.write(original_line)
-                
-                # Print progress every 1000 lines
-                if i % 1000 == 0 or i == total_lines:
-                    print(f"Processed {i:,}/{total_lines:,} lines...", end='\r')
+        with open(input_file, 'rb', buffering=IO_BUFFER_SIZE) as infile, \
+             open(output_file, 'wb', buffering=IO_BUFFER_SIZE) as outfile:
+            if shards:
+                unique_count, tracker = _dedup_external(input_file, outfile, progress, shards,
+                                                        workers, ordered, temp_dir)
+            elif fingerprint_bits:
+                tracker = _DuplicateTracker(FingerprintSet(bits=fingerprint_bits))
+                with open(input_file, 'rb') as verify_file:
+                    unique_count, collisions, table_bytes = _dedup_fingerprints(
+                        infile, outfile, tracker, progress, fingerprint_bits, verify, verify_file)
+            else:
+                tracker = _DuplicateTracker(set())
+                unique_count = _dedup_exact(infile, outfile, tracker, progress)
         
-        print(f"Processed {total_lines:,}/{total_lines:,} lines... Done!")
+        if total:
+            _print_progress(total, total, lines_read)
+            print(f"\nRead {total:,} bytes in {time.monotonic() - start_time:.1f}s")
+        if fingerprint_bits:
+            print(f"Fingerprint table: {table_bytes:,} bytes for {unique_count:,} unique lines")
         
         # If we were working with a temporary file, replace the original
         if temp_file:
-            # Create backup of original file
-            backup_file = input_file + '.backup'
-            if Path(backup_file).exists():
-                os.remove(backup_file)
-            os.rename(input_file, backup_file)
-            os.rename(output_file, input_file)
-            print(f"Original file backed up as: {backup_file}")
+            if tracker.removed:
+                # Create backup of original file
+                backup_file = input_file + '.backup'
+                if Path(backup_file).exists():
+                    os.remove(backup_file)
+                os.rename(input_file, backup_file)
+                os.rename(output_file, input_file)
+                print(f"Original file backed up as: {backup_file}")
+            else:
+                os.remove(output_file)
     
     except Exception as e:
         # Clean up temp file if something went wrong
@@ -152,73 +675,150 @@ def remove_duplicates(input_file: str, output_file: str = None) -> Tuple[int, in
             os.remove(output_file)
         raise IOError(f"Error processing files: {e}")
     
-    return processed_lines, removed_count
+    return DedupResult(unique_count, tracker.removed, tracker.entries, tracker.samples(),
+                       total, collisions, shards)
+
+def remove_duplicates(input_file: str, output_file: str = None) -> Tuple[int, int]:
+    """
+    Remove duplicate lines from the input file and save to output file.
+    
+    Args:
+        input_file: Path to the input file
+        output_file: Path to the output file (if None, modifies input file in-place)
+        
+    Returns:
+        Tuple containing:
+        - Number of unique lines kept
+        - Number of duplicate lines removed
+        
+    Raises:
+        FileNotFoundError: If input file doesn't exist
+        IOError: If files cannot be read/written
+    """
+    result = deduplicate(input_file, output_file)
+    return result.unique_lines, result.duplicates_removed
+
+def _print_duplicate_stats(duplicate_entries: int, duplicate_instances: int, unique_count: int,
+                           samples: List[Tuple[str, List[int], int]]) -> None:
+    """Print the duplicate statistics and a few sample duplicates."""
+    print(f"\n📊 Duplicate Analysis Results:")
+    print(f"   Unique duplicate entries found: {duplicate_entries:,}")
+    print(f"   Total duplicate instances: {duplicate_instances:,}")
+    print(f"   Unique lines in file: {unique_count:,}")
+    print(f"   Potential space savings: {duplicate_instances:,} lines\n")
+    
+    # Show sample duplicates
+    print("Sample duplicate entries:")
+    for i, (line, line_nums, repeats) in enumerate(samples[:DUPLICATE_SAMPLES]):
+        display_line = (line[:47] + '...') if len(line) > 50 else line
+        display_nums = line_nums[:SAMPLE_LINE_NUMBERS]
+        if repeats > SAMPLE_LINE_NUMBERS:
+            display_nums.append(f"... +{repeats - SAMPLE_LINE_NUMBERS} more")
+        print(f"  {i+1}. \"{display_line}\" (lines: {', '.join(map(str, display_nums))})")
+    
+    if duplicate_entries > DUPLICATE_SAMPLES:
+        print(f"  ... and {duplicate_entries - DUPLICATE_SAMPLES:,} more duplicate entries")
+
+def _print_complete(final_count: int, removed_count: int, output_file: str) -> None:
+    print(f"\n✅ Processing Complete!")
+    print(f"   Lines processed: {final_count + removed_count:,}")
+    print(f"   Duplicates removed: {removed_count:,}")
+    print(f"   Unique lines kept: {final_count:,}")
+    
+    if output_file:
+        print(f"   Output saved to: {output_file}")
+    else:
+        print(f"   Original file updated in-place")
+        print(f"   Backup created with .backup extension")
 
 def main():
     """Main function to handle command line arguments and coordinate duplicate removal."""
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <input_file> [output_file]")
-        print("\nArguments:")
-        print("  input_file   Path to the file to analyze for duplicates")
-        print("  output_file  Path to save deduplicated content (optional)")
-        print("\nIf output_file is not provided, the input file will be modified in-place.")
-        print("A backup will be created automatically when modifying in-place.")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Remove duplicate lines from a file, keeping the first occurrence of each.')
+    parser.add_argument('input_file', help='Path to the file to deduplicate')
+    parser.add_argument('output_file', nargs='?',
+                        help='Path to save deduplicated content (default: modify the input '
+                             'in-place, keeping a .backup copy)')
+    parser.add_argument('--confirm', action='store_true',
+                        help='Show duplicate statistics and ask before removing anything '
+                             '(reads the file twice)')
+    parser.add_argument('--fingerprints', type=int, choices=(64, 128), metavar='BITS',
+                        help='Store 64- or 128-bit fingerprints of lines instead of the lines '
+                             '(about 16 bytes per distinct line at 64 bits)')
+    parser.add_argument('--verify', action='store_true',
+                        help='With --fingerprints, re-read the earlier line whenever a '
+                             'fingerprint repeats, so hash collisions cannot remove lines')
+    parser.add_argument('--max-memory', type=int, metavar='MB',
+                        help='Memory budget; larger inputs are deduplicated through runs on '
+                             'disk (default: always in memory)')
+    parser.add_argument('--temp-dir', metavar='DIR',
+                        help='Directory for the runs of --max-memory (default: system temp)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='When spilling to disk or using workers, write the kept lines shard '
+                             'by shard instead of in their original order (skips one read of '
+                             'the input)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes; lines are sharded by hash through '
+                             'runs on disk (default: 1)')
     
-    input_file = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
+    args = parser.parse_args()
+    if args.verify and not args.fingerprints:
+        parser.error("--verify requires --fingerprints")
+    if args.max_memory is not None:
+        if args.max_memory <= 0:
+            parser.error("--max-memory must be positive")
+        if args.fingerprints:
+            parser.error("--max-memory cannot be combined with --fingerprints")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.workers > 1 and args.fingerprints:
+        parser.error("--workers cannot be combined with --fingerprints")
+    input_file = args.input_file
+    output_file = args.output_file
     
     try:
         print("Duplicate Line Remover")
         print("=" * 22)
         print(f"Analyzing file: {input_file}\n")
         
-        print("Finding duplicates...")
-        duplicates, unique_count = find_duplicates(input_file)
-        
-        if duplicates:
-            total_duplicate_instances = sum(len(v) for v in duplicates.values())
+        if args.confirm:
+            print("Finding duplicates...")
+            duplicates, unique_count = find_duplicates(input_file)
             
-            print(f"\n📊 Duplicate Analysis Results:")
-            print(f"   Unique duplicate entries found: {len(duplicates)}")
-            print(f"   Total duplicate instances: {total_duplicate_instances}")
-            print(f"   Unique lines in file: {unique_count}")
-            print(f"   Potential space savings: {total_duplicate_instances} lines\n")
+            if not duplicates:
+                print("\n✅ No duplicates found in the file.")
+                print("The file is already free of duplicate lines.")
+                return
             
-            # Show sample duplicates
-            print("Sample duplicate entries:")
-            for i, (line, line_nums) in enumerate(list(duplicates.items())[:5]):
-                display_line = (line[:47] + '...') if len(line) > 50 else line
-                display_nums = line_nums[:3]
-                if len(line_nums) > 3:
-                    display_nums.append(f"... +{len(line_nums)-3} more")
-                print(f"  {i+1}. \"{display_line}\" (lines: {', '.join(map(str, display_nums))})")
-            
-            if len(duplicates) > 5:
-                print(f"  ... and {len(duplicates) - 5} more duplicate entries")
+            samples = [(line, line_nums[:SAMPLE_LINE_NUMBERS], len(line_nums))
+                       for line, line_nums in list(duplicates.items())[:DUPLICATE_SAMPLES]]
+            _print_duplicate_stats(len(duplicates), sum(len(v) for v in duplicates.values()),
+                                   unique_count, samples)
             
             print("\n" + "="*50)
             response = input("Do you want to remove duplicates? (y/n): ").strip().lower()
-            
-            if response == 'y':
-                print("\nRemoving duplicates...")
-                final_count, removed_count = remove_duplicates(input_file, output_file)
-                
-                print(f"\n✅ Processing Complete!")
-                print(f"   Lines processed: {final_count + removed_count:,}")
-                print(f"   Duplicates removed: {removed_count:,}")
-                print(f"   Unique lines kept: {final_count:,}")
-                
-                if output_file:
-                    print(f"   Output saved to: {output_file}")
-                else:
-                    print(f"   Original file updated in-place")
-                    print(f"   Backup created with .backup extension")
-            else:
+            if response != 'y':
                 print("\nOperation cancelled. No changes were made.")
-        else:
+                return
+        
+        # A single pass writes the output and gathers the statistics
+        print("Removing duplicates...")
+        result = deduplicate(input_file, output_file, args.fingerprints, args.verify,
+                             args.max_memory * 1024 * 1024 if args.max_memory else None,
+                             args.temp_dir, not args.unordered, args.workers)
+        
+        if not result.duplicates_removed:
             print("\n✅ No duplicates found in the file.")
-            print("The file is already free of duplicate lines.")
+            if output_file:
+                print(f"   Output saved to: {output_file}")
+            else:
+                print("The file is already free of duplicate lines and was left unchanged.")
+            return
+        
+        if not args.confirm:
+            _print_duplicate_stats(result.duplicate_entries, result.duplicates_removed,
+                                   result.unique_lines, result.samples)
+        _print_complete(result.unique_lines, result.duplicates_removed, output_file)
     
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
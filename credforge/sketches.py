@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Streaming Sketches
+
+Fixed-memory summaries of very large password streams:
+    - SpaceSaving keeps approximate counts of the most frequent items with a guaranteed
+      error bound per item
+    - HyperLogLog estimates the number of distinct items
+
+Both can be merged, so partial summaries built over parts of a corpus combine into one.
+"""
+
+import math
+from hashlib import blake2b
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+# Estimated bytes per tracked item: dict slot, str object and int count
+SPACE_SAVING_ITEM_BYTES = 200
+
+DEFAULT_HLL_PRECISION = 14
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary.
+
+    Up to `capacity` items are tracked with a count that never underestimates the true
+    count and overestimates it by at most the item's error. Any item whose true count
+    exceeds `floor` is guaranteed to be tracked.
+
+    Instead of evicting the smallest counter on every new item, the table is allowed to
+    grow to twice its capacity and is then cut back in one sort; items arriving later
+    start from the largest evicted count. This keeps the per-item work to a dict update.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1.")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.floor = 0
+        self.total = 0
+
+    @classmethod
+    def for_memory(cls, memory_bytes: int) -> 'SpaceSaving':
+        """Create a summary whose table stays within roughly memory_bytes."""
+        return cls(max(1, memory_bytes // (2 * SPACE_SAVING_ITEM_BYTES)))
+
+    def add(self, item: str) -> bool:
+        """
+        Count one occurrence of item.
+
+        Returns:
+            True if the item was not tracked before this call
+        """
+        self.total += 1
+        count = self.counts.get(item)
+        if count is not None:
+            self.counts[item] = count + 1
+            return False
+        self._insert(item, 1)
+        return True
+
+    def _insert(self, item: str, count: int) -> None:
+        self.counts[item] = self.floor + count
+        if self.floor:
+            self.errors[item] = self.floor
+        if len(self.counts) >= 2 * self.capacity:
+            self._compact()
+
+    def update(self, items: Iterable[str]) -> List[str]:
+        """
+        Count every item of items.
+
+        Returns:
+            The items that were newly tracked, e.g. for feeding a distinct-count sketch
+        """
+        counts = self.counts
+        errors = self.errors
+        limit = 2 * self.capacity
+        floor = self.floor
+        inserted = []
+        total = 0
+        for item in items:
+            total += 1
+            count = counts.get(item)
+            if count is not None:
+                counts[item] = count + 1
+                continue
+            # Same as _insert, inlined for the common case of a new item
+            counts[item] = floor + 1
+            if floor:
+                errors[item] = floor
+            inserted.append(item)
+            if len(counts) >= limit:
+                self._compact()
+                floor = self.floor
+        self.total += total
+        return inserted
+
+    def _compact(self) -> None:
+        """Cut the table back to capacity items, raising floor to the largest evicted count."""
+        if len(self.counts) <= self.capacity:
+            return
+        floor = sorted(self.counts.values(), reverse=True)[self.capacity]
+        # Evict in place: update() holds a reference to the counts dict
+        for item in [item for item, count in self.counts.items() if count <= floor]:
+            del self.counts[item]
+            self.errors.pop(item, None)
+        self.floor = max(self.floor, floor)
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """Fold another summary into this one."""
+        counts = {}
+        errors = {}
+        # Keep a deterministic order: this summary's items, then the other's new ones
+        for item in [*self.counts, *(item for item in other.counts if item not in self.counts)]:
+            # An item missing from one side may have occurred up to that side's floor times
+            count = self.counts.get(item, self.floor) + other.counts.get(item, other.floor)
+            error = (self.errors.get(item, 0) if item in self.counts else self.floor) + \
+                    (other.errors.get(item, 0) if item in other.counts else other.floor)
+            counts[item] = count
+            if error:
+                errors[item] = error
+        self.counts = counts
+        self.errors = errors
+        self.floor += other.floor
+        self.total += other.total
+        self._compact()
+
+    def error(self, item: str) -> int:
+        """Largest possible overestimate of a tracked item's count."""
+        return self.errors.get(item, 0)
+
+    @property
+    def exact(self) -> bool:
+        """True while nothing has been evicted, i.e. every count is exact."""
+        return self.floor == 0
+
+    def most_common(self, n: int) -> List[Tuple[str, int]]:
+        """Return the n items with the highest counts, highest first."""
+        return sorted(self.counts.items(), key=itemgetter(1), reverse=True)[:n]
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision must be between 4 and 18.")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str) -> None:
+        """Add an item; adding the same item again has no effect."""
+        value = int.from_bytes(blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+        index = value & ((1 << self.precision) - 1)
+        rank = 64 - self.precision - (value >> self.precision).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, items: Iterable[str]) -> None:
+        """Add every item of items."""
+        registers = self.registers
+        precision = self.precision
+        mask = (1 << precision) - 1
+        max_rank = 64 - precision + 1
+        from_bytes = int.from_bytes
+        for item in items:
+            value = from_bytes(blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+            rank = max_rank - (value >> precision).bit_length()
+            if rank > registers[value & mask]:
+                registers[value & mask] = rank
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision.")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate relative to the true count."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def count(self) -> int:
+        """Estimate the number of distinct items added."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate while many registers are still empty
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
@@ -9,6 +9,13 @@ import sys
 import os
 from pathlib import Path
 
+def strip_domain(username):
+    """
+    Return the account name of a DOMAIN\\username entry (the part after the last
+    backslash). Accepts str or bytes.
+    """
+    return username.rpartition(b'\\' if isinstance(username, bytes) else '\\')[2]
+
 def split_credentials(input_file, output_dir=None):
     """
     Split credentials file into separate files for usernames, passwords, and combined.
@@ -66,8 +73,7 @@ def split_credentials(input_file, output_dir=None):
                 password = ':'.join(parts[2:])  # Handle passwords that contain colons
                 
                 # Extract just the username part if it contains domain\username format
-                if '\\' in username:
-                    username = username.split('\\')[-1]  # Take the part after the last backslash
+                username = strip_domain(username)
                 
                 # Skip entries with empty hashes (which would mean the line doesn't have the expected format)
                 if not hash_value or hash_value.strip() == '':
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Username-in-Password Correlation
+
+Finds cracked accounts whose password is derived from their own username, such as
+jdoe -> Jdoe2024! or john.smith -> Smith123, in username:hash:password files (the
+format split_credentials.py takes).
+
+Usernames are normalized the way split_credentials.py does it (the DOMAIN\\ prefix is
+stripped), then username and password are both lowercased and leetspeak-folded with the
+table of the pattern detector, so J0hnSm1th matches johnsmith. Each record is tested,
+in this order, for:
+    - exact: the password is the username
+    - contains: the username occurs in the password
+    - reversed: the reversed username occurs in the password
+    - name part: a run of at least four letters of the username occurs in the password
+      (john.smith -> john, smith; jsmith42 -> jsmith)
+
+Each test is one substring search, so the work per record is bounded by the record
+length. Records are processed as raw bytes with a bytes.translate folding table, which
+lowercases ASCII only; non-ASCII characters must match exactly. The file is streamed
+once in byte ranges, which --workers processes in parallel.
+
+Usage:
+    python username_correlation.py <credentials_file> [-o OUTPUT_FILE] [--workers N]
+"""
+
+import argparse
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from credforge.fileutils import pool_context, read_range, split_line_ranges
+from credforge.password_patterns import FOLD_BYTES
+from credforge.split_credentials import strip_domain
+
+MATCH_TYPES = ('exact', 'contains', 'reversed', 'name part')
+
+# Shorter usernames or name parts would match too many unrelated passwords
+MIN_USERNAME_LENGTH = 3
+MIN_PART_LENGTH = 4
+
+# Largest byte range processed by one task; bounds the offenders held in memory
+CHUNK_SIZE = 8 * 1024 * 1024
+
+_NAME_PARTS = re.compile(rb'[a-z]{%d,}' % MIN_PART_LENGTH)
+
+def _match(username: bytes, password: bytes) -> Optional[str]:
+    """Match type of a username (without domain) and password, or None."""
+    name = username.translate(FOLD_BYTES)
+    if len(name) < MIN_USERNAME_LENGTH:
+        return None
+    folded = password.translate(FOLD_BYTES)
+    if folded == name:
+        return 'exact'
+    if name in folded:
+        return 'contains'
+    if name[::-1] in folded:
+        return 'reversed'
+    # Letter runs are taken before folding, which would turn digits into letters
+    for part in _NAME_PARTS.findall(username.lower()):
+        if part.translate(FOLD_BYTES) in folded:
+            return 'name part'
+    return None
+
+def match_username(username: str, password: str) -> Optional[str]:
+    """
+    Return how a password is derived from a username, or None.
+
+    Args:
+        username: Account name, with or without a DOMAIN\\ prefix
+        password: Cleartext password
+
+    Returns:
+        One of MATCH_TYPES, or None if no test matches or the username is shorter than
+        MIN_USERNAME_LENGTH
+    """
+    return _match(strip_domain(username).encode('utf-8'), password.encode('utf-8'))
+
+def _correlate_range(task) -> Tuple[Counter, List[Tuple[bytes, str, bytes]]]:
+    """Match the records of one byte range; returns counts and (username, match, password) offenders."""
+    credentials_file, start, end = task
+    data = read_range(credentials_file, start, end)
+    # Treat \r\n and \r as line endings, as text-mode reading does
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+    counts: Counter = Counter()
+    offenders = []
+    records = malformed = 0
+    for line in data.split(b'\n'):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.split(b':', 2)
+        if len(parts) < 3 or not parts[1].strip():
+            malformed += 1
+            continue
+        records += 1
+        username = strip_domain(parts[0])
+        match = _match(username, parts[2])
+        if match is not None:
+            counts[match] += 1
+            offenders.append((username, match, parts[2]))
+    counts['records'] = records
+    counts['malformed'] = malformed
+    return counts, offenders
+
+def correlate_usernames(credentials_file: str, output_file: Optional[str] = None,
+                        workers: int = 1) -> Dict:
+    """
+    Find accounts whose password is derived from their username.
+
+    Args:
+        credentials_file: Path to a username:hash:password file
+        output_file: Optional path to write offenders to, one username:match:password
+            line each, in input order
+        workers: Number of worker processes
+
+    Returns:
+        Dictionary with 'total_records', 'matched', 'match_counts' (match type ->
+        records), 'malformed' (lines that are not username:hash:password) and
+        'offenders' (the first ten (username, match, password) tuples)
+    """
+    if not Path(credentials_file).is_file():
+        raise FileNotFoundError(f"File '{credentials_file}' not found.")
+
+    tasks = [(credentials_file, start, end)
+             for start, end in split_line_ranges(credentials_file, workers, max_chunk_size=CHUNK_SIZE)]
+    counts: Counter = Counter()
+    first_offenders: List[Tuple[str, str, str]] = []
+    with ExitStack() as stack:
+        output = stack.enter_context(open(output_file, 'wb')) if output_file else None
+        if workers > 1:
+            parts = stack.enter_context(pool_context().Pool(workers)).imap(_correlate_range, tasks)
+        else:
+            parts = map(_correlate_range, tasks)
+        # Ranges arrive in file order, so offenders are written in input order
+        for part_counts, offenders in parts:
+            counts.update(part_counts)
+            first_offenders.extend((username.decode('utf-8', errors='replace'), match,
+                                    password.decode('utf-8', errors='replace'))
+                                   for username, match, password in offenders[:10 - len(first_offenders)])
+            if output:
+                output.writelines(b'%s:%s:%s\n' % (username, match.encode(), password)
+                                  for username, match, password in offenders)
+
+    if not counts['records']:
+        raise ValueError("No username:hash:password records found in the file.")
+    match_counts = {match: counts[match] for match in MATCH_TYPES}
+    return {
+        'total_records': counts['records'],
+        'matched': sum(match_counts.values()),
+        'match_counts': match_counts,
+        'malformed': counts['malformed'],
+        'offenders': first_offenders,
+    }
+
+def print_correlation(results: Dict, filename: str) -> None:
+    """Print the correlation results in a formatted way."""
+    total = results['total_records']
+    print(f"\nUsername-in-Password Analysis for: {filename}")
+    print("=" * 60)
+    print(f"Records analyzed: {total:,}")
+    if results['malformed']:
+        print(f"Malformed lines skipped: {results['malformed']:,}")
+    print(f"Passwords derived from the username: {results['matched']:,} "
+          f"({results['matched'] / total:.2%})")
+    print("\nMatch Types:")
+    print("-" * 60)
+    for match, count in results['match_counts'].items():
+        print(f"{match:<34} {count:>12,} {count / total:>8.2%}")
+    if results['offenders']:
+        print("\nFirst Offenders:")
+        print("-" * 60)
+        for username, match, password in results['offenders']:
+            print(f"{username:<24} {match:<10} {password}")
+    print("=" * 60)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Find cracked accounts whose password is derived from their username.')
+    parser.add_argument('credentials_file', help='Path to a username:hash:password file')
+    parser.add_argument('-o', '--output', help='Write offenders as username:match:password lines')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes (default: 1)')
+
+    args = parser.parse_args()
+    if not Path(args.credentials_file).is_file():
+        print(f"Error: '{args.credentials_file}' is not a valid file.", file=sys.stderr)
+        sys.exit(1)
+    if args.workers < 1:
+        print("Error: --workers must be at least 1.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        results = correlate_usernames(args.credentials_file, args.output, args.workers)
+        print_correlation(results, args.credentials_file)
+        if args.output:
+            print(f"{results['matched']:,} offenders written to: {args.output}")
+    except KeyboardInterrupt:
+        print("\nOperation cancelled by user.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"An error occurred: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
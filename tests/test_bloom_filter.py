@@ -0,0 +1,106 @@
+"""
+Unit tests for bloom_filter.py
+"""
+import os
+import random
+from pathlib import Path
+import pytest
+
+def _random_digests(count, seed):
+    rng = random.Random(seed)
+    return [rng.getrandbits(128).to_bytes(16, 'little') for _ in range(count)]
+
+def test_bloom_filter_membership():
+    """Test that added digests are always found and the false-positive rate is near target."""
+    from credforge.bloom_filter import BloomFilter
+    
+    members = _random_digests(5000, seed=1)
+    others = _random_digests(20000, seed=2)
+    bloom = BloomFilter.from_digests(members, len(members), fp_rate=0.01)
+    
+    assert all(bloom.might_contain(digest) for digest in members)
+    false_positives = sum(1 for digest in others if digest in bloom)
+    assert false_positives / len(others) < 0.02
+
+def test_bloom_filter_rejects_invalid_rate():
+    """Test that impossible false-positive rates are rejected."""
+    from credforge.bloom_filter import BloomFilter
+    
+    with pytest.raises(ValueError):
+        BloomFilter.for_capacity(100, fp_rate=0)
+    with pytest.raises(ValueError):
+        BloomFilter.for_capacity(100, fp_rate=1.5)
+
+def test_bloom_filter_save_and_open(temp_dir):
+    """Test that a saved filter can be memory-mapped and gives the same answers."""
+    from credforge.bloom_filter import BloomFilter
+    
+    members = _random_digests(1000, seed=3)
+    others = _random_digests(1000, seed=4)
+    bloom = BloomFilter.from_digests(members, len(members), fp_rate=0.05)
+    bloom_file = temp_dir / "cracked.bloom"
+    bloom.save(str(bloom_file), source_size=10, source_mtime_ns=20)
+    
+    loaded = BloomFilter.open(str(bloom_file))
+    try:
+        assert (loaded.num_bits, loaded.num_hashes) == (bloom.num_bits, bloom.num_hashes)
+        assert (loaded.source_size, loaded.source_mtime_ns) == (10, 20)
+        for digest in members + others:
+            assert loaded.might_contain(digest) == bloom.might_contain(digest)
+    finally:
+        loaded.close()
+
+def test_process_password_files_with_bloom(temp_dir):
+    """Test that the Bloom prefilter does not change the matches."""
+    from credforge.combine_list_passwords import process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    with open(cracked_file, 'w', encoding='utf-8') as f:
+        for i in range(0, 2000, 10):
+            f.write(f"{i:032x}:password{i}\n")
+        f.write("hash1:password1\n")
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        for i in range(2000):
+            f.write(f"user{i}:{i}:aad3b435b51404eeaad3b435b51404ee:{i:032x}:::\n")
+        f.write("user1:1:aad3b435b51404eeaad3b435b51404ee:hash1:::\n")
+    
+    plain_output = temp_dir / "plain.txt"
+    assert process_password_files(str(cracked_file), str(hash_file), str(plain_output))
+    expected = plain_output.read_text(encoding='utf-8')
+    assert len(expected.splitlines()) == 201
+    
+    bloom_output = temp_dir / "bloom.txt"
+    assert process_password_files(str(cracked_file), str(hash_file), str(bloom_output),
+                                  compact_index=True, bloom_fp=0.01)
+    assert bloom_output.read_text(encoding='utf-8') == expected
+    
+    # With an index file the filter is stored next to it and reused
+    index_file = temp_dir / "cracked.idx"
+    mapped_output = temp_dir / "mapped.txt"
+    for _ in range(2):
+        assert process_password_files(str(cracked_file), str(hash_file), str(mapped_output),
+                                      index_file=str(index_file), bloom_fp=0.01)
+        # The index file leaves out the non-NTLM potfile entry
+        assert mapped_output.read_text(encoding='utf-8') == \
+            expected.replace("user1:hash1:password1\n", "")
+    assert (temp_dir / "cracked.idx.bloom").exists()
+
+def test_bloom_requires_an_index(temp_dir, capsys):
+    """Test that --bloom is rejected, and skipped by the API, for a plain dictionary lookup."""
+    from credforge.combine_list_passwords import parse_args, process_password_files
+    
+    with pytest.raises(SystemExit):
+        parse_args(['-c', 'cracked.txt', '-n', 'hashes.txt', '--bloom'])
+    assert "--bloom requires --compact-index or --index" in capsys.readouterr().err
+    assert parse_args(['-c', 'cracked.txt', '--compact-index', '--bloom']).bloom == 0.01
+    
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text(f"{1:032x}:password1\n", encoding='utf-8')
+    hash_file = temp_dir / "hashes.txt"
+    hash_file.write_text(f"user1:1:aad3b435b51404eeaad3b435b51404ee:{1:032x}:::\n", encoding='utf-8')
+    output_file = temp_dir / "output.txt"
+    assert process_password_files(str(cracked_file), str(hash_file), str(output_file), bloom_fp=0.01)
+    assert "skipping the filter" in capsys.readouterr().out
+    assert output_file.read_text(encoding='utf-8') == f"user1:{1:032x}:password1\n"
@@ -93,3 +93,233 @@ def test_process_password_files_empty_files(temp_dir):
     # Verify the output file was created but is empty
     assert output_file.exists()
     assert output_file.stat().st_size == 0
+
+def test_match_hash_file_streams_matches(temp_dir):
+    """Test that matches are written in order and only a bounded preview is kept."""
+    import io
+    from credforge.combine_list_passwords import match_hash_file, PREVIEW_LIMIT
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        for i in range(20):
+            f.write(f"user{i}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:HASH{i}:::\n")
+    
+    hash_to_password = {f"hash{i}": f"password{i}" for i in range(0, 20, 2)}
+    out = io.StringIO()
+    preview = []
+    
+    processed_lines, match_count = match_hash_file(hash_to_password, str(hash_file), out, preview)
+    
+    assert processed_lines == 20
+    assert match_count == 10
+    assert out.getvalue().splitlines() == [f"user{i}:hash{i}:password{i}" for i in range(0, 20, 2)]
+    assert preview == out.getvalue().splitlines()[:PREVIEW_LIMIT]
+
+def test_process_password_files_workers_match_serial(temp_dir, capsys):
+    """Test that multi-process matching writes the same output and warnings as the serial path."""
+    from credforge.combine_list_passwords import process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    with open(cracked_file, 'w', encoding='utf-8') as f:
+        for i in range(0, 6000, 7):
+            f.write(f"{i:032x}:password{i}\n")
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        for i in range(6000):
+            if i % 1000 == 999:
+                f.write(f"malformed line {i}\n")
+            f.write(f"DOMAIN\\user{i}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:{i:032X}:::\n")
+    
+    serial_output = temp_dir / "serial.txt"
+    parallel_output = temp_dir / "parallel.txt"
+    
+    assert process_password_files(str(cracked_file), str(hash_file), str(serial_output))
+    serial_log = capsys.readouterr().out
+    assert process_password_files(str(cracked_file), str(hash_file), str(parallel_output), workers=3)
+    parallel_log = capsys.readouterr().out
+    
+    assert parallel_output.read_text(encoding='utf-8') == serial_output.read_text(encoding='utf-8')
+    assert len(serial_output.read_text(encoding='utf-8').splitlines()) == len(range(0, 6000, 7))
+    assert parallel_log.replace("parallel.txt", "serial.txt") == serial_log
+
+def test_process_batch(temp_dir):
+    """Test matching several dumps against one cracked file in a single run."""
+    from credforge.combine_list_passwords import process_batch, expand_hash_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    with open(cracked_file, 'w', encoding='utf-8') as f:
+        f.write("hash1:password1\nhash2:password2\nhash3:password3\n")
+    
+    dumps_dir = temp_dir / "dumps"
+    dumps_dir.mkdir()
+    (dumps_dir / "corp.ntds").write_text(
+        "CORP\\user1:1001:aad3b435b51404eeaad3b435b51404ee:hash1:::\n"
+        "CORP\\user4:1004:aad3b435b51404eeaad3b435b51404ee:hash4:::\n", encoding='utf-8')
+    (dumps_dir / "lab.ntds").write_text(
+        "LAB\\user2:1002:aad3b435b51404eeaad3b435b51404ee:hash2:::\n"
+        "LAB\\user3:1003:aad3b435b51404eeaad3b435b51404ee:hash3:::\n", encoding='utf-8')
+    
+    hash_files = expand_hash_files([str(dumps_dir / "*.ntds")])
+    assert [Path(p).name for p in hash_files] == ["corp.ntds", "lab.ntds"]
+    
+    output_dir = temp_dir / "matched"
+    assert process_batch(str(cracked_file), hash_files, str(output_dir), workers=2)
+    
+    assert (output_dir / "corp_matched.txt").read_text(encoding='utf-8') == \
+        "CORP\\user1:hash1:password1\n"
+    assert (output_dir / "lab_matched.txt").read_text(encoding='utf-8') == \
+        "LAB\\user2:hash2:password2\nLAB\\user3:hash3:password3\n"
+    
+    summary = (output_dir / "batch_summary.txt").read_text(encoding='utf-8').splitlines()
+    assert len(summary) == 4  # Header, two dumps, total
+    assert summary[-1].startswith("TOTAL\t\t4\t3\t")
+
+def test_process_batch_missing_file(temp_dir):
+    """Test that batch mode refuses to start when a dump is missing."""
+    from credforge.combine_list_passwords import process_batch
+    
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text("hash1:password1\n", encoding='utf-8')
+    
+    assert not process_batch(str(cracked_file), [str(temp_dir / "missing.ntds")],
+                             str(temp_dir / "matched"))
+
+def test_process_password_files_join_sides_agree(temp_dir):
+    """Test that indexing either input produces identical output."""
+    from credforge.combine_list_passwords import process_password_files, choose_join_side
+    
+    # A large potfile with a repeated hash (the last entry wins) and a small dump
+    cracked_file = temp_dir / "cracked.txt"
+    with open(cracked_file, 'w', encoding='utf-8') as f:
+        for i in range(500):
+            f.write(f"{i:032x}:password{i}\n")
+        f.write(f"{7:032X}:newer:password\n")
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        f.write(f"CORP\\user7:1007:aad3b435b51404eeaad3b435b51404ee:{7:032x}:::\n")
+        f.write(f"CORP\\user9999:1008:aad3b435b51404eeaad3b435b51404ee:{9999:032x}:::\n")
+        f.write("not an ntds line\n")
+        f.write(f"CORP\\user3:1003:aad3b435b51404eeaad3b435b51404ee:{3:032x}:::\n")
+        f.write(f"CORP\\copy7:1009:aad3b435b51404eeaad3b435b51404ee:{7:032x}:::\n")
+    
+    assert choose_join_side(str(cracked_file), str(hash_file)) == 'hashes'
+    
+    outputs = {}
+    for side in ('cracked', 'hashes', 'auto'):
+        output_file = temp_dir / f"output_{side}.txt"
+        assert process_password_files(str(cracked_file), str(hash_file), str(output_file),
+                                      join_side=side)
+        outputs[side] = output_file.read_text(encoding='utf-8')
+    
+    assert outputs['hashes'] == outputs['cracked'] == outputs['auto']
+    assert outputs['cracked'].splitlines() == [
+        f"CORP\\user7:{7:032x}:newer:password",
+        f"CORP\\user3:{3:032x}:password3",
+        f"CORP\\copy7:{7:032x}:newer:password",
+    ]
+
+def test_process_password_files_hashes_side_rejects_index_options(temp_dir):
+    """Test that indexing the hash file cannot be combined with cracked-side options."""
+    from credforge.combine_list_passwords import process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text("hash1:password1\n", encoding='utf-8')
+    hash_file = temp_dir / "hashes.txt"
+    hash_file.write_text("user1:1001:aad3b435b51404eeaad3b435b51404ee:hash1:::\n", encoding='utf-8')
+    
+    assert not process_password_files(str(cracked_file), str(hash_file),
+                                      str(temp_dir / "output.txt"),
+                                      workers=2, join_side='hashes')
+
+def test_potfile_follower_reads_only_appended_lines(temp_dir):
+    """Test that follow mode emits new cracks incrementally and handles partial lines."""
+    from credforge.combine_list_passwords import PotfileFollower
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        for i in range(1, 4):
+            f.write(f"CORP\\user{i}:100{i}:aad3b435b51404eeaad3b435b51404ee:{i:032x}:::\n")
+        f.write(f"CORP\\copy1:1009:aad3b435b51404eeaad3b435b51404ee:{1:032x}:::\n")
+    
+    potfile = temp_dir / "hashcat.potfile"
+    output_file = temp_dir / "output.txt"
+    with open(output_file, 'w', encoding='utf-8') as out:
+        follower = PotfileFollower(str(potfile), str(hash_file), out)
+        assert follower.poll() == 0  # potfile not created yet
+        
+        potfile.write_text(f"{1:032x}:first\n{2:032x}:sec", encoding='utf-8')
+        assert follower.poll() == 2
+        assert output_file.read_text(encoding='utf-8').splitlines() == [
+            f"CORP\\user1:{1:032x}:first",
+            f"CORP\\copy1:{1:032x}:first",
+        ]
+        
+        # Complete the partial line and crack hash 1 again; it is not emitted twice
+        with open(potfile, 'a', encoding='utf-8') as f:
+            f.write(f"ond\n{1:032x}:again\n{3:032X}:third\n")
+        assert follower.poll() == 2
+        assert follower.poll() == 0
+        
+        # A truncated potfile is rescanned without duplicating earlier matches
+        potfile.write_text(f"{2:032x}:second\n", encoding='utf-8')
+        assert follower.poll() == 0
+    
+    assert output_file.read_text(encoding='utf-8').splitlines()[2:] == [
+        f"CORP\\user2:{2:032x}:second",
+        f"CORP\\user3:{3:032x}:third",
+    ]
+    assert follower.match_count == 4
+    assert follower.pending_hashes == 0
+
+def test_follow_password_files_matches_existing_entries(temp_dir):
+    """Test that follow mode matches what is already in the potfile, like a normal run."""
+    from credforge.combine_list_passwords import follow_password_files, process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    # Hash 1 is cracked twice; as in a normal run, the later entry wins
+    cracked_file.write_text(f"{1:032x}:password1\n{3:032x}:password3\n{5:032x}:password5\n"
+                            f"{1:032x}:updated1\n", encoding='utf-8')
+    hash_file = temp_dir / "hashes.txt"
+    hash_file.write_text(
+        f"user1:1001:aad3b435b51404eeaad3b435b51404ee:{1:032x}:::\n"
+        f"user3:1003:aad3b435b51404eeaad3b435b51404ee:{3:032x}:::\n"
+        f"user2:1002:aad3b435b51404eeaad3b435b51404ee:{2:032x}:::\n"
+        f"copy1:1004:aad3b435b51404eeaad3b435b51404ee:{1:032x}:::\n", encoding='utf-8')
+    
+    followed = temp_dir / "followed.txt"
+    assert follow_password_files(str(cracked_file), str(hash_file), str(followed),
+                                 poll_interval=0, max_polls=2)
+    expected = temp_dir / "expected.txt"
+    assert process_password_files(str(cracked_file), str(hash_file), str(expected))
+    assert followed.read_text(encoding='utf-8') == expected.read_text(encoding='utf-8')
+    assert followed.read_text(encoding='utf-8').splitlines() == [
+        f"user1:{1:032x}:updated1",
+        f"user3:{3:032x}:password3",
+        f"copy1:{1:032x}:updated1",
+    ]
+
+def test_potfile_follower_reads_in_blocks(temp_dir, monkeypatch):
+    """Test that a large backlog is read in bounded blocks, carrying partial lines over."""
+    from credforge import combine_list_passwords
+    
+    monkeypatch.setattr(combine_list_passwords, 'FOLLOW_READ_SIZE', 50)
+    hash_file = temp_dir / "hashes.txt"
+    hash_file.write_text("".join(
+        f"user{i}:{i}:aad3b435b51404eeaad3b435b51404ee:{i:032x}:::\n" for i in range(20)),
+        encoding='utf-8')
+    potfile = temp_dir / "hashcat.potfile"
+    potfile.write_text("".join(f"{i:032x}:pw{i}\n" for i in range(0, 20, 2)) + f"{1:032x}:pw",
+                       encoding='utf-8')
+    
+    output_file = temp_dir / "output.txt"
+    with open(output_file, 'w', encoding='utf-8') as out:
+        follower = combine_list_passwords.PotfileFollower(str(potfile), str(hash_file), out)
+        assert follower.poll() == 10
+        with open(potfile, 'a', encoding='utf-8') as f:
+            f.write("1\n")
+        assert follower.poll() == 1
+    
+    assert output_file.read_text(encoding='utf-8').splitlines() == [
+        f"user{i}:{i:032x}:pw{i}" for i in range(0, 20, 2)] + [f"user1:{1:032x}:pw1"]
@@ -0,0 +1,55 @@
+"""
+Unit tests for fileutils.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def test_split_line_ranges(temp_dir):
+    """Test that ranges cover the whole file and end on line boundaries."""
+    from credforge.fileutils import split_line_ranges, read_range
+    
+    input_file = temp_dir / "lines.txt"
+    lines = [f"line number {i} " + "x" * (i % 50) for i in range(20000)]
+    with open(input_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))  # No trailing newline
+    
+    ranges = split_line_ranges(str(input_file), workers=4)
+    
+    assert len(ranges) > 1
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == input_file.stat().st_size
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert end == start
+    
+    chunks = [read_range(str(input_file), start, end) for start, end in ranges]
+    for chunk in chunks[:-1]:
+        assert chunk.endswith(b'\n')
+    assert b''.join(chunks).decode('utf-8').split('\n') == lines
+
+def test_split_line_ranges_empty_file(temp_dir):
+    """Test that an empty file produces no ranges."""
+    from credforge.fileutils import split_line_ranges
+    
+    input_file = temp_dir / "empty.txt"
+    input_file.touch()
+    
+    assert split_line_ranges(str(input_file), workers=4) == []
+
+def test_external_sort_spills_runs(temp_dir, monkeypatch):
+    """Test that sorting through disk runs matches an in-memory stable sort."""
+    import random
+    from credforge import fileutils
+    
+    rng = random.Random(14)
+    items = [f"{rng.randrange(500):03d}:{i}".encode() for i in range(5000)]
+    key = lambda item: item.split(b':')[0]
+    expected = sorted(items, key=key)
+    
+    assert list(fileutils.external_sort(items, key)) == expected
+    
+    # A tiny budget gives hundreds of runs, merged in several passes
+    monkeypatch.setattr(fileutils, 'MAX_MERGE_RUNS', 8)
+    result = list(fileutils.external_sort(items, key, max_memory=2000, temp_dir=str(temp_dir)))
+    assert result == expected
+    assert not list(temp_dir.glob('credforge_sort_*'))
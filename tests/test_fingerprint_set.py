@@ -0,0 +1,48 @@
+"""
+Unit tests for fingerprint_set.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_fingerprint_set(bits):
+    """Test adding, membership and growth beyond the preallocated capacity."""
+    from credforge.fingerprint_set import FingerprintSet, MIN_SLOTS
+    
+    fingerprints = FingerprintSet(capacity=10, bits=bits)
+    lines = [f"line{i}".encode() for i in range(5 * MIN_SLOTS)]
+    assert all(fingerprints.add(line) for line in lines)
+    assert not any(fingerprints.add(line) for line in lines[::7])
+    assert len(fingerprints) == len(lines)
+    assert all(line in fingerprints for line in lines)
+    assert b"missing" not in fingerprints
+    # Table size stays within the load factor bounds: at most 8 bytes per word / 0.35
+    assert fingerprints.nbytes <= len(lines) * (bits // 8) / 0.35 + MIN_SLOTS * 16
+
+def test_fingerprint_set_offsets():
+    """Test that add_offset returns the offset of the first line with a fingerprint."""
+    from credforge.fingerprint_set import FingerprintSet
+    
+    fingerprints = FingerprintSet(bits=64, with_offsets=True)
+    offsets = [fingerprints.add_offset(line, offset)
+               for offset, line in enumerate([b"a", b"b", b"a", b"c", b"b"])]
+    assert offsets == [None, None, 0, None, 1]
+    # Offsets survive growth
+    for i in range(5000):
+        fingerprints.add_offset(str(i).encode(), 100 + i)
+    assert fingerprints.add_offset(b"b", 99) == 1
+    assert fingerprints.add_offset(b"4999", 99) == 5099
+    
+    with pytest.raises(ValueError):
+        FingerprintSet().add_offset(b"a", 0)
+    with pytest.raises(ValueError):
+        FingerprintSet(bits=32)
+
+def test_collision_probability():
+    """Test the documented collision probabilities."""
+    from credforge.fingerprint_set import collision_probability
+    
+    assert collision_probability(10 ** 9) == pytest.approx(0.0267, abs=1e-4)
+    assert collision_probability(10 ** 9, bits=128) == pytest.approx(1.47e-21, rel=0.01)
+    assert collision_probability(1) == 0
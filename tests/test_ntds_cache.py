@@ -0,0 +1,104 @@
+"""
+Unit tests for ntds_cache.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+LM = "aad3b435b51404eeaad3b435b51404ee"
+
+def write_dump(path):
+    """Write a dump mixing canonical, machine, disabled and malformed lines."""
+    lines = [
+        f"CORP\\Administrator:500:{LM}:{'a' * 32}:::",
+        f"CORP\\alice:1104:{LM}:{'c' * 32}:disabled:false:false:false",
+        f"LAB\\WKS01$:1105:{LM}:31d6cfe0d16ae931b73c59d7e0c089c0:enabled:false:false:false",
+        f"bob:1106:{LM}:{'C' * 32}:::",
+        "",
+        "not an ntds line",
+        f"CORP\\carol:0042:{LM}:{'d' * 32}:::",
+        f"CORP\\dave:1107:{LM}:{'a' * 32}:::",
+    ]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return lines
+
+def test_import_ntds_round_trip(temp_dir):
+    """Test that a cache reproduces the dump and records its statistics."""
+    from credforge.ntds_cache import (NTDSCache, import_ntds, is_ntds_cache, is_cache_current,
+                                      FLAG_DISABLED, FLAG_MACHINE, FLAG_EMPTY_NT, FLAG_RAW)
+    
+    dump_file = temp_dir / "dump.ntds"
+    lines = write_dump(dump_file)
+    cache_file = temp_dir / "dump.ntdsc"
+    
+    assert import_ntds(str(dump_file), str(cache_file)) == len(lines)
+    assert is_ntds_cache(str(cache_file))
+    assert not is_ntds_cache(str(dump_file))
+    assert is_cache_current(str(cache_file), str(dump_file))
+    
+    cache = NTDSCache.open(str(cache_file))
+    try:
+        assert len(cache) == len(lines)
+        assert [line.decode('utf-8') for line in cache.iter_lines()] == lines
+        assert [line.decode('utf-8') for line in cache.iter_lines(1, 3)] == lines[1:3]
+        
+        # Upper-case hashes, blank lines, malformed lines and padded RIDs are stored verbatim
+        assert cache.count_flag(FLAG_RAW) == 4
+        assert cache.count_flag(FLAG_DISABLED) == 1
+        assert cache.count_flag(FLAG_MACHINE) == 1
+        assert cache.count_flag(FLAG_EMPTY_NT) == 1
+        assert cache.domain_counts() == {'CORP': 3, 'LAB': 1}
+    finally:
+        cache.close()
+    
+    with open(dump_file, 'a', encoding='utf-8') as f:
+        f.write("eve:1108:x:y:::\n")
+    assert not is_cache_current(str(cache_file), str(dump_file))
+
+def test_process_ntds_from_cache_matches_text(temp_dir, capsys):
+    """Test that process_ntds gives the same output and statistics from a cache."""
+    from credforge.ntds_cache import import_ntds
+    from credforge.process_ntds import process_ntds_file, route_ntds_file, STANDARD_ROUTES
+    
+    dump_file = temp_dir / "dump.ntds"
+    write_dump(dump_file)
+    cache_file = temp_dir / "dump.ntdsc"
+    import_ntds(str(dump_file), str(cache_file))
+    
+    def summary(output):
+        return [line for line in output.splitlines()
+                if line.startswith(("Total", "Disabled", "Active", "  "))]
+    
+    for source in (dump_file, cache_file):
+        out_dir = temp_dir / source.suffix[1:]
+        out_dir.mkdir()
+        process_ntds_file(str(source), str(out_dir / "filtered.ntds"))
+        route_ntds_file(str(source), [(spec, str(out_dir / name)) for spec, name in STANDARD_ROUTES])
+    
+    text_output, cache_output = capsys.readouterr().out.split("Processing " + str(cache_file), 1)
+    assert summary(text_output) == [line.replace('/ntdsc/', '/ntds/')
+                                    for line in summary(cache_output)]
+    for name in ["filtered.ntds"] + [name for _, name in STANDARD_ROUTES]:
+        assert (temp_dir / "ntds" / name).read_bytes() == (temp_dir / "ntdsc" / name).read_bytes()
+
+def test_combine_from_cache_matches_text(temp_dir):
+    """Test that combine_list_passwords accepts a cache in place of the dump."""
+    from credforge.ntds_cache import import_ntds
+    from credforge.combine_list_passwords import process_password_files
+    
+    dump_file = temp_dir / "dump.ntds"
+    write_dump(dump_file)
+    cache_file = temp_dir / "dump.ntdsc"
+    import_ntds(str(dump_file), str(cache_file))
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text(f"{'a' * 32}:Summer2024!\n{'c' * 32}:Winter1\n{'d' * 32}:pw\n",
+                            encoding='utf-8')
+    
+    expected = temp_dir / "expected.txt"
+    assert process_password_files(str(cracked_file), str(dump_file), str(expected),
+                                  join_side='cracked')
+    assert len(expected.read_text(encoding='utf-8').splitlines()) == 5
+    for options in ({'join_side': 'cracked'}, {'join_side': 'hashes'}, {'workers': 2}):
+        output = temp_dir / "output.txt"
+        assert process_password_files(str(cracked_file), str(cache_file), str(output), **options)
+        assert output.read_text(encoding='utf-8') == expected.read_text(encoding='utf-8')
@@ -0,0 +1,82 @@
+"""
+Unit tests for ntds_clusters.py
+"""
+import random
+from pathlib import Path
+import pytest
+
+LM = "aad3b435b51404eeaad3b435b51404ee"
+EMPTY = "31d6cfe0d16ae931b73c59d7e0c089c0"
+
+def write_dump(path):
+    """Write a dump with shared, unique, empty and upper-case hashes."""
+    lines = [
+        f"CORP\\Administrator:500:{LM}:{'a' * 32}:::",
+        f"CORP\\alice:1104:{LM}:{'b' * 32}:::",
+        f"CORP\\svc_sql:1105:{LM}:{'a' * 32}:::",
+        f"CORP\\Guest:501:{LM}:{EMPTY}:::",
+        "not an ntds line",
+        f"CORP\\bob:1106:{LM}:{'A' * 32}:::",
+        f"CORP\\krbtgt:502:{LM}:{'c' * 32}:::",
+        f"LAB\\WKS01$:1107:{LM}:{EMPTY}:::",
+        f"CORP\\carol:1108:{LM}:{'b' * 32}:::",
+    ]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def test_find_hash_clusters(temp_dir):
+    """Test that accounts sharing a hash are grouped, largest cluster first."""
+    from credforge.ntds_clusters import find_hash_clusters, write_cluster_report
+
+    dump_file = temp_dir / "dump.ntds"
+    write_dump(dump_file)
+
+    clusters, stats = find_hash_clusters(str(dump_file))
+
+    assert stats == {'accounts': 8, 'distinct_hashes': 4, 'partitions': 0}
+    assert [(c.nt_hash, [m.account for m in c.members]) for c in clusters] == [
+        ('a' * 32, ['CORP\\Administrator', 'CORP\\svc_sql', 'CORP\\bob']),
+        ('b' * 32, ['CORP\\alice', 'CORP\\carol']),
+        (EMPTY, ['CORP\\Guest', 'LAB\\WKS01$']),
+    ]
+    assert [c.privileged_count for c in clusters] == [1, 0, 0]
+    assert clusters[0].members[0].rid == 500
+
+    report_file = temp_dir / "clusters.txt"
+    write_cluster_report(clusters, str(report_file))
+    report = report_file.read_text(encoding='utf-8')
+    assert f"NT hash {'a' * 32}: 3 accounts, 1 privileged\n" in report
+    assert "    CORP\\Administrator (RID 500, privileged)\n" in report
+    assert f"NT hash {EMPTY} (empty password): 2 accounts, 0 privileged\n" in report
+
+    clusters, _ = find_hash_clusters(str(dump_file), min_size=3)
+    assert len(clusters) == 1
+
+def test_find_hash_clusters_cache_and_spill_match(temp_dir):
+    """Test that cache input and spilling to partitions give the same clusters."""
+    from credforge.ntds_cache import import_ntds
+    from credforge.ntds_clusters import find_hash_clusters
+
+    rng = random.Random(13)
+    hashes = [rng.randbytes(16).hex() for _ in range(300)]
+    chosen = [rng.choice(hashes) for _ in range(2000)]
+    dump_file = temp_dir / "big.ntds"
+    with open(dump_file, 'w', encoding='utf-8') as f:
+        for i, nt_hash in enumerate(chosen):
+            f.write(f"CORP\\user{i}:{1000 + i}:{LM}:{nt_hash}:::\n")
+    cache_file = temp_dir / "big.ntdsc"
+    import_ntds(str(dump_file), str(cache_file))
+
+    expected, stats = find_hash_clusters(str(dump_file))
+    assert stats['partitions'] == 0
+    assert sum(len(c.members) for c in expected) == sum(
+        1 for nt_hash in chosen if chosen.count(nt_hash) > 1)
+
+    from_cache, _ = find_hash_clusters(str(cache_file))
+    assert from_cache == expected
+
+    spilled, stats = find_hash_clusters(str(dump_file), memory_limit=4096,
+                                        spill_dir=str(temp_dir))
+    assert stats['partitions'] >= 2
+    assert stats['accounts'] == 2000 and stats['distinct_hashes'] == len(set(chosen))
+    assert spilled == expected
+    assert not list(Path(temp_dir).glob('ntds_clusters_*'))
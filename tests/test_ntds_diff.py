@@ -0,0 +1,98 @@
+"""
+Unit tests for ntds_diff.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+LM = "aad3b435b51404eeaad3b435b51404ee"
+
+def write_lines(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def test_diff_ntds_files(temp_dir):
+    """Test that added, removed, re-hashed and re-enabled accounts are reported."""
+    from credforge.ntds_diff import diff_ntds_files
+    
+    old_file = temp_dir / "old.ntds"
+    new_file = temp_dir / "new.ntds"
+    write_lines(old_file, [
+        f"CORP\\alice:1104:{LM}:{'a' * 32}:enabled:false:false:false",
+        f"CORP\\bob:1105:{LM}:{'b' * 32}:enabled:false:false:false",
+        f"CORP\\carol:1106:{LM}:{'c' * 32}:disabled:false:false:false",
+        f"LAB\\dave:1107:{LM}:{'d' * 32}:enabled:false:false:false",
+        f"CORP\\erin:1108:{LM}:{'e' * 32}:enabled:false:false:false",
+    ])
+    write_lines(new_file, [
+        f"LAB\\frank:1109:{LM}:{'f' * 32}:enabled:false:false:false",
+        f"corp\\ALICE:1104:{LM}:{'A' * 32}:enabled:false:false:false",
+        "",
+        f"CORP\\carol:1106:{LM}:{'9' * 32}:enabled:false:false:false",
+        f"CORP\\bob:1105:{LM}:{'0' * 32}:enabled:false:false:false",
+        f"CORP\\erin:1108:{LM}:{'e' * 32}:disabled:false:false:false",
+    ])
+    output_dir = temp_dir / "delta"
+    
+    counts = diff_ntds_files(str(old_file), str(new_file), str(output_dir))
+    
+    assert counts == {'added': 1, 'removed': 1, 'changed_hash': 2, 'status_changed': 2,
+                      'unchanged': 1, 'duplicates': 0}
+    read = lambda name: (output_dir / name).read_text(encoding='utf-8').splitlines()
+    assert read('added.ntds') == [f"LAB\\frank:1109:{LM}:{'f' * 32}:enabled:false:false:false"]
+    assert read('removed.ntds') == [f"LAB\\dave:1107:{LM}:{'d' * 32}:enabled:false:false:false"]
+    assert [line.split(':')[0] for line in read('changed_hash.ntds')] == ['CORP\\bob', 'CORP\\carol']
+    assert [line.split(':')[0] for line in read('status_changed.ntds')] == ['CORP\\carol', 'CORP\\erin']
+
+def test_diff_ntds_files_repeated_accounts(temp_dir):
+    """Test that an account listed more than once is compared by its last line."""
+    from credforge.ntds_diff import diff_ntds_files
+    
+    old_file = temp_dir / "old.ntds"
+    new_file = temp_dir / "new.ntds"
+    write_lines(old_file, [
+        f"CORP\\alice:1104:{LM}:{'0' * 32}:enabled:false:false:false",
+        f"CORP\\bob:1105:{LM}:{'b' * 32}:enabled:false:false:false",
+        f"CORP\\alice:1104:{LM}:{'a' * 32}:enabled:false:false:false",
+    ])
+    write_lines(new_file, [
+        f"CORP\\alice:1104:{LM}:{'a' * 32}:enabled:false:false:false",
+        f"CORP\\bob:1105:{LM}:{'b' * 32}:enabled:false:false:false",
+        f"CORP\\bob:1105:{LM}:{'c' * 32}:enabled:false:false:false",
+    ])
+    output_dir = temp_dir / "delta"
+    
+    counts = diff_ntds_files(str(old_file), str(new_file), str(output_dir))
+    
+    assert counts == {'added': 0, 'removed': 0, 'changed_hash': 1, 'status_changed': 0,
+                      'unchanged': 1, 'duplicates': 2}
+    assert (output_dir / 'changed_hash.ntds').read_text(encoding='utf-8') == \
+        f"CORP\\bob:1105:{LM}:{'c' * 32}:enabled:false:false:false\n"
+
+def test_diff_ntds_files_external_sort(temp_dir):
+    """Test that a diff sorted through disk runs and read from a cache matches."""
+    import random
+    from credforge.ntds_cache import import_ntds
+    from credforge.ntds_diff import DIFF_FILES, diff_ntds_files
+    
+    rng = random.Random(14)
+    old_lines = [f"CORP\\user{i}:{1000 + i}:{LM}:{rng.getrandbits(128):032x}:::" for i in range(3000)]
+    new_lines = [line for line in old_lines if rng.random() > 0.05]
+    new_lines[::7] = [line.replace(':::', ':disabled:false:false:false') for line in new_lines[::7]]
+    new_lines += [f"CORP\\new{i}:{5000 + i}:{LM}:{'1' * 32}:::" for i in range(100)]
+    rng.shuffle(new_lines)
+    old_file = temp_dir / "old.ntds"
+    new_file = temp_dir / "new.ntds"
+    write_lines(old_file, old_lines)
+    write_lines(new_file, new_lines)
+    
+    expected = diff_ntds_files(str(old_file), str(new_file), str(temp_dir / "memory"))
+    assert expected['added'] == 100
+    assert expected['removed'] == 3100 - len(new_lines)
+    
+    cache_file = temp_dir / "new.ntdsc"
+    import_ntds(str(new_file), str(cache_file))
+    counts = diff_ntds_files(str(old_file), str(cache_file), str(temp_dir / "disk"),
+                             max_memory=20000, temp_dir=str(temp_dir))
+    assert counts == expected
+    for name in DIFF_FILES.values():
+        assert (temp_dir / "disk" / name).read_bytes() == (temp_dir / "memory" / name).read_bytes()
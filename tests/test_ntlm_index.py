@@ -0,0 +1,174 @@
+"""
+Unit tests for ntlm_index.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def test_ntlm_index_lookup():
+    """Test lookups against the compact index behave like a dictionary."""
+    from credforge.ntlm_index import NTLMIndex
+    
+    pairs = [
+        ("8846f7eaee8fb117ad06bdd830b7586c", "password"),
+        ("31d6cfe0d16ae931b73c59d7e0c089c0", ""),
+        ("8846f7eaee8fb117ad06bdd830b7586c", "password:updated"),  # Later entry wins
+        ("64f12cddaa88057e06a81b54e73b949b", "Pässwort1"),
+        ("hash1", "password1"),  # Not an NTLM digest
+    ]
+    index = NTLMIndex.from_pairs(pairs)
+    
+    assert len(index) == 4
+    assert index.get("8846f7eaee8fb117ad06bdd830b7586c") == "password:updated"
+    assert index.get("31d6cfe0d16ae931b73c59d7e0c089c0") == ""
+    assert index.get("64f12cddaa88057e06a81b54e73b949b") == "Pässwort1"
+    assert index.get("hash1") == "password1"
+    assert "hash1" in index
+    assert "5fbc3d5fec8206a30f4b6c473d68ae76" not in index
+    assert index.get("5fbc3d5fec8206a30f4b6c473d68ae76", "missing") == "missing"
+
+def test_ntlm_index_matches_dict(temp_dir):
+    """Test the index returns the same passwords as a dict over a shared bucket prefix."""
+    from credforge.ntlm_index import NTLMIndex
+    
+    # Many digests sharing the same two-byte prefix exercise the in-bucket search
+    pairs = [(f"abcd{i:028x}", f"pw{i}") for i in range(0, 3000, 3)]
+    pairs += [(f"{i:032x}", f"low{i}") for i in range(500)]
+    expected = dict(pairs)
+    index = NTLMIndex.from_pairs(reversed(pairs))
+    
+    assert len(index) == len(expected)
+    for hash_value, password in expected.items():
+        assert index.get(hash_value) == password
+    for i in range(1, 3000, 3):
+        assert index.get(f"abcd{i:028x}") is None
+
+def test_process_password_files_compact_index(temp_dir):
+    """Test that the compact index produces the same output as the dictionary."""
+    from credforge.combine_list_passwords import process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    with open(cracked_file, 'w', encoding='utf-8') as f:
+        f.write("8846F7EAEE8FB117AD06BDD830B7586C:password\n")
+        f.write("64f12cddaa88057e06a81b54e73b949b:Summer2024!\n")
+        f.write("hash1:password1\n")
+    
+    hash_file = temp_dir / "hashes.txt"
+    with open(hash_file, 'w', encoding='utf-8') as f:
+        f.write("CORP\\bob:1003:aad3b435b51404eeaad3b435b51404ee:8846f7eaee8fb117ad06bdd830b7586c:::\n")
+        f.write("CORP\\jane:1002:aad3b435b51404eeaad3b435b51404ee:64F12CDDAA88057E06A81B54E73B949B:::\n")
+        f.write("CORP\\john:1001:aad3b435b51404eeaad3b435b51404ee:5fbc3d5fec8206a30f4b6c473d68ae76:::\n")
+        f.write("user1:1004:aad3b435b51404eeaad3b435b51404ee:hash1:::\n")
+    
+    dict_output = temp_dir / "dict_output.txt"
+    compact_output = temp_dir / "compact_output.txt"
+    assert process_password_files(str(cracked_file), str(hash_file), str(dict_output))
+    assert process_password_files(str(cracked_file), str(hash_file), str(compact_output),
+                                  compact_index=True)
+    
+    assert compact_output.read_text(encoding='utf-8') == dict_output.read_text(encoding='utf-8')
+    assert compact_output.read_text(encoding='utf-8').splitlines() == [
+        "CORP\\bob:8846f7eaee8fb117ad06bdd830b7586c:password",
+        "CORP\\jane:64f12cddaa88057e06a81b54e73b949b:Summer2024!",
+        "user1:hash1:password1",
+    ]
+
+def test_ntlm_index_save_and_open(temp_dir):
+    """Test that a saved index can be memory-mapped and queried."""
+    from credforge.ntlm_index import NTLMIndex
+    
+    pairs = [(f"{i * 7919:032x}", f"password{i}") for i in range(200)]
+    pairs.append(("hash1", "password:with:colons"))
+    index_file = temp_dir / "cracked.idx"
+    NTLMIndex.from_pairs(pairs).save(str(index_file), source_size=123, source_mtime_ns=456)
+    
+    index = NTLMIndex.open(str(index_file))
+    try:
+        assert len(index) == 200
+        assert index.source_size == 123
+        assert index.source_mtime_ns == 456
+        for hash_value, password in pairs[:-1]:
+            assert index.get(hash_value) == password
+        assert index.get(f"{1:032x}") is None
+        # Non-NTLM keys are only counted in the saved file
+        assert index.skipped_keys == 1
+        assert index.get("hash1") is None
+    finally:
+        index.close()
+
+def test_ntlm_index_open_rejects_other_files(temp_dir):
+    """Test that opening a file that is not an index raises ValueError."""
+    from credforge.ntlm_index import NTLMIndex
+    
+    not_index = temp_dir / "cracked.txt"
+    not_index.write_text("8846f7eaee8fb117ad06bdd830b7586c:password\n" * 10, encoding='utf-8')
+    
+    with pytest.raises(ValueError):
+        NTLMIndex.open(str(not_index))
+
+def test_build_index_file_skips_non_ntlm_keys(temp_dir, capsys):
+    """Test that other hash types in a shared potfile are counted and reported, not indexed."""
+    from credforge.ntlm_index import build_index_file, load_or_build_index
+    
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text("8846f7eaee8fb117ad06bdd830b7586c:password\n"
+                            "$2y$10$abcdefghijklmnopqrstuv:bcrypt\n"
+                            "5f4dcc3b5aa765d61d8327deb882cf99:md5\n"
+                            "e10adc3949ba59abbe56e057f20f883e4:odd\n", encoding='utf-8')
+    index_file = temp_dir / "cracked.txt.idx"
+    
+    assert build_index_file(str(cracked_file), str(index_file)) == (2, 2)
+    os.remove(index_file)
+    index = load_or_build_index(str(cracked_file), str(index_file))
+    try:
+        assert "Skipped 2 non-NTLM potfile entries" in capsys.readouterr().out
+        assert len(index) == 2
+        assert index.skipped_keys == 2
+        assert index.get("$2y$10$abcdefghijklmnopqrstuv") is None
+    finally:
+        index.close()
+
+def test_load_or_build_index_rebuilds_stale_index(temp_dir):
+    """Test that the index is rebuilt when the potfile changes."""
+    from credforge.ntlm_index import is_index_current, load_or_build_index
+    
+    cracked_file = temp_dir / "cracked.txt"
+    index_file = temp_dir / "cracked.txt.idx"
+    cracked_file.write_text("8846f7eaee8fb117ad06bdd830b7586c:password\n", encoding='utf-8')
+    
+    assert not is_index_current(str(index_file), str(cracked_file))
+    index = load_or_build_index(str(cracked_file), str(index_file))
+    assert index.get("8846f7eaee8fb117ad06bdd830b7586c") == "password"
+    index.close()
+    assert is_index_current(str(index_file), str(cracked_file))
+    
+    # Appending to the potfile changes its size, so the index is stale
+    with open(cracked_file, 'a', encoding='utf-8') as f:
+        f.write("64f12cddaa88057e06a81b54e73b949b:Summer2024!\n")
+    assert not is_index_current(str(index_file), str(cracked_file))
+    
+    index = load_or_build_index(str(cracked_file), str(index_file))
+    assert index.get("64f12cddaa88057e06a81b54e73b949b") == "Summer2024!"
+    index.close()
+    assert is_index_current(str(index_file), str(cracked_file))
+
+def test_process_password_files_with_index_file(temp_dir):
+    """Test matching against a memory-mapped index file."""
+    from credforge.combine_list_passwords import process_password_files
+    
+    cracked_file = temp_dir / "cracked.txt"
+    cracked_file.write_text("8846f7eaee8fb117ad06bdd830b7586c:password\n", encoding='utf-8')
+    hash_file = temp_dir / "hashes.txt"
+    hash_file.write_text(
+        "CORP\\bob:1003:aad3b435b51404eeaad3b435b51404ee:8846f7eaee8fb117ad06bdd830b7586c:::\n"
+        "CORP\\john:1001:aad3b435b51404eeaad3b435b51404ee:5fbc3d5fec8206a30f4b6c473d68ae76:::\n",
+        encoding='utf-8')
+    index_file = temp_dir / "cracked.idx"
+    output_file = temp_dir / "output.txt"
+    
+    assert process_password_files(str(cracked_file), str(hash_file), str(output_file),
+                                  index_file=str(index_file))
+    
+    assert index_file.exists()
+    assert output_file.read_text(encoding='utf-8') == \
+        "CORP\\bob:8846f7eaee8fb117ad06bdd830b7586c:password\n"
@@ -55,3 +55,95 @@ def test_analyze_passwords_nonexistent_file():
     
     with pytest.raises(FileNotFoundError):
         analyze_passwords("nonexistent_file.txt")
+
+def test_analyze_passwords_stream(temp_dir):
+    """Test that streaming mode finds the most common passwords within its error bounds."""
+    import random
+    from collections import Counter
+    from credforge.password_analyzer import analyze_passwords
+    
+    rng = random.Random(15)
+    common = [f"Summer{year}!" for year in range(2000, 2020)]
+    passwords = [rng.choice(common) if rng.random() < 0.3 else f"unique{i}" for i in range(20000)]
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text('\n'.join(passwords) + '\n', encoding='utf-8')
+    counter = Counter(passwords)
+    
+    # A budget large enough for every password gives exact results
+    result = analyze_passwords(str(input_file), stream=True)
+    assert not result['approximate']
+    assert result['unique_passwords'] == len(counter)
+    assert result['top_passwords'] == analyze_passwords(str(input_file))['top_passwords']
+    
+    result = analyze_passwords(str(input_file), stream=True, memory_budget=400 * 200)
+    assert result['approximate']
+    assert result['total_passwords'] == len(passwords)
+    assert abs(result['unique_passwords'] - len(counter)) < 4 * result['unique_error'] * len(counter)
+    assert {password for password, _ in result['top_passwords']} == {
+        password for password, _ in counter.most_common(10)}
+    for (password, count), error in zip(result['top_passwords'], result['count_errors']):
+        assert count - error <= counter[password] <= count
+        assert error <= result['count_error']
+
+def test_analyze_passwords_workers_match_serial(temp_dir, monkeypatch):
+    """Test that parallel analysis gives the serial results, in exact and streaming mode."""
+    import random
+    from credforge.password_analyzer import analyze_passwords
+    
+    rng = random.Random(16)
+    common = [f"Winter{i}" for i in range(30)]
+    lines = [rng.choice(common) if rng.random() < 0.2 else f"pw{rng.randrange(8000)}"
+             for _ in range(30000)]
+    input_file = temp_dir / "passwords.txt"
+    # Windows line endings and blank lines are handled like the serial reader does
+    input_file.write_bytes(('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8'))
+    
+    expected = analyze_passwords(str(input_file))
+    assert analyze_passwords(str(input_file), workers=3) == expected
+    # Partitions spill to the chosen directory and are removed with it
+    import tempfile
+    spill_dir = temp_dir / "spill"
+    spill_dir.mkdir()
+    used = []
+    original = tempfile.TemporaryDirectory
+    
+    def temporary_directory(*args, **kwargs):
+        used.append(kwargs.get('dir'))
+        return original(*args, **kwargs)
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(tempfile, 'TemporaryDirectory', temporary_directory)
+        assert analyze_passwords(str(input_file), workers=3, temp_dir=str(spill_dir)) == expected
+    assert used == [str(spill_dir)]
+    assert not any(spill_dir.iterdir())
+    
+    result = analyze_passwords(str(input_file), stream=True, workers=3)
+    assert result['total_passwords'] == expected['total_passwords']
+    assert result['unique_passwords'] == expected['unique_passwords']
+    # The sketches do not record first occurrences, so ties may be broken differently
+    assert [count for _, count in result['top_passwords']] == \
+        [count for _, count in expected['top_passwords']]
+    last = expected['top_passwords'][-1][1]
+    above = lambda top: {password for password, count in top if count > last}
+    assert above(result['top_passwords']) == above(expected['top_passwords'])
+    
+    with pytest.raises(FileNotFoundError):
+        analyze_passwords(str(temp_dir / "missing.txt"), workers=2)
+
+def test_analyze_passwords_stream_workers_merge_budget(temp_dir, monkeypatch):
+    """Test that the merged summary gets the full budget, not one worker's share."""
+    from credforge import password_analyzer
+    from credforge.sketches import SpaceSaving
+    
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text("".join(f"pw{i % 50}\n" for i in range(1000)), encoding='utf-8')
+    budgets = []
+    
+    def for_memory(memory_bytes):
+        budgets.append(memory_bytes)
+        return SpaceSaving(max(1, memory_bytes // 400))
+    
+    # Workers build their summaries in other processes, so only the parent's is recorded
+    monkeypatch.setattr(password_analyzer.SpaceSaving, 'for_memory', for_memory)
+    password_analyzer.analyze_passwords(str(input_file), stream=True, memory_budget=40000, workers=4)
+    assert budgets == [40000]
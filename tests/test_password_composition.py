@@ -0,0 +1,59 @@
+"""
+Unit tests for password_composition.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def write_passwords(path):
+    lines = ["password", "Password1", "P@ssw0rd2024", "  123456 \r", "", "aaaa",
+             "Sommer2024!Sommer", "pässwörd", "\t"]
+    path.write_bytes(('\n'.join(lines)).encode('utf-8'))  # No trailing newline
+
+def test_analyze_composition_python(temp_dir):
+    """Test composition statistics with the pure-Python implementation."""
+    from credforge.password_composition import analyze_composition
+    
+    input_file = temp_dir / "passwords.txt"
+    write_passwords(input_file)
+    
+    result = analyze_composition(str(input_file), use_numpy=False)
+    
+    assert result['total_passwords'] == 7
+    # Lengths count characters, so the two umlauts count once each
+    assert result['length_histogram'] == {4: 1, 6: 1, 8: 2, 9: 1, 12: 1, 17: 1}
+    assert result['class_composition'] == {
+        'lower': 2, 'lower+upper+digit': 1, 'lower+upper+digit+special': 2,
+        'digit': 1, 'lower+special': 1}
+    assert result['class_count_histogram'] == {1: 3, 2: 1, 3: 1, 4: 2}
+    assert result['policy_pass_rates']['8+ characters'] == pytest.approx(5 / 7)
+    assert result['policy_pass_rates']['8+ characters, 3 of 4 classes'] == pytest.approx(3 / 7)
+    assert result['policy_pass_rates']['14+ characters, 3 of 4 classes'] == pytest.approx(1 / 7)
+    # 'aaaa' has no entropy; '123456' has 6 * log2(6) bits
+    assert result['entropy_histogram'][(0, 10)] == 1
+    assert sum(result['entropy_histogram'].values()) == 7
+
+def test_analyze_composition_numpy_matches_python(temp_dir, monkeypatch):
+    """Test that the NumPy implementation gives the same statistics."""
+    pytest.importorskip('numpy')
+    import random
+    from credforge import password_composition
+    from credforge.password_composition import analyze_composition
+    
+    input_file = temp_dir / "passwords.txt"
+    write_passwords(input_file)
+    assert analyze_composition(str(input_file), use_numpy=True) == \
+        analyze_composition(str(input_file), use_numpy=False)
+    
+    rng = random.Random(17)
+    alphabet = "abcXYZ019!@ é\t"
+    lines = [''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 40))) for _ in range(5000)]
+    input_file.write_bytes(('\r\n'.join(lines) + '\n').encode('utf-8'))
+    
+    # Many blocks, with lines cut at block edges
+    monkeypatch.setattr(password_composition, 'BLOCK_SIZE', 4096)
+    expected = analyze_composition(str(input_file), use_numpy=False)
+    result = analyze_composition(str(input_file), use_numpy=True)
+    assert result['mean_entropy'] == pytest.approx(expected.pop('mean_entropy'))
+    del result['mean_entropy']
+    assert result == expected
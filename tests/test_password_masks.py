@@ -0,0 +1,86 @@
+"""
+Unit tests for password_masks.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def test_masks_and_keyspace():
+    """Test mapping passwords to hashcat masks, simple masks and keyspaces."""
+    from credforge.password_masks import compact_mask, hashcat_mask, keyspace, simple_mask
+    
+    assert hashcat_mask(compact_mask("Password1!")) == "?u?l?l?l?l?l?l?l?d?s"
+    assert compact_mask("a b~") == "lsls"
+    # Non-ASCII characters take one ?b per UTF-8 byte; control characters are ?b too
+    assert compact_mask("pä€\x01") == "lbbbbbb"
+    assert keyspace("uld") == 26 * 26 * 10
+    assert keyspace("s") == 33
+    
+    assert simple_mask(compact_mask("password")) == "allstring"
+    assert simple_mask(compact_mask("123456")) == "alldigit"
+    assert simple_mask(compact_mask("Password1")) == "stringdigit"
+    assert simple_mask(compact_mask("Password1!")) == "stringdigitspecial"
+    assert simple_mask(compact_mask("1pass!2")) == "complex"
+
+def test_mask_stats(temp_dir):
+    """Test aggregating, ranking and writing masks."""
+    from credforge.password_masks import MaskStats
+    
+    stats = MaskStats()
+    stats.update(["Password1", "Welcome1", "Password1", "summer", "123456"])
+    other = MaskStats()
+    other.update(["Monkey12", "winter"])
+    stats.merge(other)
+    
+    results = stats.results()
+    assert results['total_passwords'] == 7
+    assert results['distinct_masks'] == 5
+    assert results['top_masks'][:2] == [
+        ("?u?l?l?l?l?l?l?l?d", 2, 26 ** 8 * 10),
+        ("?l?l?l?l?l?l", 2, 26 ** 6),
+    ]
+    assert dict(results['simple_masks']) == {'stringdigit': 4, 'allstring': 2, 'alldigit': 1}
+    # 123456 has the smallest keyspace per crack
+    assert results['efficient_masks'][0] == ("?d?d?d?d?d?d", 1, 10 ** 6)
+    
+    hcmask_file = temp_dir / "masks.hcmask"
+    assert stats.write_hcmask(str(hcmask_file)) == 5
+    assert hcmask_file.read_text(encoding='utf-8').splitlines()[:2] == ["?d?d?d?d?d?d", "?l?l?l?l?l?l"]
+
+def test_mask_report_huge_keyspace(capsys):
+    """Test that keyspaces too large for a float are reported instead of overflowing."""
+    from credforge.password_masks import MaskStats, format_keyspace, print_mask_report
+    
+    assert format_keyspace(26 ** 8 * 10) == "2.09e+12"
+    assert format_keyspace(10 ** 400) == "1.00e+400"
+    assert format_keyspace(10 ** 400 - 1) == "9.99e+399"
+    assert format_keyspace(256 ** 130) == "1.17e+313"
+    
+    stats = MaskStats()
+    # 65 two-byte characters make a mask of 130 ?b, a keyspace of 256^130
+    stats.update(["\u00e9" * 65, "Password1"])
+    results = stats.results()
+    print_mask_report(results)
+    out = capsys.readouterr().out
+    assert "1.17e+313" in out
+    assert results['efficient_masks'][-1][2] == 256 ** 130
+
+def test_analyze_masks_workers(temp_dir):
+    """Test that mask counts from worker processes match a serial run."""
+    import random
+    from credforge.password_analyzer import analyze_masks
+    
+    rng = random.Random(18)
+    lines = [rng.choice(["Password", "summer", "Zürich"]) + str(rng.randrange(10 ** rng.randrange(1, 5)))
+             for _ in range(20000)]
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text('\n'.join(lines) + '\n\n', encoding='utf-8')
+    
+    serial = analyze_masks(str(input_file))
+    assert serial.total == 20000
+    assert analyze_masks(str(input_file), workers=3).masks == serial.masks
+    
+    with pytest.raises(ValueError, match="No passwords found"):
+        empty = temp_dir / "empty.txt"
+        empty.touch()
+        analyze_masks(str(empty))
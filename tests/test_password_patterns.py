@@ -0,0 +1,91 @@
+"""
+Unit tests for password_patterns.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def test_pattern_matcher():
+    """Test finding patterns, including leetspeak variants and overlapping walks."""
+    from credforge.password_patterns import PatternMatcher, default_patterns, fold
+    
+    assert fold("P@55w0rd") == "password"
+    matcher = PatternMatcher(default_patterns(["Acme"]))
+    
+    def found(password):
+        return sorted(matcher.patterns[index] for index in matcher.find(password))
+    
+    assert found("Summer2024!") == [('season', 'summer'), ('year', '2024')]
+    assert found("@cm3W1nter") == [('org term', 'acme'), ('season', 'winter')]
+    assert found("Fa11-1990") == [('season', 'fall'), ('year', '1990')]
+    # Walks inside a longer walk are not counted separately
+    assert found("Qwerty123") == [('keyboard walk', 'qwerty')]
+    assert found("1qaz2wsx") == [('keyboard walk', '1qaz2wsx')]
+    assert found("4321abc") == [('keyboard walk', '4321')]
+    assert found("jdoe") == []
+    assert found("Ünïcödé") == []
+
+def test_pattern_matcher_overlapping_categories():
+    """Test that a pattern ending inside a longer pattern of another category is kept."""
+    from credforge.password_patterns import PatternMatcher, default_patterns
+    
+    matcher = PatternMatcher(default_patterns(["arch", "ring"]))
+    
+    def found(password):
+        return sorted(matcher.patterns[index] for index in matcher.find(password))
+    
+    assert found("March2024") == [('month', 'march'), ('org term', 'arch'), ('year', '2024')]
+    assert found("Spring2024") == [('org term', 'ring'), ('season', 'spring'), ('year', '2024')]
+    assert found("arching") == [('org term', 'arch')]
+
+def test_pattern_matcher_agrees_with_substring_search():
+    """Test the automaton against a naive search over folded passwords."""
+    import random
+    from credforge.password_patterns import PatternMatcher, default_patterns, fold
+    
+    matcher = PatternMatcher(default_patterns(["corp"]))
+    rng = random.Random(19)
+    alphabet = "qwertyasdf1234!@0summerwintcorp90"
+    for _ in range(2000):
+        password = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(1, 16)))
+        folded = fold(password)
+        # Every reported pattern occurs, and every occurring pattern is covered by a
+        # reported pattern of the same category
+        found = [matcher.patterns[index] for index in matcher.find(password)]
+        for category, pattern in found:
+            assert fold(pattern) in folded
+        for category, pattern in matcher.patterns:
+            if fold(pattern) in folded:
+                assert any(c == category and fold(pattern) in fold(p) for c, p in found)
+
+def test_analyze_patterns(temp_dir):
+    """Test pattern statistics, serially and with worker processes."""
+    from credforge.password_analyzer import analyze_patterns
+    
+    passwords = ["Summer2024!", "Acme2023", "@cm3Winter", "qwerty123", "P@ssw0rd",
+                 "Summer2024!", "hunter2"] * 500
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text('\n'.join(passwords) + '\n', encoding='utf-8')
+    
+    results = analyze_patterns(str(input_file), ["Acme"]).results()
+    assert results['total_passwords'] == 3500
+    assert results['covered_passwords'] == 2500
+    assert results['category_counts'] == {'keyboard walk': 500, 'season': 1500, 'month': 0,
+                                          'year': 1500, 'org term': 1000}
+    assert results['top_patterns']['season'][0][:2] == ('summer', 1000)
+    assert results['top_patterns']['org term'][0] == ('acme', 1000, ["Acme2023", "@cm3Winter"])
+    
+    parallel = analyze_patterns(str(input_file), ["Acme"], workers=3).results()
+    assert parallel['category_counts'] == results['category_counts']
+    assert [entries[:2] for entries in parallel['top_patterns']['year']] == \
+        [entries[:2] for entries in results['top_patterns']['year']]
+
+def test_read_org_terms(temp_dir):
+    """Test reading organization terms."""
+    from credforge.password_patterns import read_org_terms
+    
+    terms_file = temp_dir / "terms.txt"
+    terms_file.write_text("Acme\n# products\n\nRoadRunner \n", encoding='utf-8')
+    assert read_org_terms(str(terms_file)) == ["Acme", "RoadRunner"]
+    with pytest.raises(FileNotFoundError):
+        read_org_terms(str(temp_dir / "missing.txt"))
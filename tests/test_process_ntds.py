@@ -90,3 +90,141 @@ def test_process_ntds_file_all_disabled(temp_dir):
     # Verify the output file was created but is empty (no active accounts)
     assert output_file.exists()
     assert output_file.stat().st_size == 0  # File should be empty
+
+def test_process_ntds_file_single_pass_statistics(temp_dir, capsys):
+    """Test the summary statistics and progress of a single-pass run over a larger dump."""
+    from credforge import process_ntds
+    from credforge.process_ntds import process_ntds_file
+    
+    input_file = temp_dir / "large_ntds.txt"
+    with open(input_file, 'w', encoding='utf-8', newline='') as f:
+        for i in range(3000):
+            status = 'Disabled' if i % 3 == 0 else 'enabled'
+            f.write(f"CORP\\user{i}:{1000 + i}:lm:nt{i}:{status}:false:false:false\r\n")
+        f.write("\n")
+        f.write("CORP\\last:9999:lm:nt:enabled:false:false:false")
+    
+    output_file = temp_dir / "active_accounts.ntds"
+    original_block_size = process_ntds.READ_BLOCK_SIZE
+    process_ntds.READ_BLOCK_SIZE = 4096
+    try:
+        process_ntds_file(str(input_file), str(output_file))
+    finally:
+        process_ntds.READ_BLOCK_SIZE = original_block_size
+    
+    output = capsys.readouterr().out
+    assert "Total accounts processed: 3,002" in output
+    assert "Disabled accounts found: 1,000 (33.3%)" in output
+    assert "Active accounts written to" in output and ": 2,002 (66.7%)" in output
+    assert "ETA" in output
+    
+    lines = output_file.read_text(encoding='utf-8').split('\n')
+    assert lines[0] == "CORP\\user1:1001:lm:nt1:enabled:false:false:false"
+    assert lines[-2] == "CORP\\last:9999:lm:nt:enabled:false:false:false"
+    assert lines[-1] == ''
+    assert len(lines) == 2002
+
+def test_parse_ntds_line():
+    """Test parsing NTDS lines into records."""
+    from credforge.process_ntds import parse_ntds_line
+    
+    record = parse_ntds_line("CORP\\WKS01$:1105:AAD3B435B51404EEAAD3B435B51404EE:"
+                             "31D6CFE0D16AE931B73C59D7E0C089C0:disabled:::\n")
+    assert record.domain == "CORP"
+    assert record.username == "WKS01$"
+    assert record.rid == 1105
+    assert record.nt_hash == "31d6cfe0d16ae931b73c59d7e0c089c0"
+    assert record.disabled is True
+    
+    record = parse_ntds_line("admin:notarid")
+    assert (record.domain, record.username, record.rid, record.nt_hash) == ("", "admin", None, "")
+    # Unicode digits are not a RID
+    assert parse_ntds_line("admin:\u00b2").rid is None
+    assert parse_ntds_line("admin:\u0661\u0662").rid is None
+    assert parse_ntds_line("   \n") is None
+
+def test_route_ntds_file_fan_out(temp_dir):
+    """Test routing accounts to several outputs in one scan."""
+    from credforge.process_ntds import (route_ntds_file, process_ntds_file, compile_predicates,
+                                        STANDARD_ROUTES)
+    
+    lm = "aad3b435b51404eeaad3b435b51404ee"
+    lines = [
+        f"CORP\\Administrator:500:{lm}:{'a' * 32}:enabled:::",
+        f"CORP\\krbtgt:502:{lm}:{'b' * 32}:disabled:::",
+        f"CORP\\alice:1104:{lm}:{'c' * 32}:enabled:::",
+        f"LAB\\bob:1105:{lm}:31d6cfe0d16ae931b73c59d7e0c089c0:enabled:::",
+        f"CORP\\DC01$:1000:{lm}:{'d' * 32}:enabled:::",
+        "",
+        "malformed",
+    ]
+    input_file = temp_dir / "ntds.txt"
+    input_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    
+    routes = [(spec, str(temp_dir / name)) for spec, name in STANDARD_ROUTES]
+    routes.append(('active,!machine,rid:1000-1999', str(temp_dir / "users.ntds")))
+    routes.append(('domain:lab|Other', str(temp_dir / "lab.ntds")))
+    counts = route_ntds_file(str(input_file), routes)
+    
+    def read(name):
+        return (temp_dir / name).read_text(encoding='utf-8').splitlines()
+    
+    # The active route matches the plain disabled-account filter exactly
+    process_ntds_file(str(input_file), str(temp_dir / "filtered.ntds"))
+    assert read("active.ntds") == read("filtered.ntds")
+    assert read("disabled.ntds") == [lines[1]]
+    assert read("machine.ntds") == [lines[4]]
+    assert read("empty_hash.ntds") == [lines[3]]
+    assert read("privileged.ntds") == lines[:2]
+    assert read("users.ntds") == lines[2:4]
+    assert read("lab.ntds") == [lines[3]]
+    assert counts[str(temp_dir / "active.ntds")] == 5
+    
+    with pytest.raises(ValueError):
+        compile_predicates("active,nonsense")
+    with pytest.raises(ValueError):
+        compile_predicates("rid:10-x")
+    with pytest.raises(ValueError, match="Invalid RID range"):
+        compile_predicates("rid:\u00b2")
+
+def test_process_ntds_file_workers_match_serial(temp_dir, capsys, monkeypatch):
+    """Test that filtering in a process pool gives the same output and statistics."""
+    from credforge import fileutils, process_ntds
+    from credforge.ntds_cache import import_ntds
+    from credforge.process_ntds import process_ntds_file
+    
+    input_file = temp_dir / "ntds.txt"
+    with open(input_file, 'w', encoding='utf-8') as f:
+        for i in range(20000):
+            status = 'disabled' if i % 7 == 0 else 'enabled'
+            f.write(f"CORP\\user{i}:{1000 + i}:aad3b435b51404eeaad3b435b51404ee:{i:032x}:"
+                    f"{status}:false:false:false\n")
+            if i % 5000 == 0:
+                f.write("\n")
+        f.write("CORP\\last:1:x:y")
+    cache_file = temp_dir / "ntds.ntdsc"
+    import_ntds(str(input_file), str(cache_file))
+    
+    def summary():
+        return [line for line in capsys.readouterr().out.splitlines()
+                if line.startswith(("Total", "Disabled", "Active"))]
+    
+    # A serial run needs no segment directory
+    with monkeypatch.context() as patch:
+        patch.setattr(process_ntds.tempfile, 'TemporaryDirectory', None)
+        process_ntds_file(str(input_file), str(temp_dir / "serial.ntds"))
+    expected = summary()
+    
+    original_min_chunk = fileutils.MIN_CHUNK_SIZE
+    fileutils.MIN_CHUNK_SIZE = 4096
+    try:
+        for source in (input_file, cache_file):
+            process_ntds_file(str(source), str(temp_dir / "parallel.ntds"), workers=3)
+            assert summary() == [line.replace("serial", "parallel") for line in expected]
+            assert (temp_dir / "parallel.ntds").read_bytes() == (temp_dir / "serial.ntds").read_bytes()
+    finally:
+        fileutils.MIN_CHUNK_SIZE = original_min_chunk
+    
+    # No temporary segments are left behind
+    assert sorted(p.name for p in temp_dir.iterdir()) == [
+        "ntds.ntdsc", "ntds.txt", "parallel.ntds", "serial.ntds"]
@@ -88,3 +88,253 @@ def test_remove_duplicates_empty_file(temp_dir):
     assert removed_count == 0
     assert output_file.exists()
     assert output_file.stat().st_size == 0  # Output file should be empty
+
+def test_deduplicate_statistics(temp_dir):
+    """Test that a single pass writes the output and gathers the duplicate statistics."""
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(b"alpha\r\nbeta\nalpha\n\ngamma\n beta \nalpha\nalpha\nbeta\n")
+    
+    from credforge.remove_duplicates import deduplicate
+    
+    output_file = temp_dir / "deduped.txt"
+    result = deduplicate(str(input_file), str(output_file))
+    
+    assert result.unique_lines == 3
+    assert result.duplicates_removed == 5
+    assert result.duplicate_entries == 2
+    assert result.samples == [("alpha", [3, 7, 8], 3), ("beta", [6, 9], 2)]
+    assert result.bytes_read == input_file.stat().st_size
+    # First occurrences and empty lines are written unchanged
+    assert output_file.read_bytes() == b"alpha\r\nbeta\n\ngamma\n"
+
+@pytest.mark.parametrize("mode", [{}, {'fingerprint_bits': 64}, {'max_memory': 1}, {'workers': 2}])
+def test_deduplicate_byte_semantics(temp_dir, mode):
+    """Test how line endings, invalid UTF-8 and Unicode whitespace compare, in every mode."""
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(b"word\r\nword\n"       # CRLF and LF: one line
+                           b"a\rb\na\n"             # A lone CR does not end a line
+                           b"caf\xe9\ncaf\xe8\n"    # Invalid UTF-8 is compared as is
+                           b"nbsp\xc2\xa0\nnbsp\n"  # A no-break space is not stripped
+                           b"caf\xe9\n")
+    
+    from credforge.remove_duplicates import deduplicate, find_duplicates
+    
+    output_file = temp_dir / "deduped.txt"
+    result = deduplicate(str(input_file), str(output_file), temp_dir=str(temp_dir), **mode)
+    assert output_file.read_bytes() == b"word\r\na\rb\na\ncaf\xe9\ncaf\xe8\nnbsp\xc2\xa0\nnbsp\n"
+    assert (result.unique_lines, result.duplicates_removed) == (7, 2)
+    assert [sample[:2] for sample in result.samples] == [("word", [2]), ("caf\ufffd", [9])]
+    
+    # --confirm previews the same duplicates
+    duplicates, unique_count = find_duplicates(str(input_file))
+    assert duplicates == {"word": [2], "caf\ufffd": [9]}
+    assert unique_count == 7
+
+def test_deduplicate_in_place_without_duplicates(temp_dir):
+    """Test that an in-place run without duplicates leaves the file untouched."""
+    input_file = temp_dir / "unique.txt"
+    input_file.write_text("one\ntwo\nthree\n", encoding='utf-8')
+    
+    from credforge.remove_duplicates import deduplicate
+    
+    result = deduplicate(str(input_file))
+    assert result.duplicates_removed == 0
+    assert input_file.read_text(encoding='utf-8') == "one\ntwo\nthree\n"
+    assert not (temp_dir / "unique.txt.backup").exists()
+    assert not (temp_dir / "unique.txt.tmp").exists()
+
+def test_main_confirm(temp_dir, sample_passwords, monkeypatch, capsys):
+    """Test that --confirm asks before changing anything."""
+    import sys
+    from credforge import remove_duplicates
+    
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text('\n'.join(sample_passwords) + '\n', encoding='utf-8')
+    original = input_file.read_text(encoding='utf-8')
+    
+    monkeypatch.setattr(sys, 'argv', ['remove_duplicates', str(input_file), '--confirm'])
+    monkeypatch.setattr('builtins.input', lambda prompt: 'n')
+    remove_duplicates.main()
+    assert "Operation cancelled" in capsys.readouterr().out
+    assert input_file.read_text(encoding='utf-8') == original
+    
+    # Without --confirm the file is deduplicated right away and the statistics follow
+    monkeypatch.setattr(sys, 'argv', ['remove_duplicates', str(input_file)])
+    monkeypatch.setattr('builtins.input', lambda prompt: pytest.fail("unexpected prompt"))
+    remove_duplicates.main()
+    out = capsys.readouterr().out
+    assert "Total duplicate instances: 2" in out
+    assert input_file.read_text(encoding='utf-8').split() == ["password1", "password2", "password3", "password4"]
+
+@pytest.mark.parametrize("bits", [64, 128])
+def test_deduplicate_fingerprints(temp_dir, bits):
+    """Test that fingerprint mode gives the same output as the exact mode."""
+    import random
+    from credforge.remove_duplicates import deduplicate
+    
+    rng = random.Random(22)
+    lines = [f"word{rng.randrange(3000)}" for _ in range(10000)]
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_text('\n'.join(lines) + '\n\n', encoding='utf-8')
+    
+    exact = deduplicate(str(input_file), str(temp_dir / "exact.txt"))
+    result = deduplicate(str(input_file), str(temp_dir / "fingerprints.txt"), fingerprint_bits=bits)
+    assert result == exact
+    assert (temp_dir / "fingerprints.txt").read_bytes() == (temp_dir / "exact.txt").read_bytes()
+
+def test_deduplicate_fingerprints_table_follows_distinct_lines(temp_dir, monkeypatch, capsys):
+    """Test that the fingerprint table is sized by distinct lines, not by the file size."""
+    from credforge import remove_duplicates
+    from credforge.fingerprint_set import MIN_SLOTS
+    
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(b"same\n" * 100000)
+    monkeypatch.setattr(remove_duplicates, 'MAX_PRESIZE_LINES', 0)
+    remove_duplicates.deduplicate(str(input_file), str(temp_dir / "once.txt"), fingerprint_bits=64)
+    assert f"Fingerprint table: {8 * MIN_SLOTS:,} bytes for 1 unique lines" in capsys.readouterr().out
+    
+    # The table grows past its initial size when there are more distinct lines
+    input_file.write_bytes(b"".join(b"%dword\n" % (i % 5000) for i in range(20000)))
+    result = remove_duplicates.deduplicate(str(input_file), str(temp_dir / "grown.txt"),
+                                           fingerprint_bits=64)
+    assert (result.unique_lines, result.duplicates_removed) == (5000, 15000)
+    assert f"Fingerprint table: {8 * 8 * MIN_SLOTS:,} bytes" in capsys.readouterr().out
+
+def test_deduplicate_verify_collisions(temp_dir, monkeypatch):
+    """Test that --verify keeps lines whose fingerprints collide."""
+    from credforge import fingerprint_set
+    from credforge.remove_duplicates import deduplicate
+    
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(b"aa\nbb\naa\ncc\nbb\r\nccc\ncc\n")
+    # Every line of the same length gets the same fingerprint
+    monkeypatch.setattr(fingerprint_set, 'fingerprint64', lambda line: len(line))
+    
+    result = deduplicate(str(input_file), str(temp_dir / "unverified.txt"), fingerprint_bits=64)
+    assert (temp_dir / "unverified.txt").read_bytes() == b"aa\nccc\n"
+    
+    result = deduplicate(str(input_file), str(temp_dir / "verified.txt"), fingerprint_bits=64,
+                         verify=True)
+    assert (temp_dir / "verified.txt").read_bytes() == b"aa\nbb\ncc\nccc\n"
+    assert result.unique_lines == 4
+    assert result.duplicates_removed == 3
+    assert result.fingerprint_collisions == 2
+    
+    with pytest.raises(ValueError):
+        deduplicate(str(input_file), str(temp_dir / "out.txt"), verify=True)
+
+@pytest.mark.parametrize("tail", [b"", b"\n", b"gamma", b"delta"])
+def test_deduplicate_external(temp_dir, tail):
+    """Test that the external mode matches the in-memory mode, samples included."""
+    from credforge.remove_duplicates import deduplicate
+    
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(b"alpha\r\nbeta\nalpha\n\ngamma\n beta \nalpha\nalpha\nbeta\n" + tail)
+    
+    exact = deduplicate(str(input_file), str(temp_dir / "exact.txt"))
+    # A budget of one byte spreads the lines over the most runs
+    result = deduplicate(str(input_file), str(temp_dir / "external.txt"), max_memory=1,
+                         temp_dir=str(temp_dir))
+    assert result.shards > 1
+    assert result._replace(shards=0) == exact
+    assert (temp_dir / "external.txt").read_bytes() == (temp_dir / "exact.txt").read_bytes()
+    # The runs are removed with their temp directory
+    assert sorted(path.name for path in temp_dir.iterdir()) == ["exact.txt", "external.txt", "wordlist.txt"]
+
+def test_deduplicate_external_unordered(temp_dir):
+    """Test that unordered external mode keeps the same lines and a large budget stays in memory."""
+    import random
+    from credforge.remove_duplicates import deduplicate
+    
+    rng = random.Random(23)
+    lines = [f"word{rng.randrange(3000)}" for _ in range(10000)]
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    
+    exact = deduplicate(str(input_file), str(temp_dir / "exact.txt"), max_memory=1 << 30)
+    assert exact.shards == 0
+    result = deduplicate(str(input_file), str(temp_dir / "unordered.txt"), max_memory=100_000,
+                         ordered=False)
+    assert 1 < result.shards < 256
+    assert result._replace(shards=0) == exact
+    assert sorted((temp_dir / "unordered.txt").read_text().split('\n')) == \
+        sorted((temp_dir / "exact.txt").read_text().split('\n'))
+    
+    with pytest.raises(ValueError):
+        deduplicate(str(input_file), str(temp_dir / "out.txt"), fingerprint_bits=64, max_memory=1)
+
+@pytest.mark.parametrize("mode", [{'max_memory': 1, 'ordered': False}, {'workers': 2},
+                                  {'workers': 2, 'ordered': False}])
+@pytest.mark.parametrize("data", [b"a\nb\na\nc", b"c\nb\na\nb\na", b"a\nb\n\n  "])
+def test_deduplicate_sharded_last_line(temp_dir, mode, data):
+    """Test that the runs' newline after a last line without one never reaches the output."""
+    from credforge.remove_duplicates import deduplicate
+    
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_bytes(data)
+    
+    deduplicate(str(input_file), str(temp_dir / "exact.txt"))
+    result = deduplicate(str(input_file), str(temp_dir / "sharded.txt"), **mode)
+    assert result.shards > 1
+    expected = (temp_dir / "exact.txt").read_bytes()
+    output = (temp_dir / "sharded.txt").read_bytes()
+    assert len(output) == len(expected)
+    assert output.endswith(b"\n") == expected.endswith(b"\n")
+    if mode.get('ordered', True):
+        assert output == expected
+    else:
+        assert sorted(output.split(b"\n")) == sorted(expected.split(b"\n"))
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_deduplicate_external_open_files(temp_dir, monkeypatch, ordered):
+    """Test that the most shards run within a limit of 128 open files."""
+    resource = pytest.importorskip("resource")
+    from credforge import remove_duplicates
+    
+    lines = [f"pass{i % 3000}" for i in range(10000)]
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    # Small reads, so the merge reads each .kept file more than once
+    monkeypatch.setattr(remove_duplicates, "MERGE_READ_ITEMS", 4)
+    
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(128, soft), hard))
+    try:
+        result = remove_duplicates.deduplicate(str(input_file), str(temp_dir / "external.txt"),
+                                               max_memory=1, ordered=ordered)
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+    assert result.shards == remove_duplicates.MAX_PARTITIONS
+    assert result.unique_lines == 3000
+    expected = ''.join(f"pass{i}\n" for i in range(3000))
+    output = (temp_dir / "external.txt").read_text()
+    if ordered:
+        assert output == expected
+    else:
+        assert sorted(output.splitlines()) == sorted(expected.splitlines())
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_deduplicate_workers(temp_dir, ordered):
+    """Test that sharding over worker processes gives the in-memory result."""
+    import random
+    from credforge.remove_duplicates import deduplicate
+    
+    rng = random.Random(24)
+    # Enough lines for several byte ranges, so shards span range boundaries
+    lines = [f"password{rng.randrange(20000)}" for _ in range(40000)]
+    input_file = temp_dir / "wordlist.txt"
+    input_file.write_text('\n'.join(lines) + '\n\n', encoding='utf-8')
+    
+    exact = deduplicate(str(input_file), str(temp_dir / "exact.txt"))
+    result = deduplicate(str(input_file), str(temp_dir / "parallel.txt"), workers=3, ordered=ordered)
+    assert result.shards == 3
+    assert result._replace(shards=0) == exact
+    expected = (temp_dir / "exact.txt").read_bytes()
+    output = (temp_dir / "parallel.txt").read_bytes()
+    if ordered:
+        assert output == expected
+    else:
+        assert sorted(output.split(b'\n')) == sorted(expected.split(b'\n'))
+    
+    with pytest.raises(ValueError):
+        deduplicate(str(input_file), str(temp_dir / "out.txt"), workers=0)
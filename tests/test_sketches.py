@@ -0,0 +1,46 @@
+"""
+Unit tests for sketches.py
+"""
+import random
+import pytest
+
+def test_space_saving_bounds_and_merge():
+    """Test that Space-Saving counts bracket the true counts, also after a merge."""
+    from collections import Counter
+    from credforge.sketches import SpaceSaving
+    
+    rng = random.Random(1)
+    items = [f"item{min(int(rng.paretovariate(1.2)), 5000)}" for _ in range(30000)]
+    counter = Counter(items)
+    
+    halves = [SpaceSaving(50), SpaceSaving(50)]
+    halves[0].update(items[:15000])
+    halves[1].update(items[15000:])
+    merged = halves[0]
+    merged.merge(halves[1])
+    
+    single = SpaceSaving(50)
+    single.update(items)
+    for summary in (single, merged):
+        assert summary.total == len(items)
+        assert len(summary.counts) < 100
+        for item, count in summary.counts.items():
+            assert count - summary.error(item) <= counter[item] <= count
+        # Every item more frequent than the floor is tracked
+        assert all(item in summary.counts for item, count in counter.items() if count > summary.floor)
+        assert [item for item, _ in summary.most_common(3)] == [item for item, _ in counter.most_common(3)]
+
+def test_hyperloglog_estimate_and_merge():
+    """Test that HyperLogLog estimates are within a few standard errors."""
+    from credforge.sketches import HyperLogLog
+    
+    for distinct in (100, 50000):
+        sketch = HyperLogLog()
+        other = HyperLogLog()
+        sketch.update(f"pw{i}" for i in range(distinct))
+        other.update(f"pw{i}" for i in range(0, distinct, 2))
+        sketch.merge(other)
+        assert abs(sketch.count() - distinct) <= 4 * sketch.relative_error * distinct + 1
+    
+    with pytest.raises(ValueError):
+        HyperLogLog().merge(HyperLogLog(10))
@@ -57,3 +57,12 @@ def test_split_credentials_empty_file(temp_dir):
     from credforge.split_credentials import split_credentials
     result = split_credentials(str(input_file), str(temp_dir))
     assert result is False
+
+def test_strip_domain():
+    """Test removing the DOMAIN\\ prefix from usernames."""
+    from credforge.split_credentials import strip_domain
+    
+    assert strip_domain("CORP\\jdoe") == "jdoe"
+    assert strip_domain("jdoe") == "jdoe"
+    assert strip_domain("a\\b\\jdoe") == "jdoe"
+    assert strip_domain(b"CORP\\jdoe") == b"jdoe"
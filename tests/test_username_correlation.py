@@ -0,0 +1,66 @@
+"""
+Unit tests for username_correlation.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+def test_match_username():
+    """Test containment, reversal, leetspeak and name-part matches."""
+    from credforge.username_correlation import match_username
+    
+    assert match_username("CORP\\jdoe", "jdoe") == 'exact'
+    assert match_username("jdoe", "Jdoe2024!") == 'contains'
+    assert match_username("jdoe", "JD0E!") == 'contains'
+    assert match_username("jdoe", "eodj99") == 'reversed'
+    assert match_username("john.smith", "Smith123") == 'name part'
+    assert match_username("jsmith42", "Jsmith2024") == 'name part'
+    assert match_username("jdoe", "Summer2024!") is None
+    # Too short to be meaningful
+    assert match_username("ab", "ab123") is None
+    # Name parts need four letters
+    assert match_username("j.li", "li2024") is None
+
+def test_correlate_usernames(temp_dir):
+    """Test counts, offenders and output order, serially and with workers."""
+    from credforge.username_correlation import correlate_usernames
+    
+    records = [
+        "CORP\\jdoe:aad3b435b51404eeaad3b435b51404ee:Jdoe2024!",
+        "CORP\\asmith:31d6cfe0d16ae931b73c59d7e0c089c0:Summer2024!",
+        "CORP\\mary.jones:8846f7eaee8fb117ad06bdd830b7586c:Jones#1",
+        "rlee:e19ccf75ee54e06b06a5907af13cef42:eelr",
+        "malformed line",
+        "svc_backup:5f4dcc3b5aa765d61d8327deb882cf99:svc_backup",
+    ] * 300
+    input_file = temp_dir / "creds.txt"
+    input_file.write_bytes(('\r\n'.join(records) + '\r\n').encode('utf-8'))
+    output_file = temp_dir / "offenders.txt"
+    
+    results = correlate_usernames(str(input_file), str(output_file))
+    assert results['total_records'] == 1500
+    assert results['malformed'] == 300
+    assert results['match_counts'] == {'exact': 300, 'contains': 300, 'reversed': 300,
+                                       'name part': 300}
+    assert results['matched'] == 1200
+    assert results['offenders'][:2] == [("jdoe", 'contains', "Jdoe2024!"),
+                                        ("mary.jones", 'name part', "Jones#1")]
+    lines = output_file.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1200
+    assert lines[:4] == ["jdoe:contains:Jdoe2024!", "mary.jones:name part:Jones#1",
+                         "rlee:reversed:eelr", "svc_backup:exact:svc_backup"]
+    
+    parallel_file = temp_dir / "offenders_parallel.txt"
+    assert correlate_usernames(str(input_file), str(parallel_file), workers=3) == results
+    assert parallel_file.read_bytes() == output_file.read_bytes()
+
+def test_correlate_usernames_no_records(temp_dir):
+    """Test files without username:hash:password records."""
+    from credforge.username_correlation import correlate_usernames
+    
+    input_file = temp_dir / "passwords.txt"
+    input_file.write_text("password1\npassword2\n", encoding='utf-8')
+    with pytest.raises(ValueError, match="No username:hash:password records"):
+        correlate_usernames(str(input_file))
+    with pytest.raises(FileNotFoundError):
+        correlate_usernames(str(temp_dir / "missing.txt"))
@@ -0,0 +1,76 @@
+"""
+Unit tests for wordlist_sets.py
+"""
+import os
+from pathlib import Path
+import pytest
+
+@pytest.mark.parametrize("bits", [64, 128, None])
+def test_union_wordlists(temp_dir, bits):
+    """Test that the union keeps first occurrences across inputs, in input order."""
+    from credforge.wordlist_sets import union_wordlists
+
+    first = temp_dir / "first.txt"
+    first.write_bytes(b"alpha\nbeta\r\nalpha\n\ngamma")
+    second = temp_dir / "second.txt"
+    second.write_bytes(b" beta \ndelta\ngamma\nepsilon\n")
+    output = temp_dir / "union.txt"
+
+    results = union_wordlists([str(first), str(second)], str(output), bits)
+    # Lines are written unchanged; a missing final newline is added
+    assert output.read_bytes() == b"alpha\nbeta\r\ngamma\ndelta\nepsilon\n"
+    assert results['inputs'] == [(str(first), 5, 3), (str(second), 4, 2)]
+    assert results['unique_lines'] == 5
+    assert results['skipped'] == 4
+    assert (results['index_bytes'] is None) == (bits is None)
+
+@pytest.mark.parametrize("bits", [64, None])
+def test_subtract_wordlists(temp_dir, bits):
+    """Test that lines of any excluded list are removed, with and without repeats."""
+    from credforge.wordlist_sets import subtract_wordlists
+
+    candidates = temp_dir / "candidates.txt"
+    candidates.write_bytes(b"summer2024\nwinter2024\nPassword1\n\nwinter2024\nautumn2024\r\nspring\n")
+    tried = temp_dir / "tried.txt"
+    tried.write_bytes(b"Password1\nletmein\n")
+    cracked = temp_dir / "cracked.txt"
+    cracked.write_bytes(b"spring")
+    output = temp_dir / "new.txt"
+
+    results = subtract_wordlists(str(candidates), [str(tried), str(cracked)], str(output), bits)
+    assert output.read_bytes() == b"summer2024\nwinter2024\nautumn2024\r\n"
+    assert results['excluded_lines'] == 3
+    assert results['lines_read'] == 7
+    assert results['written'] == 3
+    assert results['removed'] == 4
+
+    subtract_wordlists(str(candidates), [str(tried), str(cracked)], str(output), bits, unique=False)
+    assert output.read_bytes() == b"summer2024\nwinter2024\nwinter2024\nautumn2024\r\n"
+
+    with pytest.raises(FileNotFoundError):
+        subtract_wordlists(str(candidates), [str(temp_dir / "missing.txt")], str(output))
+
+def test_main_subtract(temp_dir, monkeypatch, capsys):
+    """Test the subtract command line, including --exact."""
+    import sys
+    from credforge import wordlist_sets
+
+    candidates = temp_dir / "candidates.txt"
+    candidates.write_text("a1\nb2\nc3\n", encoding='utf-8')
+    tried = temp_dir / "tried.txt"
+    tried.write_text("b2\n", encoding='utf-8')
+    output = temp_dir / "new.txt"
+
+    monkeypatch.setattr(sys, 'argv', ['wordlist_sets', 'subtract', str(candidates), str(tried),
+                                      '-o', str(output)])
+    wordlist_sets.main()
+    out = capsys.readouterr().out
+    assert "Lines written: 2" in out
+    assert "64-bit fingerprints" in out
+    assert output.read_text(encoding='utf-8') == "a1\nc3\n"
+
+    monkeypatch.setattr(sys, 'argv', ['wordlist_sets', 'subtract', str(candidates), str(tried),
+                                      '-o', str(output), '--exact'])
+    wordlist_sets.main()
+    assert "fingerprints" not in capsys.readouterr().out
+    assert output.read_text(encoding='utf-8') == "a1\nc3\n"